@@ -0,0 +1,4 @@
+# allows running the command line interface as `python -m sideeye_reviewer`
+from sideeye_reviewer.cli import main
+
+main()
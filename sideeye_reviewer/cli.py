@@ -0,0 +1,211 @@
+""" `sideeye` command line entry point - run with `python -m sideeye_reviewer <command> <session config>`
+
+    Every command reads the same JSON session config: keys named after DataManager parameters (image_folders, out_dir, labels,
+    shuffle_seed, pair_key, integrity_check, ...) are passed to the DataManager, and the keys in SESSION_KEYS configure the view
+    and controllers. Relative paths are resolved against the config file's directory.
+
+    NOTE: only the standard library is imported at module level - matplotlib, NumPy and PIL are imported by the commands that
+    need them, so `--help` and the non-GUI commands start quickly
+"""
+import os
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+
+# session config keys that aren't DataManager parameters, with their defaults
+SESSION_KEYS: Dict[str, Any] = {
+    "view": "multilabel",       # "multilabel" (checkboxes + NEXT) or "unilabel" (one button per label)
+    "fig_title": None,
+    "legend": None,             # {class name: color} legend drawn next to the images
+    "checkpoint": True,         # resume from the labels already in the results JSON
+    "progressive": False,       # draw cached previews first and swap in the full resolution images
+    "use_tiles": False,
+    "duplicate_radius": None,   # propagate labels to near-duplicates within this Hamming distance
+    "slide_duration": 2.5,
+    "buffer_size": 16,
+    "manifest": None,           # session manifest path, or true for one next to the results JSON (see models/session_manifest.py)
+    "event_log": None,          # folder for the session's event log, or true for one next to the results (see utils/throughput.py)
+}
+# config keys holding paths, resolved relative to the config file
+PATH_KEYS = ("image_folders", "out_dir", "pairing_cache", "tile_cache_dir", "thumbnail_cache_dir", "score_file", "integrity_cache", "manifest", "event_log")
+
+
+def load_session_config(config_path: str) -> Dict[str, Any]:
+    """ read a session config JSON, resolving relative paths against its directory """
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    if "image_folders" not in config:
+        raise ValueError(f"Session config {config_path} has no 'image_folders'")
+    if isinstance(config["image_folders"], str):
+        config["image_folders"] = [config["image_folders"]]
+    base_dir = os.path.dirname(os.path.abspath(config_path))
+    def resolve(path: str) -> str:
+        return os.path.normpath(os.path.join(base_dir, os.path.expanduser(path)))
+    for key in PATH_KEYS:
+        value = config.get(key)
+        if isinstance(value, str):
+            config[key] = resolve(value)
+        elif isinstance(value, list):
+            config[key] = [resolve(p) for p in value]
+    return config
+
+def split_session_config(config: Dict[str, Any]):
+    """ (DataManager kwargs, session settings) - unknown keys raise so that typos don't silently fall back to defaults """
+    import inspect
+    from .models.data_manager import DataManager
+    data_params = set(inspect.signature(DataManager.__init__).parameters) - {"self"}
+    unknown = [key for key in config if key not in data_params and key not in SESSION_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown session config key(s) {unknown}; expected DataManager parameters or one of {list(SESSION_KEYS)}")
+    session = {key: config.get(key, default) for key, default in SESSION_KEYS.items()}
+    return {key: value for key, value in config.items() if key in data_params}, session
+
+def create_data_manager(config: Dict[str, Any], **overrides):
+    from .models.data_manager import DataManager
+    data_kwargs, _ = split_session_config(config)
+    data_kwargs.update(overrides)
+    return DataManager(**data_kwargs)
+
+
+def _get_event_log(session: Dict[str, Any], data_manager):
+    if not session["event_log"]:
+        return None
+    from .models.event_log import EventLogger
+    return EventLogger.for_session(data_manager, None if session["event_log"] is True else session["event_log"])
+
+
+############################################# commands #############################################
+
+def run_review(config: Dict[str, Any], args: argparse.Namespace):
+    from .controllers.review_controller import ReviewerController
+    _, session = split_session_config(config)
+    if not config.get("out_dir") or not config.get("labels"):
+        sys.exit("A review session needs 'out_dir' and 'labels' in its config")
+    if session["view"] == "unilabel":
+        from .views.unilabel_reviewer import SingleLabelReviewerView as ViewClass
+    elif session["view"] == "multilabel":
+        from .views.multilabel_reviewer import MultiLabelReviewerView as ViewClass
+    else:
+        sys.exit(f"Unknown view '{session['view']}' - expected 'unilabel' or 'multilabel'")
+    view_kwargs = {"legend_dict": session["legend"], "use_tiles": session["use_tiles"]}
+    if session["fig_title"]:
+        view_kwargs["fig_title"] = session["fig_title"]
+    data_manager = create_data_manager(config)
+    manifest = session["manifest"]
+    if manifest is True:
+        from .models.session_manifest import get_default_manifest_path
+        manifest = get_default_manifest_path(data_manager.out_dir, data_manager.json_name)
+    controller = ReviewerController(
+        data_manager, ViewClass(**view_kwargs), session["progressive"], session["duplicate_radius"], _get_event_log(session, data_manager)
+    )
+    controller.initialize(False if args.restart else session["checkpoint"], manifest or None)
+
+def run_slideshow(config: Dict[str, Any], args: argparse.Namespace):
+    from .controllers.slides_controller import SlideshowController
+    from .views.slides_viewer import SlideshowViewerView
+    _, session = split_session_config(config)
+    if args.query:
+        # show the reviewed files matching a label query, e.g. --query "disagree AND NOT no_contest"
+        file_list = create_data_manager(config).query_files(args.query)
+        print(f"[DATA] {len(file_list)} file(s) match '{args.query}'")
+        data_manager = create_data_manager(config, file_list=file_list, enable_sorting=False)
+    else:
+        data_manager = create_data_manager(config, enable_sorting=False)
+    view_kwargs = {"legend_dict": session["legend"], "slide_duration": args.slide_duration or session["slide_duration"], "use_tiles": session["use_tiles"]}
+    if session["fig_title"]:
+        view_kwargs["fig_title"] = session["fig_title"]
+    controller = SlideshowController(
+        data_manager, SlideshowViewerView(**view_kwargs), session["progressive"], session["buffer_size"], _get_event_log(session, data_manager)
+    )
+    controller.initialize(checkpoint=False)
+
+def _get_results_json(data_manager) -> str:
+    if not data_manager.out_dir:
+        sys.exit("Exporting results needs 'out_dir' in the session config")
+    return os.path.join(data_manager.out_dir, data_manager.json_name)
+
+def run_export(config: Dict[str, Any], args: argparse.Namespace):
+    _, session = split_session_config(config)
+    if args.kind == "slideshow":
+        from .views.slideshow_export import export_slideshow
+        file_list = None
+        if args.query:
+            file_list = create_data_manager(config).query_files(args.query)
+        export_slideshow(
+            create_data_manager(config, enable_sorting=False), args.out, file_list,
+            fig_title=session["fig_title"] or "Slideshow", legend_dict=session["legend"], slide_duration=session["slide_duration"],
+            max_workers=args.workers
+        )
+    elif args.kind == "montage":
+        from .utils.bin_montage import export_bin_montages
+        data_manager = create_data_manager(config, enable_sorting=False)
+        export_bin_montages(_get_results_json(data_manager), config["image_folders"][0], args.out, args.labels, max_workers=args.workers)
+    else:
+        from .utils.materialize import materialize_bins
+        # counterparts are resolved through the session's pairing index when it pairs files by stem key
+        data_manager = create_data_manager(config, enable_sorting=False)
+        totals = materialize_bins(
+            _get_results_json(data_manager), config["image_folders"], args.out, args.labels, max_workers=args.workers, pairing_index=data_manager.pairing_index
+        )
+        print(", ".join(f"{count} {result}" for result, count in sorted(totals.items())))
+
+def run_index(config: Dict[str, Any], args: argparse.Namespace):
+    """ build the session's caches ahead of time (pairing, integrity scan, thumbnails, perceptual hashes) so that the GUI starts instantly """
+    # the pairing index (if pair_key is set) is built and cached by the DataManager constructor
+    data_manager = create_data_manager(config, integrity_check=not args.skip_integrity or config.get("integrity_check", False))
+    file_list = list(data_manager.get_file_list())
+    print(f"[DATA] {len(file_list)} file(s) in the session")
+    if args.thumbnails:
+        for folder_idx in range(len(data_manager.image_folders)):
+            data_manager.get_thumbnails(file_list, folder_idx)
+        print(f"[DATA] Thumbnails cached for {len(data_manager.image_folders)} folder(s)")
+    if args.duplicates:
+        data_manager.build_duplicate_index(file_list, max_workers=args.workers)
+        print("[DATA] Perceptual hash index built")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="sideeye", description="Review, browse and export image annotation datasets.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    review = subparsers.add_parser("review", help="label images in the reviewer GUI")
+    review.add_argument("config", help="session config JSON")
+    review.add_argument("--restart", action="store_true", help="start from the first file instead of resuming")
+    review.set_defaults(func=run_review)
+    slideshow = subparsers.add_parser("slideshow", help="browse images in the slideshow GUI")
+    slideshow.add_argument("config", help="session config JSON")
+    slideshow.add_argument("--query", default=None, help='only show reviewed files matching a label query, e.g. "disagree AND NOT clean"')
+    slideshow.add_argument("--slide-duration", type=float, default=None, help="seconds per slide during auto-play")
+    slideshow.set_defaults(func=run_slideshow)
+    export = subparsers.add_parser("export", help="export slides, per-label montages or per-label folders without a GUI")
+    export.add_argument("config", help="session config JSON")
+    export.add_argument("kind", choices=["slideshow", "montage", "folders"], help="what to export")
+    export.add_argument("--out", required=True, help="output directory")
+    export.add_argument("--labels", nargs="*", default=None, help="only export these bins (montage and folders)")
+    export.add_argument("--query", default=None, help="only export files matching a label query (slideshow)")
+    export.add_argument("--workers", type=int, default=None, help="worker threads/processes")
+    export.set_defaults(func=run_export)
+    index = subparsers.add_parser("index", help="build the pairing, integrity, thumbnail and duplicate caches ahead of a session")
+    index.add_argument("config", help="session config JSON")
+    index.add_argument("--skip-integrity", action="store_true", help="don't run the integrity scan (unless the config enables it)")
+    index.add_argument("--thumbnails", action="store_true", help="also generate thumbnails for every image folder")
+    index.add_argument("--duplicates", action="store_true", help="also build the perceptual hash index")
+    index.add_argument("--workers", type=int, default=None, help="worker processes")
+    index.set_defaults(func=run_index)
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isfile(args.config):
+        sys.exit(f"{args.config} not found")
+    try:
+        config = load_session_config(args.config)
+        split_session_config(config)
+    except ValueError as e:
+        sys.exit(str(e))
+    args.func(config, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
-from typing import List, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, List, Optional, Union, Tuple
 # local imports
 from ..types import ViewerLike, DataManagerType
+from ..models.event_log import EventLogger
 
 
 class BaseReviewController:
@@ -11,10 +14,12 @@ class BaseReviewController:
         - Handling window close
         Subclasses should override or extend with domain-specific callbacks (label assignment, or slideshow controls)
     """
-    def __init__(self, data_manager: DataManagerType, view: ViewerLike):
+    def __init__(self, data_manager: DataManagerType, view: ViewerLike, progressive: bool = False, event_log: Optional[EventLogger] = None):
         """
             :param data_manager: DataManager instance
             :param view:   either a reviewer-type view or a results viewer-type view
+            :param progressive: if True, draw cached low resolution previews immediately and swap in the full resolution images once decoded
+            :param event_log: optional EventLogger recording display/label/undo/navigation events for throughput analysis
         """
         # TODO: in the future, this will be a more general data manager object than the current one that only does sorting through the bin manager
         self.data_manager = data_manager
@@ -26,11 +31,25 @@ class BaseReviewController:
         self.num_files = 0
         self.current_idx: int = 0
         self._stop_requested = False
+        self.progressive = progressive
+        # incremented on every image load so that background decodes finishing for a previous image are discarded
+        self._display_token: int = 0
+        self._pending_full: Optional[Tuple[int, str, Future]] = None
+        # previews generated in the background on a thumbnail cache miss, shown if they arrive before the full resolution images
+        self._pending_preview: Optional[Tuple[int, Future]] = None
+        self.event_log = event_log
+        # resume by leaving out the labeled files rather than skipping as many files from the start - set by subclasses whose
+        # files can be labeled out of order
+        self.resume_by_labeled = False
+        # decoded images of the most recently displayed files, so that going back to one (e.g. on undo) doesn't touch the disk
+        # - bounded by number of files, and disabled (0) unless a subclass revisits images
+        self.recent_images_size = 0
+        self._recent_images: "OrderedDict[str, List[Any]]" = OrderedDict()
 
     def initialize(self, checkpoint: Union[bool, int] = True):
         """ called in subclasses to set up the file list from the sorter, then call the view setup """
         # get the list of files (possibly sliced by the checkpoint if given)
-        self.file_list = self.data_manager.get_file_list(checkpoint)
+        self.file_list = self.data_manager.get_file_list(checkpoint, skip_labeled=self.resume_by_labeled)
         self.num_files = len(self.file_list)
         self.current_idx = 0
 
@@ -44,12 +63,45 @@ class BaseReviewController:
         filename = self.file_list[idx]
         # get a list of full paths for the current filename under all available image folders in the manager
         # FIXME: will be moving this logic to the data manager
+        self._display_token += 1
+        if getattr(self.view, "use_tiles", False):
+            # tiled mode only fetches the visible tiles, so the full images are never loaded here
+            for i, pyramid in enumerate(self.data_manager.get_tile_pyramids(filename)):
+                self.view.display_tiled_image(pyramid, ax_idx=i)
+        elif self.progressive and filename not in self._recent_images:
+            self._load_progressive(idx, filename)
+        else:
+            imgs = self._get_images(filename)
+            for i, img in enumerate(imgs):
+                self.view.display_image(img, ax_idx=i)
+            if self.progressive:
+                self.view.set_preview_indicator(False)
+        self._update_progress(idx, filename)
+
+    def _get_images(self, filename: str) -> List[Any]:
+        """ decoded images of a file, from the recently displayed images when possible """
+        imgs = self._recent_images.get(filename)
+        if imgs is not None:
+            self._recent_images.move_to_end(filename)
+            return imgs
         imgs = self.data_manager.load_images(filename)
-        for i, img in enumerate(imgs):
-            self.view.display_image(img, ax_idx=i)
+        self._remember_images(filename, imgs)
+        return imgs
+
+    def _remember_images(self, filename: str, imgs: List[Any]):
+        if self.recent_images_size <= 0:
+            return
+        self._recent_images[filename] = imgs
+        self._recent_images.move_to_end(filename)
+        while len(self._recent_images) > self.recent_images_size:
+            self._recent_images.popitem(last=False)
+
+    def _update_progress(self, idx: int, filename: str):
+        """ update the title with the current file and progress, plus the summary box if one is used """
         # if view has a title or progress info:
         print_idx = self.num_files + idx + 1 if idx < 0 else idx + 1
         self.view.update_title(f"{self.view.fig_title}", f"{filename}\nProgress: {print_idx}/{len(self.file_list)}")
+        self._log_event("display", file=filename, pos=idx)
         # TODO: add logic to retrieve data for the summary box if applicable - using_summary should now be passed to the viewer constructor
         # self.view.update_summary(...)
         if self.use_summary:
@@ -57,10 +109,88 @@ class BaseReviewController:
             self.view.update_summary(summary_text)
 
 
+    def _load_progressive(self, idx: int, filename: str):
+        """ draw the cached previews right away and queue the full resolution decode to be swapped in when it finishes """
+        # drop the decodes for the previous image if they haven't started yet - they would be discarded anyway
+        if self._pending_preview is not None:
+            self._pending_preview[1].cancel()
+            self._pending_preview = None
+        if self._pending_full is not None:
+            self._pending_full[2].cancel()
+        previews = self.data_manager.load_cached_previews(filename)
+        if previews is not None:
+            for i, img in enumerate(previews):
+                self.view.display_image(img, ax_idx=i)
+        else:
+            # a cache miss means hashing and decoding every source - blank the axes and generate the previews in the background
+            for i in range(len(self.data_manager.image_folders)):
+                self.view.clear_image(ax_idx=i)
+            self._pending_preview = (self._display_token, self.data_manager.submit_load_previews(filename))
+        self.view.set_preview_indicator(True)
+        self._pending_full = (self._display_token, filename, self.data_manager.submit_load_images(filename))
+        # warm up the preview of the next file while the reviewer looks at this one
+        if idx + 1 < len(self.file_list):
+            self.data_manager.warm_previews(self.file_list[idx + 1])
+        self.view.start_polling(self._poll_full_res)
+
+    def _poll_full_res(self) -> bool:
+        """ timer callback on the GUI thread - returns False to stop polling once there's nothing left to swap in """
+        self._poll_previews()
+        if self._pending_full is None:
+            return False
+        token, filename, future = self._pending_full
+        if not future.done():
+            return True
+        self._pending_full = None
+        # previews still being generated would only cover up the full resolution images
+        if self._pending_preview is not None:
+            self._pending_preview[1].cancel()
+            self._pending_preview = None
+        # stale results (the reviewer already moved on) are simply discarded
+        if token != self._display_token or future.cancelled():
+            return False
+        try:
+            imgs = future.result()
+        except Exception as e:
+            print(f"[CONTROLLER] WARNING: full resolution decode failed, keeping the preview: {e}")
+            return False
+        self._remember_images(filename, imgs)
+        for i, img in enumerate(imgs):
+            self.view.display_image(img, ax_idx=i)
+        self.view.set_preview_indicator(False)
+        return False
+
+    def _poll_previews(self):
+        """ show previews generated in the background once they're ready, unless the reviewer already moved on """
+        if self._pending_preview is None or not self._pending_preview[1].done():
+            return
+        token, future = self._pending_preview
+        self._pending_preview = None
+        if token != self._display_token or future.cancelled():
+            return
+        try:
+            previews = future.result()
+        except Exception as e:
+            print(f"[CONTROLLER] WARNING: preview generation failed: {e}")
+            return
+        for i, img in enumerate(previews):
+            self.view.display_image(img, ax_idx=i)
+
+    def _log_event(self, kind: str, **fields):
+        """ no-op unless the controller was given an event log """
+        if self.event_log is not None:
+            self.event_log.log(kind, **fields)
+
+    def _close_event_log(self):
+        if self.event_log is not None:
+            self.event_log.log("exit")
+            self.event_log.close()
+
     def on_window_closed(self):
         """ if the user forcibly closes the window, do a final stop if not already set """
         if not self._stop_requested:
             print("[CONTROLLER] Window closed: stopping review...")
+            self._close_event_log()
             self._stop_requested = True
             if hasattr(self.view, "request_stop"):
                 self.view.request_stop()
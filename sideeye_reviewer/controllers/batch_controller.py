@@ -0,0 +1,150 @@
+import time
+from typing import List, Optional, Set, Tuple
+# local imports
+from ..types import ViewerLike, DataManagerType
+from ..models.event_log import EventLogger
+from ..utils.montage import compose_grid
+from .base_controller import BaseReviewController
+from .review_controller import ReviewerController
+
+
+class BatchReviewerController(ReviewerController):
+    """ Controller for labeling a page of K thumbnails per click (e.g. the easy majority class)
+        - the reviewer deselects the outliers on the page, then one label click assigns the label to the rest
+        - each page is recorded as a single BinManager history entry, so one undo reverts the whole batch
+        - deselected files are deferred to the end of the queue so they still get reviewed on a later page
+    """
+    def __init__(self, data_manager: DataManagerType, view: ViewerLike, nrows: int = 4, ncols: int = 6, event_log: Optional[EventLogger] = None):
+        """
+            :param nrows: rows of thumbnails per page
+            :param ncols: thumbnails per row
+            :param event_log: optional EventLogger - each labeled page is one "label" event listing the files it labeled
+        """
+        super().__init__(data_manager, view, event_log=event_log)
+        # deferred files are labeled after the files that follow them, so resuming has to skip the labeled files themselves
+        self.resume_by_labeled = True
+        self.nrows = nrows
+        self.ncols = ncols
+        self.per_page = nrows * ncols
+        self.grid_pad = 4
+        self.deselected: Set[int] = set()
+        # outliers deselected on earlier pages, reviewed again after the rest of the file list
+        self.deferred_files: List[str] = []
+        # (first index of the page, number of files it deferred, label) for each labeled page still in the labeling history,
+        # so that undo can restore it
+        self._page_history: List[Tuple[int, int, str]] = []
+        # (first index of the page, files it deferred, label) for each undone page, so that redo can label it again
+        self._redo_pages: List[Tuple[int, List[str], str]] = []
+
+    def initialize(self, checkpoint = True):
+        # skip ReviewerController.initialize since the view shows pages rather than single images
+        BaseReviewController.initialize(self, checkpoint)
+        labels = self.get_category_labels()
+        self.view.setup_gui(self, labels, use_summary=self.use_summary)
+        if self.file_list:
+            self._show_page()
+        self.view.main_loop()
+
+    @property
+    def num_queued(self) -> int:
+        return len(self.file_list) + len(self.deferred_files)
+
+    def _get_page_files(self) -> List[str]:
+        stop = min(self.current_idx + self.per_page, self.num_queued)
+        num_listed = len(self.file_list)
+        return [self.file_list[i] if i < num_listed else self.deferred_files[i - num_listed] for i in range(self.current_idx, stop)]
+
+    def _show_page(self):
+        """ compose the thumbnails of the current page into one grid image and display it with everything selected """
+        self.deselected.clear()
+        page_files = self._get_page_files()
+        thumbs = self.data_manager.get_thumbnails(page_files)
+        cell_size = self.data_manager.thumbnail_cache.max_size
+        grid = compose_grid(thumbs, self.nrows, self.ncols, cell_size, self.grid_pad)
+        self.view.show_page(grid, len(page_files), self.nrows, self.ncols, cell_size, self.grid_pad)
+        first, last = self.current_idx + 1, self.current_idx + len(page_files)
+        self.view.update_title(f"{self.view.fig_title}", f"Images {first}-{last} of {self.num_queued} - click to deselect outliers, then pick a label for the rest")
+        self._log_event("display", files=page_files, pos=self.current_idx)
+        self._shown_at = time.perf_counter()
+        # warm up the next page so that it displays from the thumbnail cache
+        next_start = self.current_idx + self.per_page
+        if next_start < len(self.file_list):
+            self.data_manager.prefetch_thumbnails(self.file_list[next_start:next_start + self.per_page])
+
+    def on_thumbnail_clicked(self, cell_idx: int):
+        """ toggle whether a thumbnail is excluded from the next batch label """
+        if cell_idx in self.deselected:
+            self.deselected.remove(cell_idx)
+        else:
+            self.deselected.add(cell_idx)
+        self.view.set_cell_deselected(cell_idx, cell_idx in self.deselected)
+
+    def get_on_label_clicked_cb(self, label):
+        def on_label_clicked(event):
+            """ assign the label to every selected file on the page as one history entry, then move to the next page """
+            if not self.file_list:
+                return
+            page_files = self._get_page_files()
+            selected = [fname for i, fname in enumerate(page_files) if i not in self.deselected]
+            if not selected:
+                self.view.display_warning("Every image on the page is deselected - select at least one before labeling.")
+                return
+            deferred = [fname for i, fname in enumerate(page_files) if i in self.deselected]
+            self.data_manager.assign_labels_to_group(selected, label)
+            self._log_event("label", files=selected, labels=[label], dwell=round(time.perf_counter() - self._shown_at, 3))
+            self.deferred_files.extend(deferred)
+            self._push_page(self.current_idx, len(deferred), label)
+            # a new label discards the undone batches, same as the labeling history
+            self._redo_pages.clear()
+            self._next_page()
+        return on_label_clicked
+
+    def on_undo_clicked(self, event):
+        """ revert the whole last batch and return to its page """
+        if not self._page_history:
+            self.view.display_warning("Nothing to undo.")
+            return
+        undone = self.data_manager.undo_label()
+        if not undone:
+            # the remaining pages dropped out of the bounded labeling history, so their labels are kept
+            self._page_history.clear()
+            self.view.display_warning("Nothing to undo.")
+            return
+        self._log_event("undo", files=undone)
+        self.current_idx, num_deferred, label = self._page_history.pop()
+        deferred = self.deferred_files[len(self.deferred_files) - num_deferred:]
+        if num_deferred:
+            del self.deferred_files[-num_deferred:]
+        self._redo_pages.append((self.current_idx, deferred, label))
+        self._show_page()
+
+    def on_redo_clicked(self, event):
+        """ label the last undone batch again and move on to the next page """
+        redone = self.data_manager.redo_label() if self._redo_pages else []
+        if not redone:
+            self.view.display_warning("Nothing to redo.")
+            return
+        self.current_idx, deferred, label = self._redo_pages.pop()
+        self._log_event("redo", files=redone)
+        self.deferred_files.extend(deferred)
+        self._push_page(self.current_idx, len(deferred), label)
+        self._next_page()
+
+    def _push_page(self, first_idx: int, num_deferred: int, label: str):
+        """ record a labeled page, dropping the oldest pages once their history entries were evicted from the labeling history """
+        self._page_history.append((first_idx, num_deferred, label))
+        num_undoable = self.data_manager.get_history_position()
+        if len(self._page_history) > num_undoable:
+            del self._page_history[:len(self._page_history) - num_undoable]
+
+    def on_next_clicked(self, event=None):
+        """ no NEXT button in batch mode - pages only advance by labeling them """
+        pass
+
+    def _next_page(self):
+        if self.current_idx + self.per_page < self.num_queued:
+            self.current_idx += self.per_page
+            self._show_page()
+        else:
+            print("[CONTROLLER] Reached end of file list. Stopping automatically.")
+            self.on_exit_clicked(None)
@@ -0,0 +1,92 @@
+import math
+# local imports
+from ..types import ViewerLike, DataManagerType
+from ..utils.montage import compose_grid
+from .base_controller import BaseReviewController
+
+
+class ContactSheetController(BaseReviewController):
+    """ Read-only controller for triaging a whole file list (e.g. a bin) as paged grids of thumbnails
+        - thumbnails come from the data manager's shared thumbnail cache and are generated in parallel on a miss
+        - the next page is prefetched in the background while the current one is displayed
+        - clicking a thumbnail opens the full view of that file, where PREV/NEXT step through single images
+    """
+    def __init__(self, data_manager: DataManagerType, view: ViewerLike, nrows: int = 6, ncols: int = 8, progressive: bool = False):
+        """
+            :param nrows: rows of thumbnails per page
+            :param ncols: thumbnails per row
+        """
+        super().__init__(data_manager, view, progressive)
+        self.nrows = nrows
+        self.ncols = ncols
+        self.per_page = nrows * ncols
+        self.current_page = 0
+        self.num_pages = 0
+        self.grid_pad = 4
+
+    def initialize(self, checkpoint = False):
+        super().initialize(checkpoint)
+        self.num_pages = math.ceil(self.num_files / self.per_page)
+        self.view.setup_gui(self, num_axes = self.data_manager.images_per_batch)
+        if self.file_list:
+            self._show_page(0)
+        self.view.main_loop()
+
+    def _get_page_files(self, page: int):
+        return self.file_list[page * self.per_page:(page + 1) * self.per_page]
+
+    def _show_page(self, page: int):
+        """ compose the thumbnails of a page into one grid image and display it """
+        self.current_page = page
+        thumbs = self.data_manager.get_thumbnails(self._get_page_files(page))
+        cell_size = self.data_manager.thumbnail_cache.max_size
+        grid = compose_grid(thumbs, self.nrows, self.ncols, cell_size, self.grid_pad)
+        self.view.show_grid(grid, self.nrows, self.ncols, cell_size, self.grid_pad)
+        first = page * self.per_page + 1
+        last = min((page + 1) * self.per_page, self.num_files)
+        self.view.update_title(f"{self.view.fig_title}", f"Page {page + 1}/{self.num_pages} - images {first}-{last} of {self.num_files}")
+        # warm up the next page so that paging forward is a pure cache read
+        if page + 1 < self.num_pages:
+            self.data_manager.prefetch_thumbnails(self._get_page_files(page + 1))
+
+    def on_prev_clicked(self, event=None):
+        """ previous page in grid mode, previous image in the full view """
+        if not self.file_list:
+            return
+        if self.view.grid_mode:
+            self._show_page((self.current_page - 1) % self.num_pages)
+        else:
+            self.current_idx = (self.current_idx - 1) % self.num_files
+            self._load_image(self.current_idx)
+
+    def on_next_clicked(self, event=None):
+        """ next page in grid mode, next image in the full view """
+        if not self.file_list:
+            return
+        if self.view.grid_mode:
+            self._show_page((self.current_page + 1) % self.num_pages)
+        else:
+            self.current_idx = (self.current_idx + 1) % self.num_files
+            self._load_image(self.current_idx)
+
+    def on_thumbnail_clicked(self, cell_idx: int):
+        """ open the full view of the clicked thumbnail """
+        idx = self.current_page * self.per_page + cell_idx
+        if idx >= self.num_files:
+            return
+        self.current_idx = idx
+        self.view.show_full()
+        self._load_image(idx)
+
+    def on_grid_clicked(self, event=None):
+        """ return to the grid, on the page containing the image shown in the full view """
+        if not self.file_list or self.view.grid_mode:
+            return
+        self.view.set_preview_indicator(False)
+        self._show_page(self.current_idx // self.per_page)
+
+    def on_exit_clicked(self, event=None):
+        """ exit viewer and close the window """
+        self._stop_requested = True
+        if hasattr(self.view, "request_stop"):
+            self.view.request_stop()
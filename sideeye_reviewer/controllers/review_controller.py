@@ -1,18 +1,62 @@
-from typing import Optional, List, Union
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, List, Union, Dict, Set
 # local imports
 from ..types import ViewerLike, DataManagerType
+from ..models.event_log import EventLogger
+from ..models.review_ordering import PriorityFileList
 from .base_controller import BaseReviewController
 
 
 
 class ReviewerController(BaseReviewController):
     """ Track the Model and the View states - handles user actions (button clicks, etc.), updates the Model, and tells the View to re-draw """
-    def __init__(self, data_manager: DataManagerType, view: ViewerLike):
-        """ exact same constructor as the base class but added for clarity """
-        super().__init__(data_manager, view)
+    def __init__(
+        self,
+        data_manager: DataManagerType,
+        view: ViewerLike,
+        progressive: bool = False,
+        duplicate_radius: Optional[int] = None,
+        event_log: Optional[EventLogger] = None,
+        recent_images: int = 8
+    ):
+        """ same constructor as the base class, plus:
+            :param duplicate_radius: if given, labels are propagated to every upcoming near-duplicate of the labeled image
+                                     (perceptual hashes within this Hamming distance) as one undoable action - the hashes are
+                                     computed in a process pool (see DataManager.build_duplicate_index)
+            :param recent_images:    number of recently displayed files whose decoded images are kept, so that undo shows them instantly
+        """
+        super().__init__(data_manager, view, progressive, event_log)
+        self.duplicate_radius = duplicate_radius
+        # labels propagated to near-duplicates further ahead make the labeled files a non-contiguous set
+        self.resume_by_labeled = duplicate_radius is not None
+        self.recent_images_size = recent_images
+        # files labeled through propagation - skipped when navigating forward
+        self._propagated: Set[str] = set()
+        self._file_positions: Dict[str, int] = {}
+        # position of the file each labeling action was made on, to return to it on undo/redo - bounded by the history size
+        self._labeled_positions: "OrderedDict[str, int]" = OrderedDict()
+        # optional session manifest (see models/session_manifest.py) - set up by initialize()
+        self.manifest = None
+        self._shown_at = time.perf_counter()
+        self._reached_end = False
 
-    def initialize(self, checkpoint = True):
+    def initialize(self, checkpoint = True, manifest: Optional[str] = None):
+        """
+            :param checkpoint: resume where the previous session stopped (see DataManager.check_if_resuming)
+            :param manifest:   path of a session manifest - when resuming, its saved dataset listing and progress cursor are used instead
+                               of listing the image folders and counting the results, and it's updated when the session is exited
+        """
+        if manifest is not None:
+            self._load_manifest(manifest, checkpoint)
         super().initialize(checkpoint)
+        if self.duplicate_radius is not None:
+            # iterating a lazily served priority list doesn't serve anything (see PriorityFileList.__iter__)
+            self.data_manager.build_duplicate_index(self.file_list)
+            # its queued files have no fixed position yet, since their scores can still be updated - it's asked directly instead
+            if not isinstance(self.file_list, PriorityFileList):
+                self._file_positions = {fname: i for i, fname in enumerate(self.file_list)}
         labels = self.get_category_labels()
         #& UPDATE: passing use_summary to the view constructor to handle summary box logic - self.use_summary set by the base class constructor after retrieving it from the data manager
         self.view.setup_gui(self, labels, num_axes = self.data_manager.images_per_batch, use_summary=self.use_summary)
@@ -22,18 +66,87 @@ class ReviewerController(BaseReviewController):
 
     def on_undo_clicked(self, event):
         """ undo the last label sorting, popping the last label from all bins it was placed in """
+        self._undo(1)
+
+    def on_redo_clicked(self, event):
+        """ re-apply the last undone label sorting and move on from the image it was assigned to """
+        if not self._redo(1):
+            self.view.display_warning("Nothing to redo.")
+
+    def jump_to_history(self, index: int):
+        """ undo or redo until the first `index` entries of the labeling history are applied, e.g. 0 reverts the whole history """
+        num_applied = self.data_manager.get_history_position()
+        if index < num_applied:
+            self._undo(num_applied - index)
+        elif index > num_applied:
+            self._redo(index - num_applied)
+
+    def _undo(self, steps: int) -> List[str]:
         # NOTE: # "remove=True" triggers bin_manager.undo_sort() internally
-        self.data_manager.undo_label()
-        # step backwards unless at 0
+        undone = self.data_manager.undo_label(steps)
+        self._propagated.difference_update(undone)
+        if undone:
+            self._log_event("undo", files=undone)
+        # return to the image that the earliest undone labels were assigned from (the first file in its history entry)
+        position = self._get_file_position(undone[0]) if undone else None
+        if position is not None:
+            self.current_idx = position
+        # otherwise step backwards unless at 0
         # TODO: remove negative indexing restriction globally after tracking down relevant logic
-        if self.current_idx > 0:
+        elif self.current_idx > 0:
             self.current_idx -= 1
+        self._reached_end = False
+        self._load_image(self.current_idx)
+        return undone
+
+    def _redo(self, steps: int) -> List[str]:
+        redone: List[str] = []
+        position = None
+        # one step at a time, since the rest of each history entry's files were labeled through propagation
+        for _ in range(steps):
+            entry = self.data_manager.redo_label()
+            if not entry:
+                break
+            redone.extend(entry)
+            self._propagated.update(entry[1:])
+            position = self._get_file_position(entry[0])
+        if not redone:
+            return redone
+        self._log_event("redo", files=redone)
+        if position is None:
+            position = self.current_idx
+        # move past the image the last redone labels were assigned from, staying on it at the end of the file list
+        next_idx = position + 1
+        while next_idx < len(self.file_list) and self.file_list[next_idx] in self._propagated:
+            next_idx += 1
+        self.current_idx = next_idx if next_idx < len(self.file_list) else position
         self._load_image(self.current_idx)
+        return redone
+
+    def _get_file_position(self, filename: str) -> Optional[int]:
+        """ position of a file a history entry was labeled from (None once it dropped out of the history) """
+        return self._labeled_positions.get(filename)
+
+    def _remember_position(self, filename: str, position: int):
+        self._labeled_positions[filename] = position
+        self._labeled_positions.move_to_end(filename)
+        max_size = self.data_manager.sorter.sort_history.capacity if self.data_manager.sorter is not None else 0
+        while len(self._labeled_positions) > max_size:
+            self._labeled_positions.popitem(last=False)
 
     def on_exit_clicked(self, event): # formerly `on_stop_clicked`
         """ stops the review and closes the session """
         print("[CONTROLLER] Stopping review. Writing results to JSON...")
         self.data_manager.write_results()
+        self._close_event_log()
+        # only saved along with the results, so the cursor never points past labels that weren't written
+        if self.manifest is not None:
+            cursor = len(self.file_list) if self._reached_end else self.current_idx
+            # positions in a list with the labeled files left out don't map back to the ordered dataset
+            if self.resume_by_labeled:
+                cursor = 0
+            self.manifest.update(self.data_manager, self.data_manager.resume_offset + cursor, getattr(self.view, "legend_dict", None))
+            self.manifest.save()
         self._stop_requested = True
         if hasattr(self.view, "request_stop"):
             self.view.request_stop()
@@ -43,9 +156,7 @@ class ReviewerController(BaseReviewController):
             """ called when user clicks a single-label or multi-label button """
             if not self.file_list:
                 return
-            current_file = self.file_list[self.current_idx]
-            self.data_manager.assign_labels(current_file, label)
-            self._next_image()
+            self._label_and_advance(label)
         return on_label_clicked
 
     def on_next_clicked(self, event):
@@ -58,17 +169,85 @@ class ReviewerController(BaseReviewController):
             if not chosen_labels:
                 self.view.display_warning("Please select at least one checkbox before clicking 'NEXT'.")
                 return
-            current_file = self.file_list[self.current_idx]
-            self.data_manager.assign_labels(current_file, chosen_labels)
+            self._label_and_advance(chosen_labels)
+            return
+        self._log_event("next", file=self.file_list[self.current_idx])
+        self._next_image()
+
+    def _label_and_advance(self, labels: Union[str, List[str]]):
+        """ label the current file and move on, recording how long the image was shown and how long the next one took to appear """
+        clicked_at = time.perf_counter()
+        position, shown_at = self.current_idx, self._shown_at
+        group = self._assign_current(labels)
+        # the whole group, like the undo/redo events of its history entry
+        self._log_event("label", files=group, labels=[labels] if isinstance(labels, str) else list(labels), dwell=round(clicked_at - shown_at, 3))
+        if self.manifest is not None:
+            # recorded before moving on, since labeling the last image saves the manifest right away
+            self.manifest.timings.record(self.data_manager.resume_offset + position, clicked_at - shown_at)
         self._next_image()
+        if self.manifest is not None and not self._reached_end:
+            self.manifest.timings.set_last_latency(time.perf_counter() - clicked_at)
+
+    def _assign_current(self, labels: Union[str, List[str]]) -> List[str]:
+        """ label the current file, along with its upcoming near-duplicates if propagation is enabled - returns every file labeled """
+        current_file = self.file_list[self.current_idx]
+        self._remember_position(current_file, self.current_idx)
+        group = self.get_label_group(current_file)
+        if len(group) == 1:
+            self.data_manager.assign_labels(current_file, labels)
+        else:
+            self.data_manager.assign_labels_to_group(group, labels)
+            self._propagated.update(group[1:])
+            print(f"[CONTROLLER] Propagated labels {labels} to {len(group) - 1} near-duplicate(s) of {current_file}")
+        return group
+
+    def get_label_group(self, current_file: str) -> List[str]:
+        """ the current file followed by its near-duplicates that are still ahead in the file list and not yet labeled """
+        group = [current_file]
+        if self.duplicate_radius is None:
+            return group
+        for fname in self.data_manager.get_near_duplicates(current_file, self.duplicate_radius):
+            if self._is_upcoming(fname) and fname not in self._propagated:
+                group.append(fname)
+        return group
+
+    def _is_upcoming(self, filename: str) -> bool:
+        """ whether a file comes after the current one in the file list """
+        if isinstance(self.file_list, PriorityFileList):
+            # queued files are only ever served after the current one, whatever their scores are updated to
+            if self.file_list.is_queued(filename):
+                return True
+            pos = self.file_list.get_served_position(filename)
+        else:
+            pos = self._file_positions.get(filename)
+        return pos is not None and pos > self.current_idx
 
     ############################### Navigation Methods ###############################
 
     def _next_image(self):
-        """ move to next image index, load from model, tell the view to display it """
-        if self.current_idx < len(self.file_list) - 1:
-            self.current_idx += 1
+        """ move to next image index (skipping files already labeled through propagation), load from model, tell the view to display it """
+        next_idx = self.current_idx + 1
+        while next_idx < len(self.file_list) and self.file_list[next_idx] in self._propagated:
+            next_idx += 1
+        if next_idx < len(self.file_list):
+            self.current_idx = next_idx
             self._load_image(self.current_idx)
         else:
             print("[CONTROLLER] Reached end of file list. Stopping automatically.")
+            self._reached_end = True
             self.on_exit_clicked(None)
+
+    def _load_image(self, idx: int):
+        super()._load_image(idx)
+        self._shown_at = time.perf_counter()
+
+    def _load_manifest(self, manifest_path: str, checkpoint: Union[bool, int]):
+        from ..models.session_manifest import SessionManifest
+        if checkpoint and os.path.exists(manifest_path):
+            self.manifest = SessionManifest.load(manifest_path)
+            self.manifest.apply(self.data_manager)
+            # the legend is kept with the session, so a view created without one can still show it
+            if self.manifest.legend and getattr(self.view, "legend_dict", None) is None:
+                self.view.legend_dict = self.manifest.legend
+        else:
+            self.manifest = SessionManifest(manifest_path)
@@ -1,13 +1,23 @@
+from typing import Optional
 # local imports
 from ..types import ViewerLike, DataManagerType
+from ..models.event_log import EventLogger
 from .base_controller import BaseReviewController
+from ..models.playback import PlaybackBuffer, NavigationTracker
 
 
 class SlideshowController(BaseReviewController):
     """ Controller for slideshow viewer without labeling/annotation capabilities """
-    def __init__(self, data_manager: DataManagerType, view: ViewerLike):
-        super().__init__(data_manager, view)
+    def __init__(self, data_manager: DataManagerType, view: ViewerLike, progressive: bool = False, buffer_size: int = 16, event_log: Optional[EventLogger] = None):
+        """
+            :param buffer_size: number of frames decoded ahead of the playhead during auto-play
+        """
+        super().__init__(data_manager, view, progressive, event_log)
         self.playing_animation = False
+        self.buffer_size = buffer_size
+        self.playback: Optional[PlaybackBuffer] = None
+        # direction/speed of recent PREV/NEXT steps, deciding how the prefetch budget is split between both sides
+        self.nav_tracker = NavigationTracker()
 
     def initialize(self, checkpoint = True):
         super().initialize(checkpoint)
@@ -18,30 +28,102 @@ class SlideshowController(BaseReviewController):
 
     def on_prev_clicked(self, event=None):
         """ returns to previous image """
-        if len(self.file_list) > 0:
-            self.current_idx = (self.current_idx - 1) % len(self.file_list)
-            self._load_image(self.current_idx)
+        self._step(-1)
 
     def on_next_clicked(self, event=None):
         """ skips to next image """
-        if len(self.file_list) > 0:
-            self.current_idx = (self.current_idx + 1) % len(self.file_list)
+        self._step(1)
+
+    def _step(self, step: int):
+        """ move by one image (wrapping around both ends), showing it from the prefetched frames when possible """
+        if len(self.file_list) == 0:
+            return
+        self._log_event("next" if step > 0 else "prev", file=self.file_list[self.current_idx])
+        self.current_idx = (self.current_idx + step) % len(self.file_list)
+        if getattr(self.view, "use_tiles", False):
+            # tiled mode fetches tiles on demand, so there are no full frames to prefetch
             self._load_image(self.current_idx)
+            return
+        self.nav_tracker.record(step)
+        playback = self._get_playback()
+        # progressive mode would rather draw a preview right away than wait on a decode already running - a decode that hasn't
+        # started is dropped either way and the frame is loaded directly below
+        imgs = playback.get(self.current_idx, wait=not self.progressive)
+        if imgs is not None:
+            self._display_token += 1
+            for i, img in enumerate(imgs):
+                self.view.display_image(img, ax_idx=i)
+            self._update_progress(self.current_idx, self.file_list[self.current_idx])
+        else:
+            self._load_image(self.current_idx)
+        # auto-play keeps its own forward window, refilled on every tick
+        if not self.playing_animation:
+            forward, backward = self.nav_tracker.split_budget(playback.capacity)
+            playback.fill(self.current_idx, ahead=forward, behind=backward)
+
+    def _get_playback(self) -> PlaybackBuffer:
+        if self.playback is None:
+            self.playback = PlaybackBuffer(
+                lambda pos: self.data_manager.load_images(self.file_list[pos]),
+                len(self.file_list),
+                capacity = self.buffer_size
+            )
+        return self.playback
 
     def on_start_clicked(self, event=None):
         """ start auto-play for slideshow """
+        if not self.file_list or self.playing_animation:
+            return
         self.playing_animation = True
+        playback = self._get_playback()
+        playback.reset_stats()
+        playback.fill(self.current_idx, ahead=playback.capacity)
         if hasattr(self.view, "start_animation"):
             self.view.start_animation()
 
+    def on_playback_tick(self) -> bool:
+        """ timer callback during auto-play - shows the next frame if it's already decoded, otherwise counts a dropped frame
+            and keeps the current one on screen. Returns False to stop the timer.
+        """
+        if not self.playing_animation or not self.file_list:
+            return False
+        playback = self._get_playback()
+        next_idx = (self.current_idx + 1) % len(self.file_list)
+        imgs = playback.get(next_idx)
+        if imgs is None:
+            playback.record_tick(False)
+            playback.fill(self.current_idx, ahead=playback.capacity)
+            return True
+        self._display_token += 1  # any pending progressive decode now belongs to a stale frame
+        for i, img in enumerate(imgs):
+            self.view.display_image(img, ax_idx=i)
+        self.current_idx = next_idx
+        self._update_progress(next_idx, self.file_list[next_idx])
+        playback.record_tick(True)
+        playback.fill(self.current_idx, ahead=playback.capacity)
+        return True
+
     def on_stop_clicked(self, event=None):
         """ stop auto-play for slideshow """
-        self.playing_animation = False
         if hasattr(self.view, "stop_animation"):
             self.view.stop_animation()
+        if self.playing_animation and self.playback is not None:
+            print(f"[CONTROLLER] Playback stopped: {self.playback.frames_shown} frame(s) shown, {self.playback.dropped_frames} dropped")
+        self.playing_animation = False
 
     def on_exit_clicked(self, event=None):
         """ exit viewer and close the window """
+        self.on_stop_clicked()
+        if self.playback is not None:
+            self.playback.shutdown()
+        self._close_event_log()
         self._stop_requested = True
         if hasattr(self.view, "request_stop"):
-            self.view.request_stop()
\ No newline at end of file
+            self.view.request_stop()
+
+    def on_window_closed(self):
+        """ stop auto-play and its decode threads before the base class cleanup """
+        self.on_stop_clicked()
+        if self.playback is not None:
+            self.playback.shutdown()
+        super().on_window_closed()
@@ -30,8 +30,8 @@ class FigureLayoutManager:
             3) A bottom row for horizontally aligned buttons.
             4) References to all Axes in a dictionary.
     """
-    MAX_IMG_PER_FIGURE = 4  # max number of images per figure - throw error if num_images > this
-    MAX_IMG_COLS = 3  # max number of image per row
+    MAX_IMG_PER_FIGURE = ConstFigureDefaults.MAX_IMG_PER_FIGURE  # max number of images per figure - throw error if num_images > this
+    MAX_IMG_COLS = ConstFigureDefaults.MAX_IMG_COLS  # max number of image per row
     FIGURE_DIMS = (12, 7)  # default figure dimensions (width, height)
 
     def __init__(
@@ -170,11 +170,12 @@ class FigureLayoutManager:
         return button_axes_data
 
     def _compute_image_grid_shape(self) -> Tuple[int, int]:
-        """ dynamically calculates the number of rows and columns needed based on image counts """
-        return (
-            self.num_images // self.MAX_IMG_COLS + (1 if self.num_images % self.MAX_IMG_COLS else 0),
-            min(self.num_images, self.MAX_IMG_COLS),
-        )
+        """ dynamically calculates the number of rows and columns needed based on image counts
+            - images are spread evenly over the rows so that 4 images give a 2x2 grid rather than 3 + 1
+        """
+        num_rows = self.num_images // self.MAX_IMG_COLS + (1 if self.num_images % self.MAX_IMG_COLS else 0)
+        num_cols = self.num_images // num_rows + (1 if self.num_images % num_rows else 0)
+        return num_rows, num_cols
 
     ############* getter methods for accessing the created Axes and subfigures ############
 
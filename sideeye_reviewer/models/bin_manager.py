@@ -1,19 +1,24 @@
 import os
 import json
 from collections import deque
-from typing import Dict, List, Deque, Optional, Union
+from typing import Dict, List, Deque, Optional, Union, Set
+# local imports
+from .history_ring import HistoryRing
 
 
 # might rename to something like "SorterModel" later
 class BinManager:
     """ A unified bin manager that can handle both single-label and multi-label reviewing.
-        Each time a file is sorted (or undone), we record that in sort_history so that 'undo' works the same way for single or multiple labels.
+        Each time a file is sorted (or undone), we record that in sort_history so that 'undo' and 'redo' work the same way for single or multiple labels.
     """
-    def __init__(self, labels: List[str], out_dir: str, outfile_name: str):
+    def __init__(self, labels: List[str], out_dir: str, outfile_name: str, shared_store: bool = False, history_size: int = 4096):
         """
             :param labels: list of possible label/bin names
             :param out_dir: where to write the output JSON
             :param outfile_name: name of the output JSON
+            :param shared_store: write every label and undo immediately to a SQLite store next to the output JSON,
+                so that several sessions can share one out_dir/outfile_name without losing each other's labels
+            :param history_size: number of labeled files that can be undone - older labels are kept but drop out of the history
         """
         self.out_dir = out_dir
         self.json_out_path = os.path.join(out_dir, outfile_name)
@@ -25,16 +30,28 @@ class BinManager:
         self.sorting_dict: Dict[str, Deque[str]] = {}
         for lbl in labels:
             self.sorting_dict[lbl] = deque()
-        # each history entry is {filename: [labels]} so undo ops are straightforward
-        self.sort_history: Deque[Dict[str, List[str]]] = deque()
+        # bounded undo/redo history - entries are returned as {filename: [labels]} so undo ops are straightforward
+        self.sort_history = HistoryRing(labels, history_size)
         self.json_contents: Dict[str, List[str]] = {}
+        # inverted label index for filtering queries - built on first use and then kept up to date as labels arrive
+        self.label_index = None
+        # labels the output JSON already held when the label index was built (see _get_cleared_labels)
+        self._indexed_json_bins: Dict[str, Set[str]] = {}
+        self.store = None
+        if shared_store:
+            from .results_store import ResultsStore
+            self.store = ResultsStore(os.path.splitext(self.json_out_path)[0] + ".db")
+            # carry over results written before the store existed
+            if self.store.is_empty() and os.path.exists(self.json_out_path):
+                with open(self.json_out_path, 'r') as f:
+                    self.store.import_bins(json.load(f))
 
     def update_bin(self, labels, remove=False):
         """ For single-label usage, 'labels' will be a string. For multi-label usage, 'labels' will typically be a list of strings.
             We unify them internally in BinManager.
         """
         if remove:
-            self.undo_sort()
+            return self.undo_sort()
         else:
             self.add_filename(labels, self.current_image)
 
@@ -49,43 +66,125 @@ class BinManager:
         """
         if isinstance(labels, str):
             labels = [labels]
-        # put the filename into each of the requested bins
         for lbl in labels:
             if lbl not in self.sorting_dict:
                 raise ValueError(f"No bin with label '{lbl}' found.")
-            if filename not in self.sorting_dict[lbl]:
-                self.sorting_dict[lbl].append(filename)
-        self.sort_history.append({filename: labels})
+        self.sort_history.push([filename], labels)
+        # put the filename into each of the requested bins
+        self._apply_entry({filename: labels})
         print(f"[SORTER] Added {filename} to bins {labels}")
 
-    def undo_sort(self):
-        """ Undo the last sort action by removing the file from the relevant bins """
+    def add_filenames(self, labels: Union[str, List[str]], filenames: List[str]):
+        """ Adds a group of filenames (e.g. a cluster of near-duplicates) to the same bins as a single history entry,
+            so that one undo reverts the whole group
+        """
+        if isinstance(labels, str):
+            labels = [labels]
+        for lbl in labels:
+            if lbl not in self.sorting_dict:
+                raise ValueError(f"No bin with label '{lbl}' found.")
+        entry = {filename: labels for filename in filenames}
+        self.sort_history.push(list(entry), labels)
+        self._apply_entry(entry)
+        print(f"[SORTER] Added {len(entry)} files to bins {labels}")
+
+    def _apply_entry(self, entry: Dict[str, List[str]]):
+        """ put the files of a history entry into their bins, the shared store and the label index """
+        for filename, label_list in entry.items():
+            for lbl in label_list:
+                if filename not in self.sorting_dict[lbl]:
+                    self.sorting_dict[lbl].append(filename)
+        if self.store is not None:
+            self.store.add(entry)
+        if self.label_index is not None:
+            for filename, label_list in entry.items():
+                self.label_index.add(filename, label_list)
+
+    def undo_sort(self) -> Optional[Dict[str, List[str]]]:
+        """ Undo the last sort action by removing the file(s) from the relevant bins - returns the undone history entry """
         # TODO: might want to make this a warning animation just like clicking "NEXT" without checks in the multilabel view
-        if not self.sort_history:
+        last_entry = self.sort_history.undo()
+        if last_entry is None:
             print("sort_history is empty; cannot undo.")
-            return
-        last_entry = self.sort_history.pop()
+            return None
+        if self.store is not None:
+            self.store.remove(last_entry)
         # last_entry should be a dict like {"my_image.jpg": ["disagree", "misaligned"]}
         for filename, label_list in last_entry.items():
             for lbl in label_list:
                 if filename in self.sorting_dict[lbl]:
                     self.sorting_dict[lbl].remove(filename)
-            print(f"[SORTER] Removed {filename} from bins {label_list}")
+            if self.label_index is not None:
+                self.label_index.remove(filename, self._get_cleared_labels(filename, label_list))
+            if len(last_entry) == 1:
+                print(f"[SORTER] Removed {filename} from bins {label_list}")
+        if len(last_entry) > 1:
+            print(f"[SORTER] Removed {len(last_entry)} files from bins {sorted(set().union(*last_entry.values()))}")
+        return last_entry
+
+    def _get_cleared_labels(self, filename: str, label_list: List[str]) -> List[str]:
+        """ the undone labels that the file doesn't still have from earlier results (the previous JSON, or other sessions in the store) """
+        if self.store is not None:
+            remaining = self.store.get_labels(filename)
+        else:
+            remaining = {lbl for lbl in label_list if filename in self._indexed_json_bins.get(lbl, ())}
+        return [lbl for lbl in label_list if lbl not in remaining]
+
+    def redo_sort(self) -> Optional[Dict[str, List[str]]]:
+        """ Re-apply the last undone sort action - returns the redone history entry """
+        entry = self.sort_history.redo()
+        if entry is None:
+            print("Nothing was undone; cannot redo.")
+            return None
+        self._apply_entry(entry)
+        if len(entry) == 1:
+            filename, label_list = next(iter(entry.items()))
+            print(f"[SORTER] Re-added {filename} to bins {label_list}")
+        else:
+            print(f"[SORTER] Re-added {len(entry)} files to bins {sorted(set().union(*entry.values()))}")
+        return entry
+
+    def get_label_index(self) -> "LabelIndex":
+        """ inverted label index over the results so far (previous sessions' JSON plus this session) for queries like "disagree AND NOT no_contest" """
+        if self.label_index is None:
+            from .label_index import LabelIndex
+            if self.store is not None:
+                bins = self.store.get_bins(self.labels)
+            else:
+                self.get_sorted_files()  # refreshes self.json_contents from the output JSON
+                self._indexed_json_bins = {lbl: set(self.json_contents.get(lbl, [])) for lbl in self.labels}
+                bins = {lbl: [*self.json_contents.get(lbl, []), *self.sorting_dict[lbl]] for lbl in self.labels}
+            self.label_index = LabelIndex.from_bins(bins, self.labels)
+        return self.label_index
 
     def get_num_sorted(self) -> int:
         """ Returns how many unique filenames have been sorted so far, based on merging contents of self.json_out_path and contents added in this session """
+        return len(self.get_sorted_files())
+
+    def get_sorted_files(self) -> Set[str]:
+        """ Returns the set of all filenames sorted into any bin of self.json_out_path (e.g. to skip them when resuming) """
+        if self.store is not None:
+            return self.store.get_sorted_files()
         if not os.path.exists(self.json_out_path):
-            return 0
+            return set()
         with open(self.json_out_path, 'r') as f:
             self.json_contents = dict(json.load(f))
         # make one set of all filenames that appear in any bin
         all_fnames = set()
         for fn_list in self.json_contents.values():
             all_fnames.update(fn_list)
-        return len(all_fnames)
+        return all_fnames
 
     def write_to_outfiles(self):
         """ Writes the final results to JSON. Preserves any old results from self.json_out_path and merges them with the newly sorted results """
+        if self.store is not None:
+            # labels were already committed one by one, so just export the bins merged over every session
+            self.store.export_json(self.json_out_path, self.labels)
+            print(f"[SORTER] Wrote updated bins to {self.json_out_path}")
+            return
+        # previous results are normally read when resuming, but not when the session was restored from a manifest
+        if not self.json_contents:
+            self.get_sorted_files()
         # convert our current sorting_dict to a normal dict of lists
         output_dict = {lbl: list(deq) for lbl, deq in self.sorting_dict.items()}
         # merge anything we already had in self.json_contents
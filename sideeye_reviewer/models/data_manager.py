@@ -1,7 +1,8 @@
 import os
-import random
-from typing import List, Optional, Union, Callable, Any
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Optional, Union, Callable, Any, Sequence
+# local imports
+from ..layouts.figure_defaults import ConstFigureDefaults
 
 
 """ Type for a transformation function that takes an image array (or PIL image) and returns a transformed image """
@@ -26,7 +27,22 @@ class DataManager:
         summary_type: Optional[str] = None,
         json_name: str = "sorting_output.json",
         enable_sorting: bool = True,
-        shuffle = False
+        shuffle = False,
+        shuffle_seed: Optional[int] = None,
+        pair_key: Optional[Union[str, Callable[[str], str]]] = None,
+        pairing_cache: Optional[str] = None,
+        tile_cache_dir: Optional[str] = None,
+        tile_size: int = 512,
+        thumbnail_cache_dir: Optional[str] = None,
+        score_file: Optional[str] = None,
+        score_descending: bool = False,
+        reviewer_id: Optional[str] = None,
+        reviewers: Optional[List[str]] = None,
+        shard_overlap: float = 0.0,
+        shared_store: bool = False,
+        integrity_check: bool = False,
+        integrity_cache: Optional[str] = None,
+        history_size: int = 4096,
     ):
         """
             :param image_folders: One or more directories where images are stored.
@@ -36,6 +52,29 @@ class DataManager:
             :param file_list:     If given, restricts the images to these filenames, ignoring folder listing.
             :param json_name:     Output JSON name for BinManager (if sorting is enabled).
             :param enable_sorting: If False, we skip creating ImageSorter and BinManager references entirely.
+            :param shuffle_seed:  If given, files are shown in a seeded shuffled order that's identical in every session, so that
+                                  count-based checkpoints resume exactly (see models/permutation.py) - implies shuffle.
+            :param pair_key:      If given, files are matched across image_folders by this stem key (function or regex string)
+                                  rather than assuming identical filenames - see models/pairing_index.py. An index built
+                                  with a function isn't cached (its name doesn't change with its code); regex keys are.
+            :param pairing_cache: Optional path for the cached pairing index (defaults to a hidden file next to the first folder).
+            :param tile_cache_dir: Where tile pyramids are cached for views in tiled mode (defaults to a hidden folder in out_dir or the first image folder's parent).
+            :param tile_size:     Tile width/height in pixels for tiled mode.
+            :param thumbnail_cache_dir: Where preview thumbnails are cached (defaults to a user-level cache shared between sessions).
+            :param score_file:    Optional CSV/JSON sidecar of per-image model scores - files are then served lowest score (least confident) first.
+            :param score_descending: Serve the highest scores first instead.
+            :param reviewer_id:   In sharding mode, the ID of this reviewer - only its shard of the files is served and
+                                  results go to a per-reviewer JSON (see models/sharding.py to merge them afterwards).
+            :param reviewers:     IDs of every reviewer sharing the dataset (same list, in the same order, for all of them).
+            :param shard_overlap: Fraction of files (0 to 1) also assigned to a second reviewer for agreement checks.
+            :param shared_store:  Commit every label to a SQLite results store as it's made, which is safe for several sessions
+                                  writing to the same out_dir/json_name at once (see models/results_store.py).
+            :param integrity_check: Scan the dataset before serving it and leave out unreadable images, files missing a counterpart
+                                  in any image folder and counterparts with mismatched dimensions (see models/integrity.py).
+                                  Large scans run in a process pool, so on Windows and macOS (spawned workers re-import the
+                                  main module) the script creating the DataManager needs an `if __name__ == "__main__":` guard.
+            :param integrity_cache: Optional path for the per-file scan results (defaults to a hidden file next to the first folder).
+            :param history_size:  How many labeled files can be undone/redone (see models/history_ring.py).
         """
         self.image_folders = [image_folders] if isinstance(image_folders, str) else image_folders
         self._verify_num_folders()  # ensure the number of image folders is valid for the current setup
@@ -49,6 +88,43 @@ class DataManager:
         self.out_dir = out_dir
         self.json_name = json_name
         self.shuffle = shuffle
+        self.shuffle_seed = shuffle_seed
+        # optional deterministic sharding of the dataset between several concurrent reviewers
+        self.reviewer_id = reviewer_id
+        self.shard_assigner = None
+        if reviewer_id is not None:
+            from .sharding import ShardAssigner, get_shard_json_name
+            self.shard_assigner = ShardAssigner(reviewers or [reviewer_id], overlap=shard_overlap)
+            if reviewer_id not in self.shard_assigner.reviewers:
+                raise ValueError(f"reviewer_id '{reviewer_id}' is not in the list of reviewers {self.shard_assigner.reviewers}")
+            # separate output per reviewer so that concurrent sessions sharing one out_dir never overwrite each other
+            self.json_name = get_shard_json_name(json_name, reviewer_id)
+        # optional priority ordering from per-image model scores (see models/review_ordering.py)
+        self.score_file = score_file
+        self.score_descending = score_descending
+        self.ordering = None
+        # optional index pairing corresponding files across folders by a shared stem key instead of a shared filename
+        self.pairing_index = None
+        if pair_key is not None:
+            from .pairing_index import PairingIndex
+            self.pairing_index = PairingIndex(self.image_folders, pair_key, pairing_cache).build()
+            self.pairing_index.report_unmatched()
+        # optional pre-flight scan whose exclusion list is applied to the file list - run on the first get_file_list call
+        self.integrity_check = integrity_check
+        self.integrity_cache = integrity_cache
+        self.integrity_report = None
+        # ordered dataset listing behind the file list (before the checkpoint skip and shuffle) as a CompactFileList, saved in session manifests
+        self.dataset_files: Optional["CompactFileList"] = None
+        self._restored_cursor: Optional[int] = None  # progress cursor restored from a session manifest
+        self.resume_offset = 0  # files of the ordered dataset skipped by the last get_file_list call
+        # tile pyramids for tiled (zoomable) display of very large images - generated lazily and cached on disk
+        self.tile_cache_dir = tile_cache_dir or os.path.join(out_dir or os.path.dirname(os.path.abspath(self.image_folders[0])), ".sideeye_tiles")
+        self.tile_size = tile_size
+        # reduced-resolution previews drawn while the full resolution images decode in the background
+        self.thumbnail_cache_dir = thumbnail_cache_dir
+        self._thumbnail_cache = None
+        # optional perceptual hash index for grouping near-duplicate frames - see build_duplicate_index()
+        self.duplicate_index = None
         # If sorting is enabled, create the ImageSorter (and BinManager inside it), otherwise it remains None.
         self.sorter = None
         if self.enable_sorting and out_dir and labels is not None:
@@ -56,11 +132,17 @@ class DataManager:
             self.sorter = BinManager(
                 labels=self.labels,
                 out_dir=self.out_dir,
-                outfile_name=self.json_name
+                outfile_name=self.json_name,
+                shared_store=shared_store,
+                history_size=history_size
             )
         # keep a pipeline of transformations to apply to each loaded image, e.g. edge detection overlays, histograms, etc.
         # TODO: may end up creating an equivalent of torchvision.transforms.Compose for numpy arrays for this
         self.transform_pipeline: List[TransformFn] = []
+        # thread pool for reading one image per folder concurrently - created lazily on the first multi-folder read
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        # separate pool for background work (full resolution decodes, thumbnail warm-up) so it never blocks the per-folder reads
+        self._bg_pool: Optional[ThreadPoolExecutor] = None
         #!!! DEBUGGING - for testing the summary box rendering - remove later
         self.temp_iter = 0
 
@@ -69,21 +151,101 @@ class DataManager:
         """ Check if the number of image folders is valid for the current setup. """
         if len(self.image_folders) == 0:
             raise ValueError("No image folders provided.")
-        if len(self.image_folders) > 2:
-            raise ValueError("Only up to 2 image folders are supported for paired images (e.g., image + mask).")
+        # limited by the number of image axes that the figure layout can hold
+        max_folders = ConstFigureDefaults.MAX_IMG_PER_FIGURE
+        if len(self.image_folders) > max_folders:
+            raise ValueError(f"Only up to {max_folders} image folders are supported (e.g., image + mask + prediction + error map).")
 
     def load_images(self, filename: str) -> List[Any]:
         """ For multiple folders (e.g., image vs. mask), load an image from each folder in self.image_folders.
-            If sorting is enabled, we might also delegate to sorter.get_image_paths(...) to be consistent.
+            Reads from each folder run concurrently so that the latency is that of the slowest source rather than the sum.
         """
         paths = self.get_image_paths(filename)
-        images = []
-        for p in paths:
-            img = plt.imread(p)
-            for fn in self.transform_pipeline:
-                img = fn(img)
-            images.append(img)
-        return images
+        if len(paths) == 1:
+            return [self._read_image(paths[0])]
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=len(paths), thread_name_prefix="sideeye_io")
+        # map preserves the folder order so the images line up with the image axes
+        return list(self._io_pool.map(self._read_image, paths))
+
+    @property
+    def thumbnail_cache(self) -> "ThumbnailCache":
+        if self._thumbnail_cache is None:
+            from .thumbnail_cache import ThumbnailCache
+            self._thumbnail_cache = ThumbnailCache(self.thumbnail_cache_dir)
+        return self._thumbnail_cache
+
+    def load_previews(self, filename: str) -> List[Any]:
+        """ load a cached thumbnail (generated with a reduced decode on a cache miss) for the file in each image folder """
+        return [self.thumbnail_cache.get_thumbnail(p) for p in self.get_image_paths(filename)]
+
+    def load_cached_previews(self, filename: str) -> Optional[List[Any]]:
+        """ the previews of the file if all of them are already cached (cheap enough for the GUI thread), otherwise None """
+        previews = []
+        for path in self.get_image_paths(filename):
+            thumb = self.thumbnail_cache.get_cached_thumbnail(path)
+            if thumb is None:
+                return None
+            previews.append(thumb)
+        return previews
+
+    def submit_load_previews(self, filename: str) -> Future:
+        """ generate (or load) the previews in the background, returning a Future for the result of load_previews """
+        return self._get_bg_pool().submit(self.load_previews, filename)
+
+    def get_thumbnails(self, filenames: List[str], folder_idx: int = 0) -> List[Any]:
+        """ thumbnails of many files from one image folder (the primary one by default), generated in parallel on a cache miss """
+        paths = [self.get_image_paths(fname)[folder_idx] for fname in filenames]
+        return self.thumbnail_cache.get_thumbnails(paths)
+
+    def prefetch_thumbnails(self, filenames: List[str], folder_idx: int = 0):
+        """ generate thumbnails for upcoming files in the background so that displaying them later is a cache hit """
+        self._get_bg_pool().submit(self.get_thumbnails, list(filenames), folder_idx)
+
+    def submit_load_images(self, filename: str) -> Future:
+        """ decode the full resolution images in the background, returning a Future for the result of load_images """
+        return self._get_bg_pool().submit(self.load_images, filename)
+
+    def warm_previews(self, filename: str):
+        """ generate the thumbnails for a file ahead of time in the background so its preview is a cache hit """
+        self._get_bg_pool().submit(self.load_previews, filename)
+
+    def _get_bg_pool(self) -> ThreadPoolExecutor:
+        if self._bg_pool is None:
+            self._bg_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sideeye_bg")
+        return self._bg_pool
+
+    def build_duplicate_index(self, filenames: List[str], cache_path: Optional[str] = None, max_workers: Optional[int] = None):
+        """ build (or update) the perceptual hash index of the given files from the primary image folder
+            - new files are hashed in a process pool, so on Windows and macOS (spawned workers re-import the main module) the script
+                building the index needs an `if __name__ == "__main__":` guard
+        """
+        from .phash_index import PerceptualHashIndex
+        cache_path = cache_path or os.path.join(os.path.dirname(os.path.abspath(self.image_folders[0])), ".sideeye_phash.json")
+        self.duplicate_index = PerceptualHashIndex(self.image_folders[0], cache_path).build(filenames, max_workers)
+        return self.duplicate_index
+
+    def get_near_duplicates(self, filename: str, radius: Optional[int] = None) -> List[str]:
+        """ near-duplicates of the given file according to the perceptual hash index (empty if the index wasn't built) """
+        if self.duplicate_index is None:
+            return []
+        if radius is None:
+            return self.duplicate_index.query(filename)
+        return self.duplicate_index.query(filename, radius)
+
+    def get_tile_pyramids(self, filename: str) -> List["TilePyramid"]:
+        """ return a lazily generated tile pyramid for the file in each image folder - transforms are not applied in tiled mode """
+        from .tile_pyramid import TilePyramid
+        return [TilePyramid(p, self.tile_cache_dir, self.tile_size) for p in self.get_image_paths(filename)]
+
+    def _read_image(self, path: str) -> Any:
+        """ read a single image from disk and apply the transformation pipeline to it """
+        # imported here so that creating a DataManager (e.g. for non-GUI tools) doesn't pull in matplotlib - same function as plt.imread
+        from matplotlib.image import imread
+        img = imread(path)
+        for fn in self.transform_pipeline:
+            img = fn(img)
+        return img
 
     # TODO: for the following 3 methods, I should probably rewrite to throw an error if sorting is not enabled but it's called anyway
     ############################################################################################################
@@ -93,10 +255,36 @@ class DataManager:
             self.sorter.set_current_image(filename)
             self.sorter.update_bin(labels)
 
-    def undo_label(self):
-        """ Undo last labeling action. """
+    def assign_labels_to_group(self, filenames: List[str], labels: Union[str, List[str]]):
+        """ assign the same label(s) to a group of files as one undoable action - only meaningful if sorting is enabled """
         if self.sorter:
-            self.sorter.update_bin(labels=None, remove=True)
+            self.sorter.add_filenames(labels, filenames)
+
+    def undo_label(self, steps: int = 1) -> List[str]:
+        """ Undo the last `steps` labeling actions, returning the filenames that were unlabeled (in the order they were labeled) """
+        undone: List[str] = []
+        if self.sorter:
+            for _ in range(steps):
+                entry = self.sorter.update_bin(labels=None, remove=True)
+                if not entry:
+                    break
+                undone[:0] = entry
+        return undone
+
+    def redo_label(self, steps: int = 1) -> List[str]:
+        """ Re-apply the last `steps` undone labeling actions, returning the filenames that were labeled again (in the order they were labeled) """
+        redone: List[str] = []
+        if self.sorter:
+            for _ in range(steps):
+                entry = self.sorter.redo_sort()
+                if not entry:
+                    break
+                redone.extend(entry)
+        return redone
+
+    def get_history_position(self) -> int:
+        """ number of labeling actions in the history that are currently applied (and can be undone) """
+        return self.sorter.sort_history.num_undoable if self.sorter else 0
 
     def write_results(self):
         """ Writes final sorting results (bin manager JSON). """
@@ -130,22 +318,119 @@ class DataManager:
     # will need to check for redundancy and how accessing the sorter will need to be refactored
     ################################################################################################################
 
-    def get_file_list(self, checkpoint: Optional[Union[bool, int]] = False) -> List[str]:
-        """ Returns the list of files to be reviewed, possibly skipping the first 'checkpoint' entries """
-        # NOTE: whole pipeline still assumes that corresponding files share filenames
-        all_files = self.file_list if self.file_list else os.listdir(self.image_folders[0])
-        ckpt_idx = self.check_if_resuming(len(all_files), checkpoint)
-        if ckpt_idx:
-            all_files = all_files[ckpt_idx:]
-        if self.shuffle:
-            random.shuffle(all_files)
+    def get_file_list(self, checkpoint: Optional[Union[bool, int]] = False, skip_labeled: bool = False) -> Sequence[str]:
+        """ Returns the list of files to be reviewed, possibly skipping the first 'checkpoint' entries
+            - returned as a CompactFileList (packed UTF-8 buffer) so that huge datasets don't hold millions of str objects,
+                with the checkpoint skip and shuffle applied as views rather than copies
+            - with skip_labeled, resuming (checkpoint=True) leaves out the labeled files themselves instead of skipping as many files
+                from the start, which is needed whenever files can be labeled out of order (e.g. labels propagated to near-duplicates)
+        """
+        if self.dataset_files is None or self._restored_cursor is None:
+            self.dataset_files = self._list_dataset_files()
+        all_files = self.dataset_files
+        if self.score_file:
+            return self._get_prioritized_files(all_files, checkpoint)
+        if self.shuffle_seed is not None:
+            from .permutation import PermutedFileList
+            # permute first and then skip, so the checkpoint skips exactly the files shown in previous sessions
+            all_files = PermutedFileList(all_files, self.shuffle_seed)
+        if skip_labeled and checkpoint is True and self.sorter:
+            all_files = self._skip_labeled_files(all_files)
+            self.resume_offset = 0
+        else:
+            ckpt_idx = self.check_if_resuming(len(all_files), checkpoint)
+            self.resume_offset = ckpt_idx or 0
+            if ckpt_idx:
+                all_files = all_files[ckpt_idx:]
+        if self.shuffle and self.shuffle_seed is None:
+            all_files = all_files.shuffled()
         return all_files
 
+    def _list_dataset_files(self) -> "CompactFileList":
+        """ the ordered dataset before any checkpoint or shuffle: folder listing (or file_list), integrity exclusions and shard """
+        from .file_list import CompactFileList
+        # NOTE: without a pairing index, the whole pipeline still assumes that corresponding files share filenames
+        if self.pairing_index is not None:
+            all_files = self._get_paired_files()
+        else:
+            all_files = self.file_list if self.file_list else os.listdir(self.image_folders[0])
+            # os.listdir order isn't guaranteed, so a seeded order needs a stable dataset index to permute
+            if self.shuffle_seed is not None and not self.file_list:
+                all_files = sorted(all_files)
+        if self.integrity_check:
+            # NOTE: excluded files shift a seeded order, so fixing files between sessions changes what a checkpoint skips
+            all_files = self._apply_integrity_check(all_files)
+        if self.shard_assigner is not None:
+            num_total = len(all_files)
+            all_files = self.shard_assigner.get_shard(all_files, self.reviewer_id)
+            print(f"[DATA] Reviewer '{self.reviewer_id}' assigned {len(all_files)} of {num_total} file(s).")
+        # kept for the whole session, so it's packed rather than held as a list of str objects
+        return CompactFileList(all_files)
+
+    def _skip_labeled_files(self, all_files: Sequence[str]) -> Sequence[str]:
+        """ the files that aren't in any bin yet, in their original order """
+        from .file_list import CompactFileList
+        labeled = self.sorter.get_sorted_files()
+        if not labeled:
+            return all_files
+        remaining = CompactFileList(fname for fname in all_files if fname not in labeled)
+        print(f"[DATA] Resuming: skipping {len(all_files) - len(remaining)} already labeled file(s).")
+        return remaining
+
+    def restore_session(self, dataset_files: Sequence[str], cursor: int):
+        """ resume from a session manifest: the saved listing replaces the folder scan and the cursor replaces counting the results """
+        self.dataset_files = dataset_files
+        self._restored_cursor = cursor
+
+    def _apply_integrity_check(self, all_files: List[str]) -> List[str]:
+        """ leave out the files that failed the integrity scan - only new or modified files are opened after the first scan """
+        if self.integrity_report is None:
+            from .integrity import IntegrityScanner
+            scanner = IntegrityScanner(self.image_folders, self.integrity_cache, self.pairing_index)
+            self.integrity_report = scanner.scan(all_files if self.file_list else None)
+            print(self.integrity_report.summarize())
+        return self.integrity_report.filter(all_files)
+
+    def _get_prioritized_files(self, all_files: List[str], checkpoint: Optional[Union[bool, int]]) -> "PriorityFileList":
+        """ serve the files lazily from a priority queue of model scores, leaving out everything already labeled when resuming """
+        from .review_ordering import PriorityFileList, load_scores
+        # an ordering by score makes count-based checkpoints meaningless, so resuming skips the labeled files themselves
+        labeled = self.sorter.get_sorted_files() if (checkpoint and self.sorter) else set()
+        self.ordering = PriorityFileList(load_scores(self.score_file), all_files, skip=labeled, descending=self.score_descending)
+        if labeled:
+            print(f"[DATA] Resuming: skipping {len(all_files) - len(self.ordering)} already labeled file(s).")
+        return self.ordering
+
+    def update_priority(self, filename: str, score: float) -> bool:
+        """ update the model score of a file that hasn't been served yet (e.g. after retraining mid-session) """
+        if self.ordering is None:
+            return False
+        return self.ordering.update_score(filename, score)
+
+    def query_files(self, expression: str) -> List[str]:
+        """ reviewed files matching a boolean label query, e.g. "disagree AND NOT no_contest" - see models/label_index.py
+            - the result can be passed straight back as the file_list of another DataManager (e.g. for a slideshow of the matches)
+        """
+        if self.sorter is None:
+            raise RuntimeError("Label queries need sorting to be enabled (out_dir and labels given).")
+        return self.sorter.get_label_index().query(expression)
+
     def get_image_paths(self, img_name: str) -> List[str]:
         """ Return the full path(s) for the given filename in each directory """
+        if self.pairing_index is not None:
+            return self.pairing_index.get_paths(img_name)
         # TODO: add safeguards for missing folders or files
         return [os.path.join(d, img_name) for d in self.image_folders]
 
+    def _get_paired_files(self) -> List[str]:
+        """ primary filenames with a counterpart in every folder, restricted to self.file_list if one was given """
+        if not self.file_list:
+            return self.pairing_index.primary_files
+        paired = [fname for fname in self.file_list if fname in self.pairing_index]
+        if len(paired) < len(self.file_list):
+            print(f"[DATA] Skipping {len(self.file_list) - len(paired)} file(s) from file_list without a counterpart in every image folder.")
+        return paired
+
     def check_if_resuming(self, num_files: int, checkpoint: Union[bool, int] = True) -> Optional[int]:
         """ If checkpoint is True, we read how many have already been sorted from the JSON file and skip that many.
             If checkpoint is an int >= 2, we skip exactly that many. If checkpoint is False, start from zero.
@@ -155,6 +440,9 @@ class DataManager:
         # if checkpoint is an int and it's greater than 1 (i.e. no progress), return it
         if isinstance(checkpoint, int) and 1 < checkpoint < num_files:
             return checkpoint
+        # a cursor restored from a session manifest already knows where the last session stopped
+        if self._restored_cursor is not None:
+            return self._restored_cursor or None
         # otherwise see how many have been sorted so far
         # TODO: rename once I figure out what I want to do with the new task-specific sorter model class
             # may want to do checkpointing for more than just the sorting task
@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import getpass
+from typing import Any, Dict, List, Optional
+
+
+EVENT_KINDS = ("session", "display", "label", "undo", "redo", "next", "prev", "exit")
+
+
+def get_default_log_dir(out_dir: str) -> str:
+    return os.path.join(out_dir, "session_logs")
+
+
+class EventLogger:
+    """ Buffered newline-delimited JSON log of what happens in a review session, for throughput analysis (see utils/throughput.py)
+        - one compact record per event: {"t": unix time, "e": kind, ...}, preceded by a "session" record naming the reviewer
+        - records are kept in memory and appended to the file in batches (every `flush_every` events or `flush_seconds`), so
+            logging costs a json.dumps per event on the GUI thread and the disk is only touched once per batch
+        - every session writes its own file, so logs from many reviewers and machines can simply be collected into one folder
+    """
+    def __init__(
+        self,
+        log_dir: str,
+        reviewer_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        labels: Optional[List[str]] = None,
+        flush_every: int = 64,
+        flush_seconds: float = 10.0
+    ):
+        """
+            :param log_dir:     folder collecting the logs of every session
+            :param reviewer_id: who is reviewing - defaults to the OS user name
+            :param labels:      labels of the session, recorded in the session record
+        """
+        self.reviewer_id = reviewer_id or getpass.getuser()
+        self.session_id = session_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(log_dir, exist_ok=True)
+        self.path = os.path.join(log_dir, f"{self.reviewer_id}.{self.session_id}.ndjson")
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self.log("session", reviewer=self.reviewer_id, session=self.session_id, labels=labels or [])
+        # don't lose the tail of the log if the interpreter exits without the session being closed (e.g. the window is killed)
+        atexit.register(self.close)
+
+    @classmethod
+    def for_session(cls, data_manager, log_dir: Optional[str] = None, **kwargs) -> "EventLogger":
+        """ logger for a DataManager's session, writing next to its results unless log_dir is given """
+        log_dir = log_dir or get_default_log_dir(data_manager.out_dir or os.path.dirname(os.path.abspath(data_manager.image_folders[0])))
+        return cls(log_dir, reviewer_id=kwargs.pop("reviewer_id", data_manager.reviewer_id), labels=data_manager.labels, **kwargs)
+
+    def log(self, kind: str, **fields: Any):
+        if self._closed:
+            return
+        record: Dict[str, Any] = {"t": round(time.time(), 3), "e": kind}
+        record.update(fields)
+        self._buffer.append(json.dumps(record, separators=(",", ":")))
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._buffer) + "\n")
+        self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        atexit.unregister(self.close)
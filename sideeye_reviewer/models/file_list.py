@@ -0,0 +1,122 @@
+from collections.abc import Sequence
+from typing import Iterable, Iterator, Optional, Union
+import numpy as np
+
+
+class CompactFileList(Sequence):
+    """ Read-only file list stored as one packed UTF-8 buffer plus an offsets array instead of a list of str objects
+        - ~1 byte per character + 8 bytes per entry, versus ~50+ bytes of object overhead per str (plus 8 for the list slot)
+        - slicing and shuffling return views sharing the same buffer: contiguous slices just move a (start, stop) window and
+            anything else stores an index array into the base entries, so no filename is ever copied
+        - membership tests go through a sorted array of filename hashes built on first use, i.e. O(log n) without a set of strings
+        - behaves like a list for everything the controllers do: len(), truthiness, indexing, slicing and iteration
+    """
+    def __init__(self, files: Iterable[str] = ()):
+        encoded = [f.encode("utf-8") for f in files]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        self._buffer = b"".join(encoded)
+        self._offsets = offsets
+        self._start, self._stop = 0, len(encoded)
+        self._indices: Optional[np.ndarray] = None  # base entry of each position, for non-contiguous views
+        self._hash_index = None
+
+    def _make_view(self, start: int = 0, stop: int = 0, indices: Optional[np.ndarray] = None) -> "CompactFileList":
+        view = CompactFileList.__new__(CompactFileList)
+        view._buffer, view._offsets = self._buffer, self._offsets
+        view._start, view._stop = start, stop
+        view._indices = indices
+        view._hash_index = None
+        return view
+
+    def _get_base_indices(self) -> np.ndarray:
+        if self._indices is not None:
+            return self._indices
+        return np.arange(self._start, self._stop, dtype=np.int64)
+
+    def _decode(self, base_idx: int) -> str:
+        return self._buffer[self._offsets[base_idx]:self._offsets[base_idx + 1]].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._indices) if self._indices is not None else self._stop - self._start
+
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            if self._indices is None and idx.step in (None, 1):
+                start, stop, _ = idx.indices(len(self))
+                return self._make_view(self._start + start, self._start + max(start, stop))
+            return self._make_view(indices=self._get_base_indices()[idx])
+        num_files = len(self)
+        if idx < 0:
+            idx += num_files
+        if not 0 <= idx < num_files:
+            raise IndexError("CompactFileList index out of range")
+        return self._decode(int(self._indices[idx]) if self._indices is not None else self._start + idx)
+
+    def __iter__(self) -> Iterator[str]:
+        # offsets are fetched in chunks of Python ints, which is much faster than indexing NumPy scalars one entry at a time
+        chunk_size = 4096
+        for chunk_start in range(0, len(self), chunk_size):
+            if self._indices is None:
+                lo, hi = self._start + chunk_start, min(self._start + chunk_start + chunk_size, self._stop)
+                bounds = self._offsets[lo:hi + 1].tolist()
+                for i in range(hi - lo):
+                    yield self._buffer[bounds[i]:bounds[i + 1]].decode("utf-8")
+            else:
+                base = self._indices[chunk_start:chunk_start + chunk_size]
+                starts, ends = self._offsets[base].tolist(), self._offsets[base + 1].tolist()
+                for start, end in zip(starts, ends):
+                    yield self._buffer[start:end].decode("utf-8")
+
+    def __contains__(self, filename) -> bool:
+        return self._find(filename) >= 0
+
+    def index(self, filename, start: int = 0, stop: Optional[int] = None) -> int:
+        """ position of a filename in this view - raises ValueError if it isn't there (like list.index) """
+        if start != 0 or stop is not None:
+            return super().index(filename, start, len(self) if stop is None else stop)
+        pos = self._find(filename)
+        if pos < 0:
+            raise ValueError(f"'{filename}' is not in the file list")
+        return pos
+
+    def _find(self, filename) -> int:
+        """ first position of filename in this view, or -1 """
+        if not isinstance(filename, str):
+            return -1
+        if self._hash_index is None:
+            hashes = np.fromiter((hash(f) for f in self), dtype=np.int64, count=len(self))
+            positions = np.argsort(hashes, kind="stable")
+            self._hash_index = (hashes[positions], positions)
+        sorted_hashes, positions = self._hash_index
+        target = hash(filename)
+        lo = int(np.searchsorted(sorted_hashes, target, side="left"))
+        # entries sharing the hash are compared in full, so hash collisions can't give false positives
+        while lo < len(sorted_hashes) and sorted_hashes[lo] == target:
+            if self[int(positions[lo])] == filename:
+                return int(positions[lo])
+            lo += 1
+        return -1
+
+    def permuted(self, permutation: np.ndarray) -> "CompactFileList":
+        """ view of this list in the order given by an array of positions (e.g. a shuffled np.arange(len(self))) """
+        return self._make_view(indices=self._get_base_indices()[np.asarray(permutation, dtype=np.int64)])
+
+    def shuffled(self, seed: Optional[int] = None) -> "CompactFileList":
+        """ randomly ordered view - only a permutation array is created, the filenames themselves aren't copied """
+        return self.permuted(np.random.default_rng(seed).permutation(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        """ memory held by the buffers of this list (shared with its views) """
+        extra = self._indices.nbytes if self._indices is not None else 0
+        return len(self._buffer) + self._offsets.nbytes + extra
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (Sequence, list)) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        preview = ", ".join(repr(f) for f in self[:3])
+        return f"CompactFileList([{preview}{', ...' if len(self) > 3 else ''}], len={len(self)})"
@@ -0,0 +1,164 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence
+
+
+class HistoryRing:
+    """ Compact, bounded undo/redo history of labeling actions (BinManager.sort_history)
+        - filenames are interned to int indices and the labels of a file are a bitmask over the label list, so each labeled file
+            costs one record of 13 bytes in preallocated arrays instead of a dict of lists per action (with more than 64 labels
+            the masks are kept as Python ints instead)
+        - interned filenames are reference counted by the records holding them and released once their last record is dropped
+        - an entry (one label click, or a group of files labeled together) is a run of consecutive records, the first one flagged
+        - entries before the cursor can be undone and the ones after it redone - recording a new entry discards the redoable ones
+        - once `capacity` records are held, the oldest entries are dropped: their labels stay, they just can't be undone anymore
+    """
+    # masks fit in a uint64 array up to this many labels
+    MAX_PACKED_LABELS = 64
+
+    def __init__(self, labels: Sequence[str], capacity: int = 4096):
+        """
+            :param labels:   every label that can be recorded (bit i of a record's mask is labels[i])
+            :param capacity: number of file records kept - an entry labeling a group of files uses one record per file
+        """
+        self.labels = list(labels)
+        self._label_bits = {lbl: 1 << i for i, lbl in enumerate(self.labels)}
+        # interned filenames, the number of held records referring to each, and the slots freed for reuse
+        self._filenames: List[Optional[str]] = []
+        self._file_ids: Dict[str, int] = {}
+        self._refcounts: List[int] = []
+        self._free_ids: List[int] = []
+        self._allocate(max(1, capacity))
+        # absolute record positions (slot = position % capacity): [begin, cursor) can be undone and [cursor, end) redone
+        self._begin = self._cursor = self._end = 0
+        self.num_undoable = 0
+        self.num_redoable = 0
+
+    def _allocate(self, capacity: int):
+        self.capacity = capacity
+        self._files = array("I", [0]) * capacity
+        self._masks = array("Q", [0]) * capacity if len(self.labels) <= self.MAX_PACKED_LABELS else [0] * capacity
+        self._starts = bytearray(capacity)
+
+    def __len__(self) -> int:
+        return self.num_undoable + self.num_redoable
+
+    ############################################# recording #############################################
+
+    def push(self, filenames: Sequence[str], labels: Sequence[str]):
+        """ record the same labels assigned to one or more files as a single entry """
+        if not filenames:
+            return
+        mask = self._encode(labels)
+        # the redoable entries are overwritten by the new one
+        self._release(self._cursor, self._end)
+        self._end = self._cursor
+        self.num_redoable = 0
+        if len(filenames) > self.capacity:
+            self._grow(len(filenames))
+        while self._end + len(filenames) - self._begin > self.capacity:
+            self._drop_oldest()
+        for i, fname in enumerate(filenames):
+            slot = (self._end + i) % self.capacity
+            self._files[slot] = self._intern(fname)
+            self._masks[slot] = mask
+            self._starts[slot] = i == 0
+        self._end += len(filenames)
+        self._cursor = self._end
+        self.num_undoable += 1
+
+    def undo(self) -> Optional[Dict[str, List[str]]]:
+        """ step back over the last applied entry, returning it as {filename: [labels]} (None if there's nothing to undo) """
+        if self._cursor == self._begin:
+            return None
+        start = self._cursor - 1
+        while not self._starts[start % self.capacity]:
+            start -= 1
+        entry = self._decode(start, self._cursor)
+        self._cursor = start
+        self.num_undoable -= 1
+        self.num_redoable += 1
+        return entry
+
+    def redo(self) -> Optional[Dict[str, List[str]]]:
+        """ step forward over the next undone entry, returning it as {filename: [labels]} (None if there's nothing to redo) """
+        if self._cursor == self._end:
+            return None
+        stop = self._get_entry_stop(self._cursor)
+        entry = self._decode(self._cursor, stop)
+        self._cursor = stop
+        self.num_undoable += 1
+        self.num_redoable -= 1
+        return entry
+
+    def entries(self) -> Iterator[Dict[str, List[str]]]:
+        """ every entry held, oldest first - the first `num_undoable` are applied and the rest can be redone """
+        pos = self._begin
+        while pos < self._end:
+            stop = self._get_entry_stop(pos)
+            yield self._decode(pos, stop)
+            pos = stop
+
+    ############################################# internals #############################################
+
+    def _get_entry_stop(self, start: int) -> int:
+        stop = start + 1
+        while stop < self._end and not self._starts[stop % self.capacity]:
+            stop += 1
+        return stop
+
+    def _drop_oldest(self):
+        stop = self._get_entry_stop(self._begin)
+        self._release(self._begin, stop)
+        self._begin = stop
+        self.num_undoable -= 1
+
+    def _grow(self, min_capacity: int):
+        """ make room for an entry larger than the whole ring (e.g. a huge batch) by reallocating with the held records in order """
+        held = [(self._files[p % self.capacity], self._masks[p % self.capacity], self._starts[p % self.capacity]) for p in range(self._begin, self._end)]
+        self._allocate(max(min_capacity, 2 * self.capacity))
+        for slot, (file_id, mask, start) in enumerate(held):
+            self._files[slot], self._masks[slot], self._starts[slot] = file_id, mask, start
+        self._cursor -= self._begin
+        self._end -= self._begin
+        self._begin = 0
+
+    def _intern(self, filename: str) -> int:
+        """ id of the filename, counting one more record referring to it """
+        file_id = self._file_ids.get(filename)
+        if file_id is None:
+            if self._free_ids:
+                file_id = self._free_ids.pop()
+                self._filenames[file_id] = filename
+            else:
+                file_id = len(self._filenames)
+                self._filenames.append(filename)
+                self._refcounts.append(0)
+            self._file_ids[filename] = file_id
+        self._refcounts[file_id] += 1
+        return file_id
+
+    def _release(self, start: int, stop: int):
+        """ forget the records in [start, stop), releasing the filenames that no other held record refers to """
+        for pos in range(start, stop):
+            file_id = self._files[pos % self.capacity]
+            self._refcounts[file_id] -= 1
+            if self._refcounts[file_id] == 0:
+                del self._file_ids[self._filenames[file_id]]
+                self._filenames[file_id] = None
+                self._free_ids.append(file_id)
+
+    def _encode(self, labels: Sequence[str]) -> int:
+        mask = 0
+        for lbl in labels:
+            if lbl not in self._label_bits:
+                raise ValueError(f"No bin with label '{lbl}' found.")
+            mask |= self._label_bits[lbl]
+        return mask
+
+    def _decode(self, start: int, stop: int) -> Dict[str, List[str]]:
+        entry: Dict[str, List[str]] = {}
+        for pos in range(start, stop):
+            slot = pos % self.capacity
+            mask = self._masks[slot]
+            entry[self._filenames[self._files[slot]]] = [lbl for i, lbl in enumerate(self.labels) if mask >> i & 1]
+        return entry
@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import math
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from PIL import Image
+
+
+# (width, height, error) recorded for each scanned file - width and height are -1 when the file couldn't be read
+ScanResult = Tuple[int, int, Optional[str]]
+
+
+def check_image(path: str) -> ScanResult:
+    """ cheap integrity check of one image without decoding its pixels
+        - PIL's verify() walks the PNG chunks (CRCs included, so truncated or corrupted PNGs fail) and checks the header of other formats
+        - JPEG data isn't checked by verify(), so a JPEG must at least end with the end-of-image marker, which truncated files lack
+    """
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            img_format = img.format
+            img.verify()
+        if img_format == "JPEG":
+            with open(path, "rb") as f:
+                f.seek(-2, os.SEEK_END)
+                if f.read(2) != b"\xff\xd9":
+                    return -1, -1, "truncated JPEG (no end-of-image marker)"
+        return width, height, None
+    except Exception as e:
+        return -1, -1, f"{type(e).__name__}: {e}"
+
+def _check_images(paths: List[str]) -> List[ScanResult]:
+    """ module-level so that it can be pickled for the process pool """
+    return [check_image(p) for p in paths]
+
+
+class IntegrityReport:
+    """ outcome of an IntegrityScanner run: which primary files to leave out of the review and why, plus unpaired files """
+    def __init__(self, excluded: Dict[str, str], orphans: Dict[str, List[str]], num_files: int, num_scanned: int):
+        self.excluded = excluded    # primary filename -> reason
+        self.orphans = orphans      # folder -> files without a counterpart in the primary folder
+        self.num_files = num_files
+        self.num_scanned = num_scanned  # files that weren't in the cache (or changed since)
+
+    def filter(self, files: Iterable[str]) -> List[str]:
+        return [f for f in files if f not in self.excluded]
+
+    def summarize(self) -> str:
+        lines = [f"[INTEGRITY] {self.num_files} file(s) checked ({self.num_scanned} scanned, {self.num_files - self.num_scanned} cached), {len(self.excluded)} excluded"]
+        for fname, reason in list(self.excluded.items())[:10]:
+            lines.append(f"    {fname}: {reason}")
+        if len(self.excluded) > 10:
+            lines.append(f"    ... and {len(self.excluded) - 10} more")
+        for folder, orphans in self.orphans.items():
+            preview = ", ".join(orphans[:5]) + (", ..." if len(orphans) > 5 else "")
+            lines.append(f"[INTEGRITY] {len(orphans)} orphan file(s) in '{folder}': {preview}")
+        return "\n".join(lines)
+
+    def write(self, path: str):
+        """ write the exclusion list (and orphans) as JSON, e.g. to review or fix the files separately """
+        with open(path, "w") as f:
+            json.dump({"excluded": self.excluded, "orphans": self.orphans}, f, indent=4)
+
+
+class IntegrityScanner:
+    """ Pre-flight check of a dataset so that broken files are left out of a session instead of raising from _load_image mid-review
+        - every image is opened and verified on a process pool (PIL's verify is CPU-bound Python code, so threads wouldn't scale)
+        - counterparts in every image folder must exist and, with check_dimensions, have the same width and height as the primary image
+        - results are cached per file by (mtime, size), so re-scans only open new or modified files
+        - files in secondary folders without a primary counterpart are reported as orphans
+    """
+    CACHE_NAME = ".sideeye_integrity.json"
+    CACHE_VERSION = 1
+    # below this many files to scan, the process pool startup costs more than it saves
+    MIN_POOL_FILES = 64
+
+    def __init__(
+        self,
+        image_folders: List[str],
+        cache_path: Optional[str] = None,
+        pairing_index = None,
+        check_dimensions: bool = True,
+        max_workers: Optional[int] = None
+    ):
+        """
+            :param image_folders:    directories holding corresponding images - the first one is the primary folder
+            :param cache_path:       where per-file results are cached; defaults to a hidden file next to the primary folder
+            :param pairing_index:    optional PairingIndex matching counterparts by stem key instead of identical filenames
+            :param check_dimensions: exclude files whose counterparts (e.g. masks) don't match the primary image's dimensions
+        """
+        if len(image_folders) == 0:
+            raise ValueError("No image folders provided.")
+        self.image_folders = [os.path.abspath(d) for d in image_folders]
+        self.cache_path = cache_path or os.path.join(os.path.dirname(self.image_folders[0]), self.CACHE_NAME)
+        self.pairing_index = pairing_index
+        self.check_dimensions = check_dimensions
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # absolute path -> [mtime_ns, size, width, height, error]
+        self._cache: Dict[str, list] = {}
+
+    def _list_folder(self, folder: str) -> Dict[str, os.stat_result]:
+        with os.scandir(folder) as entries:
+            return {entry.name: entry.stat() for entry in entries if entry.is_file() and not entry.name.startswith(".")}
+
+    def _get_pairs(self, listings: List[Dict[str, os.stat_result]], filenames: Optional[Iterable[str]]) -> Tuple[Dict[str, List[Optional[str]]], Dict[str, List[str]]]:
+        """ primary filename -> name of its counterpart in each folder (None if missing), and the orphans of each secondary folder """
+        if self.pairing_index is not None:
+            pairs = {fname: list(names) for fname, names in self.pairing_index.pairs.items()}
+            # files without a counterpart somewhere: in the primary folder they're excluded, elsewhere they're orphans
+            primary_unmatched = self.pairing_index.unmatched.get(self.image_folders[0], [])
+            pairs.update({fname: [fname] + [None] * (len(self.image_folders) - 1) for fname in primary_unmatched})
+            orphans = {d: list(f) for d, f in self.pairing_index.unmatched.items() if d != self.image_folders[0]}
+        else:
+            pairs = {fname: [fname if fname in listing else None for listing in listings] for fname in listings[0]}
+            orphans = {}
+            for folder, listing in zip(self.image_folders[1:], listings[1:]):
+                unpaired = sorted(fname for fname in listing if fname not in listings[0])
+                if unpaired:
+                    orphans[folder] = unpaired
+        if filenames is not None:
+            wanted = dict.fromkeys(filenames)
+            pairs = {fname: pairs.get(fname, [fname if fname in listings[0] else None] + [None] * (len(self.image_folders) - 1)) for fname in wanted}
+        return pairs, orphans
+
+    def scan(self, filenames: Optional[Iterable[str]] = None) -> IntegrityReport:
+        """ check every file of the dataset (or only the given primary filenames) and update the cache
+            - on platforms that spawn worker processes (Windows, macOS), call this from under `if __name__ == "__main__":`
+        """
+        self._load_cache()
+        listings = [self._list_folder(d) for d in self.image_folders]
+        pairs, orphans = self._get_pairs(listings, filenames)
+        # every existing file that needs a result, and the ones whose cached result is missing or stale
+        results: Dict[str, ScanResult] = {}
+        to_scan: List[Tuple[str, os.stat_result]] = []
+        for names in pairs.values():
+            for folder, listing, name in zip(self.image_folders, listings, names):
+                if name is None or name not in listing:
+                    continue
+                path, stat = os.path.join(folder, name), listing[name]
+                cached = self._cache.get(path)
+                if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    results[path] = (cached[2], cached[3], cached[4])
+                else:
+                    to_scan.append((path, stat))
+        for (path, stat), result in zip(to_scan, self._run_checks([p for p, _ in to_scan])):
+            results[path] = result
+            self._cache[path] = [stat.st_mtime_ns, stat.st_size, *result]
+        if to_scan:
+            self._write_cache()
+        excluded = {}
+        for fname, names in pairs.items():
+            reason = self._get_exclusion_reason(names, listings, results)
+            if reason is not None:
+                excluded[fname] = reason
+        return IntegrityReport(excluded, orphans if filenames is None else {}, len(results), len(to_scan))
+
+    def _get_exclusion_reason(self, names: List[Optional[str]], listings: List[Dict[str, os.stat_result]], results: Dict[str, ScanResult]) -> Optional[str]:
+        primary_size = None
+        for folder, listing, name in zip(self.image_folders, listings, names):
+            if name is None or name not in listing:
+                return f"missing in '{folder}'"
+            width, height, error = results[os.path.join(folder, name)]
+            if error is not None:
+                return f"unreadable '{os.path.join(folder, name)}' ({error})"
+            if primary_size is None:
+                primary_size = (width, height)
+            elif self.check_dimensions and (width, height) != primary_size:
+                return f"dimensions {width}x{height} in '{folder}' don't match {primary_size[0]}x{primary_size[1]}"
+        return None
+
+    def _run_checks(self, paths: List[str]) -> List[ScanResult]:
+        if len(paths) < self.MIN_POOL_FILES or self.max_workers == 1:
+            return _check_images(paths)
+        print(f"[INTEGRITY] Scanning {len(paths)} file(s) with {self.max_workers} worker(s)...")
+        # batches of paths amortize the pickling overhead of one task per file
+        batch_size = max(16, min(1024, math.ceil(len(paths) / (self.max_workers * 8))))
+        batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+        # forked workers don't re-import the session script, which would rerun it without an `if __name__ == "__main__":` guard -
+        # spawn (Windows, macOS) has no way around that, so scripts scanning there need the guard
+        mp_context = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context) as pool:
+            return [result for batch in pool.map(_check_images, batches) for result in batch]
+
+    ############################################# caching #############################################
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                contents = json.load(f)
+        except (OSError, ValueError):
+            return
+        if contents.get("version") == self.CACHE_VERSION:
+            self._cache = contents.get("files", {})
+
+    def _write_cache(self):
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.CACHE_VERSION, "files": self._cache}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            # the dataset might be on read-only storage - the scan still works, it just isn't incremental
+            print(f"[INTEGRITY] WARNING: could not write integrity cache to {self.cache_path}: {e}")
+
+
+def main(argv: Optional[List[str]] = None):
+    """ command line entry point: scan a dataset ahead of a session and optionally write the exclusion list """
+    parser = argparse.ArgumentParser(description="Check the images (and their counterparts) of a dataset before a review session.")
+    parser.add_argument("image_folders", nargs="+", help="folders holding corresponding images (primary image folder first)")
+    parser.add_argument("--out", default=None, help="JSON file to write the excluded files (with reasons) and orphans to")
+    parser.add_argument("--cache", default=None, help="path of the per-file results cache")
+    parser.add_argument("--ignore-dimensions", action="store_true", help="don't require counterparts to match the primary image's size")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    args = parser.parse_args(argv)
+    for folder in args.image_folders:
+        if not os.path.isdir(folder):
+            sys.exit(f"{folder} not found")
+    scanner = IntegrityScanner(args.image_folders, args.cache, check_dimensions=not args.ignore_dimensions, max_workers=args.workers)
+    report = scanner.scan()
+    print(report.summarize())
+    if args.out:
+        report.write(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import re
+import json
+from typing import Dict, List, Optional, Iterable, Union
+import numpy as np
+
+
+class LabelIndex:
+    """ In-memory inverted index over review results for filtering by label
+        - label -> file bitmap: one row of packed uint64 words per label, so boolean queries run as NumPy bitwise ops over
+            n/64 words rather than Python set operations over filenames
+        - file -> label bitmask: one uint64 per file, for looking up the labels of a single file in O(1) (with more than 64 labels
+            the masks are kept as Python ints in an object array instead)
+        - files are interned to integer IDs once, and capacity grows by doubling so that incremental updates stay amortized O(1)
+    """
+    # masks fit in a uint64 array up to this many labels
+    MAX_PACKED_LABELS = 64
+    _TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+
+    def __init__(self, labels: List[str], files: Optional[Iterable[str]] = None):
+        """
+            :param labels: every label that can be indexed
+            :param files:  optionally the whole dataset, so that e.g. "NOT ANY" finds the files that haven't been labeled yet
+        """
+        self.labels = list(labels)
+        self._label_ids = {lbl: i for i, lbl in enumerate(self.labels)}
+        self._mask_dtype = np.uint64 if len(self.labels) <= self.MAX_PACKED_LABELS else object
+        self.files: List[str] = []
+        self._file_ids: Dict[str, int] = {}
+        self._masks = np.zeros(0, dtype=self._mask_dtype)
+        self._bitmaps = np.zeros((len(self.labels), 0), dtype=np.uint64)
+        if files is not None:
+            for fname in files:
+                self._get_file_id(fname)
+
+    @classmethod
+    def from_bins(cls, bins: Dict[str, Iterable[str]], labels: Optional[List[str]] = None, files: Optional[Iterable[str]] = None) -> "LabelIndex":
+        """ build from bins ({label: [filenames]}), e.g. the contents of a bins JSON """
+        index = cls(labels or list(bins.keys()), files)
+        for lbl, filenames in bins.items():
+            index.add_bulk(lbl, filenames)
+        return index
+
+    @classmethod
+    def from_json(cls, json_path: str, labels: Optional[List[str]] = None) -> "LabelIndex":
+        with open(json_path, "r") as f:
+            return cls.from_bins(json.load(f), labels)
+
+    def _get_file_id(self, filename: str) -> int:
+        file_id = self._file_ids.get(filename)
+        if file_id is not None:
+            return file_id
+        file_id = len(self.files)
+        self.files.append(filename)
+        self._file_ids[filename] = file_id
+        if file_id >= len(self._masks):
+            self._grow(max(64, 2 * len(self._masks)))
+        return file_id
+
+    def _grow(self, capacity: int):
+        masks = np.zeros(capacity, dtype=self._mask_dtype)
+        masks[:len(self._masks)] = self._masks
+        self._masks = masks
+        num_words = capacity // 64
+        bitmaps = np.zeros((len(self.labels), num_words), dtype=np.uint64)
+        bitmaps[:, :self._bitmaps.shape[1]] = self._bitmaps
+        self._bitmaps = bitmaps
+
+    def _get_universe(self) -> np.ndarray:
+        """ bitmap of every indexed file - IDs are never reused, so that's simply the first len(self.files) bits """
+        bits = np.zeros(self._bitmaps.shape[1] * 64, dtype=np.uint8)
+        bits[:len(self.files)] = 1
+        return np.packbits(bits, bitorder="little").view("<u8").astype(np.uint64)
+
+    def _get_label_id(self, label: str) -> int:
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            raise ValueError(f"Unknown label '{label}'; expected one of {self.labels}")
+        return label_id
+
+    def _get_label_bit(self, label_id: int) -> Union[np.uint64, int]:
+        """ bit of a label in the per-file masks, as the masks' own type """
+        return np.uint64(1 << label_id) if self._mask_dtype is np.uint64 else 1 << label_id
+
+    def add(self, filename: str, labels: Union[str, List[str]]):
+        """ record labels for a file - called as labels arrive during a session """
+        if isinstance(labels, str):
+            labels = [labels]
+        file_id = self._get_file_id(filename)
+        word, bit = file_id >> 6, np.uint64(1 << (file_id & 63))
+        for lbl in labels:
+            label_id = self._get_label_id(lbl)
+            self._bitmaps[label_id, word] |= bit
+            self._masks[file_id] |= self._get_label_bit(label_id)
+
+    def add_bulk(self, label: str, filenames: Iterable[str]):
+        """ record one label for many files at once, setting the bits with vectorized ops (e.g. when loading a bins JSON) """
+        label_id = self._get_label_id(label)
+        file_ids = np.fromiter(map(self._get_file_id, filenames), dtype=np.int64)
+        if len(file_ids) == 0:
+            return
+        bits = np.left_shift(np.uint64(1), (file_ids & 63).astype(np.uint64))
+        np.bitwise_or.at(self._bitmaps[label_id], file_ids >> 6, bits)
+        self._masks[file_ids] |= self._get_label_bit(label_id)
+
+    def remove(self, filename: str, labels: Union[str, List[str]]):
+        """ clear labels of a file, e.g. on undo - the file stays part of the index
+            - labels are cleared unconditionally, so leave out any the file still has from elsewhere (see BinManager.undo_sort)
+        """
+        if isinstance(labels, str):
+            labels = [labels]
+        file_id = self._file_ids.get(filename)
+        if file_id is None:
+            return
+        word, bit = file_id >> 6, np.uint64(1 << (file_id & 63))
+        for lbl in labels:
+            label_id = self._get_label_id(lbl)
+            self._bitmaps[label_id, word] &= ~bit
+            self._masks[file_id] &= ~self._get_label_bit(label_id)
+
+    def get_labels(self, filename: str) -> List[str]:
+        file_id = self._file_ids.get(filename)
+        if file_id is None:
+            return []
+        mask = int(self._masks[file_id])
+        return [lbl for i, lbl in enumerate(self.labels) if mask >> i & 1]
+
+    def query(self, expression: str) -> List[str]:
+        """ files matching a boolean expression over labels, in the order they were indexed - usable directly as a DataManager file_list
+            - operators: AND, OR, NOT (case-insensitive) and parentheses; labels containing spaces go in double quotes
+            - ANY matches every file with at least one label; NOT is relative to every indexed file
+            e.g. 'disagree AND NOT no_contest', '(soiled OR "partly soiled") AND NOT disagree', 'NOT ANY'
+        """
+        return self._to_files(self._evaluate(expression))
+
+    def count(self, expression: str) -> int:
+        return int(self._unpack(self._evaluate(expression)).sum())
+
+    def _evaluate(self, expression: str) -> np.ndarray:
+        tokens = self._tokenize(expression)
+        bitmap, pos = self._parse_or(tokens, 0)
+        if pos != len(tokens):
+            raise ValueError(f"Unexpected '{tokens[pos][1]}' in query '{expression}'")
+        return bitmap
+
+    def _tokenize(self, expression: str) -> List[tuple]:
+        tokens, pos = [], 0
+        expression = expression.strip()
+        while pos < len(expression):
+            match = self._TOKEN_RE.match(expression, pos)
+            if match is None:
+                raise ValueError(f"Could not parse query '{expression}' at position {pos}")
+            lparen, rparen, quoted, word = match.groups()
+            if lparen:
+                tokens.append(("(", "("))
+            elif rparen:
+                tokens.append((")", ")"))
+            elif quoted is not None:
+                tokens.append(("label", quoted))
+            elif word.upper() in ("AND", "OR", "NOT", "ANY"):
+                tokens.append((word.upper(), word))
+            else:
+                tokens.append(("label", word))
+            pos = match.end()
+            while pos < len(expression) and expression[pos].isspace():
+                pos += 1
+        return tokens
+
+    # recursive descent with the usual precedence NOT > AND > OR
+    def _parse_or(self, tokens: List[tuple], pos: int):
+        bitmap, pos = self._parse_and(tokens, pos)
+        while pos < len(tokens) and tokens[pos][0] == "OR":
+            rhs, pos = self._parse_and(tokens, pos + 1)
+            bitmap = bitmap | rhs
+        return bitmap, pos
+
+    def _parse_and(self, tokens: List[tuple], pos: int):
+        bitmap, pos = self._parse_not(tokens, pos)
+        while pos < len(tokens) and tokens[pos][0] == "AND":
+            rhs, pos = self._parse_not(tokens, pos + 1)
+            bitmap = bitmap & rhs
+        return bitmap, pos
+
+    def _parse_not(self, tokens: List[tuple], pos: int):
+        if pos < len(tokens) and tokens[pos][0] == "NOT":
+            bitmap, pos = self._parse_not(tokens, pos + 1)
+            return self._get_universe() & ~bitmap, pos
+        return self._parse_atom(tokens, pos)
+
+    def _parse_atom(self, tokens: List[tuple], pos: int):
+        if pos >= len(tokens):
+            raise ValueError("Query ended unexpectedly")
+        kind, text = tokens[pos]
+        if kind == "(":
+            bitmap, pos = self._parse_or(tokens, pos + 1)
+            if pos >= len(tokens) or tokens[pos][0] != ")":
+                raise ValueError("Missing ')' in query")
+            return bitmap, pos + 1
+        if kind == "ANY":
+            return np.bitwise_or.reduce(self._bitmaps, axis=0), pos + 1
+        if kind == "label":
+            return self._bitmaps[self._get_label_id(text)].copy(), pos + 1
+        raise ValueError(f"Unexpected '{text}' in query")
+
+    def _unpack(self, bitmap: np.ndarray) -> np.ndarray:
+        """ one uint8 (0/1) per indexed file - bit k of word w is file 64*w + k """
+        return np.unpackbits(bitmap.astype("<u8").view(np.uint8), bitorder="little")[:len(self.files)]
+
+    def _to_files(self, bitmap: np.ndarray) -> List[str]:
+        return [self.files[i] for i in np.flatnonzero(self._unpack(bitmap))]
@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import hashlib
+from typing import Dict, List, Optional, Union, Callable
+
+
+""" Type for a function that maps a filename to the key shared by all of its counterparts, e.g. "0001_FV_mask.png" -> "0001_FV" """
+StemKeyFn = Callable[[str], str]
+
+
+def default_stem_key(filename: str) -> str:
+    """ default pairing key - the filename without its extension, so that "0001_FV.png" pairs with "0001_FV.jpg" """
+    return os.path.splitext(filename)[0]
+
+def regex_stem_key(pattern: str) -> StemKeyFn:
+    """ build a stem key function from a regex - the key is the first capture group (or the whole match without groups)
+        e.g. r"^(.+?)(?:_mask)?\\.\\w+$" pairs "0001_FV.png" with "0001_FV_mask.png"
+    """
+    compiled = re.compile(pattern)
+    def stem_key(filename: str) -> str:
+        match = compiled.search(filename)
+        if match is None:
+            return default_stem_key(filename)
+        return match.group(1) if compiled.groups else match.group(0)
+    return stem_key
+
+
+class PairingIndex:
+    """ Matches corresponding files across all image folders by a configurable stem key rather than by identical filenames
+        - built in one hashed pass per folder (one os.scandir per folder with a dict keyed by the stem key)
+        - files are identified by their filename in the first (primary) folder, which is also what gets written to the bins
+        - the result is cached alongside the dataset (one cache per folder set) and reused as long as the folders' modification times
+            and the stem key don't change - a custom stem key function is only cached under an explicit cache_key, since its code
+            can change without its name changing
+    """
+    CACHE_NAME = ".sideeye_pairs_{}.json"
+    CACHE_VERSION = 2
+
+    def __init__(
+        self,
+        image_folders: List[str],
+        stem_key: Optional[Union[str, StemKeyFn]] = None,
+        cache_path: Optional[str] = None,
+        cache_key: Optional[str] = None
+    ):
+        """
+            :param image_folders: directories holding corresponding images - the first one is treated as the primary folder
+            :param stem_key:      function mapping a filename to its pairing key, or a regex string (see regex_stem_key)
+            :param cache_path:    where to cache the index; defaults to a hidden file (named after the folder set) in the parent
+                                  directory of the primary folder
+            :param cache_key:     identifies a custom stem key function in the cache - change it whenever the function changes;
+                                  without it, an index built with a custom function is rescanned every time
+        """
+        if len(image_folders) == 0:
+            raise ValueError("No image folders provided.")
+        self.image_folders = [os.path.abspath(d) for d in image_folders]
+        if stem_key is None:
+            stem_key, cache_key = default_stem_key, "default"
+        elif isinstance(stem_key, str):
+            stem_key, cache_key = regex_stem_key(stem_key), f"regex:{stem_key}"
+        self.stem_key: StemKeyFn = stem_key
+        self.cache_key = cache_key
+        if cache_path is None:
+            folders_digest = hashlib.sha1("\n".join(self.image_folders).encode("utf-8")).hexdigest()[:12]
+            cache_path = os.path.join(os.path.dirname(self.image_folders[0]), self.CACHE_NAME.format(folders_digest))
+        self.cache_path = cache_path
+        # primary filename -> filenames in every folder (in the same order as self.image_folders)
+        self.pairs: Dict[str, List[str]] = {}
+        # folder -> filenames whose stem key has no counterpart in at least one other folder
+        self.unmatched: Dict[str, List[str]] = {}
+        # folder -> filenames that were dropped because another file in the same folder shares the same stem key
+        self.collisions: Dict[str, List[str]] = {}
+
+    def build(self, use_cache: bool = True) -> "PairingIndex":
+        """ load the index from the cache if it's still valid, otherwise scan every folder and rewrite the cache """
+        if use_cache and self.cache_key is not None and self._load_cache():
+            return self
+        self.collisions = {}
+        keyed_folders: List[Dict[str, str]] = [self._scan_folder(d) for d in self.image_folders]
+        primary = keyed_folders[0]
+        # keys present in every folder - iterating over the primary dict keeps its listing order
+        shared_keys = [key for key in primary if all(key in keyed for keyed in keyed_folders[1:])]
+        self.pairs = {primary[key]: [keyed[key] for keyed in keyed_folders] for key in shared_keys}
+        shared = set(shared_keys)
+        self.unmatched = {}
+        for folder, keyed in zip(self.image_folders, keyed_folders):
+            orphans = [fname for key, fname in keyed.items() if key not in shared]
+            if orphans:
+                self.unmatched[folder] = orphans
+        if self.cache_key is not None:
+            self._write_cache()
+        return self
+
+    def _scan_folder(self, folder: str) -> Dict[str, str]:
+        """ single pass over a folder mapping stem key -> filename; repeated keys are recorded as collisions """
+        keyed: Dict[str, str] = {}
+        with os.scandir(folder) as entries:
+            # sorting the names keeps the pairing deterministic when a stem key collides
+            for fname in sorted(entry.name for entry in entries if entry.is_file() and not entry.name.startswith(".")):
+                key = self.stem_key(fname)
+                if key in keyed:
+                    self.collisions.setdefault(folder, []).append(fname)
+                    continue
+                keyed[key] = fname
+        return keyed
+
+    ############################################# lookups #############################################
+
+    @property
+    def primary_files(self) -> List[str]:
+        """ filenames (from the primary folder) that have a counterpart in every folder """
+        return list(self.pairs.keys())
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.pairs
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def get_paths(self, filename: str) -> List[str]:
+        """ O(1) lookup of the full path of each counterpart of the given primary filename """
+        try:
+            names = self.pairs[filename]
+        except KeyError:
+            raise FileNotFoundError(f"'{filename}' has no matched counterpart in every image folder.")
+        return [os.path.join(d, fname) for d, fname in zip(self.image_folders, names)]
+
+    def report_unmatched(self):
+        """ print a short summary of the files that couldn't be paired """
+        print(f"[PAIRING] Matched {len(self.pairs)} files across {len(self.image_folders)} folders.")
+        for folder, orphans in self.unmatched.items():
+            preview = ", ".join(orphans[:5]) + (", ..." if len(orphans) > 5 else "")
+            print(f"[PAIRING] {len(orphans)} unmatched file(s) in '{folder}': {preview}")
+        for folder, dupes in self.collisions.items():
+            print(f"[PAIRING] {len(dupes)} file(s) in '{folder}' skipped due to a repeated pairing key: {', '.join(dupes[:5])}")
+
+    ############################################# caching #############################################
+
+    def _cache_signature(self) -> Dict[str, Union[int, str, List]]:
+        """ everything that invalidates the cached index when changed - adding/removing files updates the folder mtime """
+        return {
+            "version": self.CACHE_VERSION,
+            "folders": self.image_folders,
+            "mtimes": [os.stat(d).st_mtime_ns for d in self.image_folders],
+            "stem_key": self.cache_key,
+        }
+
+    def _load_cache(self) -> bool:
+        if not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, "r") as f:
+                contents = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if contents.get("signature") != self._cache_signature():
+            return False
+        self.pairs = contents["pairs"]
+        self.unmatched = contents["unmatched"]
+        self.collisions = contents.get("collisions", {})
+        return True
+
+    def _write_cache(self):
+        contents = {
+            "signature": self._cache_signature(),
+            "pairs": self.pairs,
+            "unmatched": self.unmatched,
+            "collisions": self.collisions,
+        }
+        try:
+            with open(self.cache_path, "w") as f:
+                json.dump(contents, f)
+        except OSError as e:
+            # the dataset might be on read-only storage - the index still works, it just gets rebuilt next time
+            print(f"[PAIRING] WARNING: could not write pairing cache to {self.cache_path}: {e}")
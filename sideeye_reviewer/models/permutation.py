@@ -0,0 +1,108 @@
+from collections.abc import Sequence
+from typing import Iterator, Optional, Union
+
+
+_MASK64 = (1 << 64) - 1
+
+def _splitmix64(x: int) -> int:
+    """ 64-bit integer mixer (SplitMix64 finalizer) used as the Feistel round function """
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class FeistelPermutation:
+    """ Seeded pseudorandom permutation of range(n) evaluated in O(1) per position, without storing a shuffled array
+        - a balanced Feistel network over the smallest even number of bits covering n is a bijection on [0, 2**bits)
+        - cycle walking (re-applying the network until the result falls below n) restricts it to a bijection on [0, n);
+            since 2**bits < 4n, this takes fewer than 4 rounds on average
+        - the same (seed, n) always gives the same order, on any machine and Python version
+    """
+    def __init__(self, n: int, seed: int, rounds: int = 4):
+        if n < 0:
+            raise ValueError(f"Permutation size must be non-negative; got {n}")
+        self.n = n
+        self.seed = seed
+        half_bits = max(1, ((max(n - 1, 1)).bit_length() + 1) // 2)
+        self._half_bits = half_bits
+        self._half_mask = (1 << half_bits) - 1
+        key, self._keys = seed & _MASK64, []
+        for _ in range(rounds):
+            key = _splitmix64(key)
+            self._keys.append(key)
+
+    def _encrypt(self, x: int) -> int:
+        left, right = x >> self._half_bits, x & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ (_splitmix64(right ^ key) & self._half_mask)
+        return (left << self._half_bits) | right
+
+    def _decrypt(self, x: int) -> int:
+        left, right = x >> self._half_bits, x & self._half_mask
+        for key in reversed(self._keys):
+            left, right = right ^ (_splitmix64(left ^ key) & self._half_mask), left
+        return (left << self._half_bits) | right
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, position: int) -> int:
+        """ dataset index shown at a position of the shuffled order """
+        if not 0 <= position < self.n:
+            raise IndexError("FeistelPermutation index out of range")
+        x = self._encrypt(position)
+        while x >= self.n:
+            x = self._encrypt(x)
+        return x
+
+    def inverse(self, index: int) -> int:
+        """ position of a dataset index in the shuffled order """
+        if not 0 <= index < self.n:
+            raise IndexError("FeistelPermutation index out of range")
+        x = self._decrypt(index)
+        while x >= self.n:
+            x = self._decrypt(x)
+        return x
+
+
+class PermutedFileList(Sequence):
+    """ Read-only view of a file list in seeded shuffled order, computed per position instead of copying and shuffling the list
+        - position -> file is base[perm[start + position]], so resuming at a count-based checkpoint lands on exactly the
+            files that weren't shown yet, and any position can be jumped to directly
+        - slices with step 1 are views (a shifted start), other slices return plain lists
+    """
+    def __init__(self, base: Sequence, seed: int, start: int = 0, stop: Optional[int] = None, permutation: Optional[FeistelPermutation] = None):
+        self.base = base
+        self.permutation = permutation or FeistelPermutation(len(base), seed)
+        self.seed = seed
+        self._start = start
+        self._stop = len(base) if stop is None else stop
+
+    def __len__(self) -> int:
+        return max(0, self._stop - self._start)
+
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step == 1:
+                return PermutedFileList(self.base, self.seed, self._start + start, self._start + max(start, stop), self.permutation)
+            return [self[i] for i in range(start, stop, step)]
+        num_files = len(self)
+        if idx < 0:
+            idx += num_files
+        if not 0 <= idx < num_files:
+            raise IndexError("PermutedFileList index out of range")
+        return self.base[self.permutation[self._start + idx]]
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(self._start, self._stop):
+            yield self.base[self.permutation[position]]
+
+    def get_position(self, base_idx: int) -> int:
+        """ position in this view of the file at index base_idx of the unshuffled list (-1 if it's before the view's start) """
+        position = self.permutation.inverse(base_idx) - self._start
+        return position if 0 <= position < len(self) else -1
+
+    def __repr__(self) -> str:
+        return f"PermutedFileList(seed={self.seed}, len={len(self)})"
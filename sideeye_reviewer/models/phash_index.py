@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Iterable
+import numpy as np
+from PIL import Image
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """ orthonormal DCT-II matrix, so that the 2D DCT of a square block X is D @ X @ D.T """
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    mat = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    mat[0] /= np.sqrt(2.0)
+    return mat
+
+def compute_phash(path: str, hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """ DCT-based perceptual hash of an image as a (hash_size**2)-bit integer
+        - the image is shrunk to a small grayscale square, and each bit records whether a low frequency DCT coefficient is above the median
+    """
+    img_size = hash_size * highfreq_factor
+    with Image.open(path) as img:
+        # JPEG can be decoded at a reduced scale, which is most of the cost for large images
+        img.draft("L", (img_size, img_size))
+        pixels = np.asarray(img.convert("L").resize((img_size, img_size), Image.BILINEAR), dtype=np.float64)
+    dct = _dct_matrix(img_size)
+    low_freq = (dct @ pixels @ dct.T)[:hash_size, :hash_size].flatten()
+    # skip the DC term when computing the median since it only encodes the mean brightness
+    bits = low_freq > np.median(low_freq[1:])
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _hash_worker(args: Tuple[str, int]) -> Optional[int]:
+    """ module-level so that it can be pickled for the process pool - unreadable images get no hash """
+    path, hash_size = args
+    try:
+        return compute_phash(path, hash_size)
+    except (OSError, ValueError):
+        return None
+
+
+class BKTree:
+    """ Burkhard-Keller tree over integer hashes for Hamming-radius lookups without comparing against every hash
+        - each node is [hash, items, children] where children maps the distance to the parent onto the child node
+    """
+    def __init__(self):
+        self.root: Optional[list] = None
+        self.size = 0
+
+    def add(self, hash_value: int, item: str):
+        self.size += 1
+        if self.root is None:
+            self.root = [hash_value, [item], {}]
+            return
+        node = self.root
+        while True:
+            dist = hamming_distance(hash_value, node[0])
+            if dist == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = [hash_value, [item], {}]
+                return
+            node = child
+
+    def query(self, hash_value: int, radius: int) -> List[Tuple[str, int]]:
+        """ all (item, distance) pairs with a hash within `radius` bits of hash_value """
+        results: List[Tuple[str, int]] = []
+        if self.root is None:
+            return results
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            dist = hamming_distance(hash_value, node[0])
+            if dist <= radius:
+                results.extend((item, dist) for item in node[1])
+            # triangle inequality: only subtrees with an edge distance in [dist - radius, dist + radius] can hold matches
+            for edge, child in node[2].items():
+                if dist - radius <= edge <= dist + radius:
+                    stack.append(child)
+        return results
+
+
+class PerceptualHashIndex:
+    """ Precomputed perceptual hashes of a dataset for grouping near-duplicate frames
+        - hashes are computed in parallel with a process pool and persisted to JSON alongside (mtime, size) of each file,
+            so re-builds only hash new or modified files
+        - lookups within a Hamming radius go through a BK-tree
+    """
+    DEFAULT_RADIUS = 6
+
+    def __init__(self, image_folder: str, cache_path: str, hash_size: int = 8):
+        """
+            :param image_folder: folder holding the images to hash (the primary image folder)
+            :param cache_path:   JSON file where the hashes are persisted
+            :param hash_size:    the hashes have hash_size**2 bits
+        """
+        self.image_folder = image_folder
+        self.cache_path = cache_path
+        self.hash_size = hash_size
+        self.hashes: Dict[str, int] = {}
+        self.tree = BKTree()
+
+    def build(self, filenames: Iterable[str], max_workers: Optional[int] = None) -> "PerceptualHashIndex":
+        """ hash every file not already in the persisted cache (or modified since), then rebuild the BK-tree
+            - on platforms that spawn worker processes (Windows, macOS), call this from under `if __name__ == "__main__":`
+        """
+        cached = self._load_cache()
+        stats: Dict[str, List[int]] = {}
+        to_hash: List[str] = []
+        for fname in filenames:
+            stat = os.stat(os.path.join(self.image_folder, fname))
+            stats[fname] = [stat.st_mtime_ns, stat.st_size]
+            entry = cached.get(fname)
+            if entry is not None and entry[1:] == stats[fname]:
+                self.hashes[fname] = int(entry[0], 16)
+            else:
+                to_hash.append(fname)
+        if to_hash:
+            print(f"[PHASH] Hashing {len(to_hash)} new or modified file(s)...")
+            jobs = [(os.path.join(self.image_folder, fname), self.hash_size) for fname in to_hash]
+            # same as the integrity scan - forked workers don't re-import the session script, which is what usually builds the
+            # index from the GUI path; spawn (Windows, macOS) re-imports it, so scripts there need an `if __name__ == "__main__":` guard
+            mp_context = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as pool:
+                for fname, hash_value in zip(to_hash, pool.map(_hash_worker, jobs, chunksize=64)):
+                    if hash_value is not None:
+                        self.hashes[fname] = hash_value
+            self._write_cache(stats, cached)
+        self.tree = BKTree()
+        for fname, hash_value in self.hashes.items():
+            self.tree.add(hash_value, fname)
+        return self
+
+    def query(self, filename: str, radius: int = DEFAULT_RADIUS) -> List[str]:
+        """ near-duplicates of an indexed file (excluding itself), closest first """
+        if filename not in self.hashes:
+            return []
+        matches = self.tree.query(self.hashes[filename], radius)
+        return [fname for fname, _ in sorted(matches, key=lambda m: m[1]) if fname != filename]
+
+    def get_clusters(self, radius: int = DEFAULT_RADIUS, min_size: int = 2) -> List[List[str]]:
+        """ connected components of the "within radius" relation (union-find), largest first """
+        parent = {fname: fname for fname in self.hashes}
+        def find(x: str) -> str:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+        for fname, hash_value in self.hashes.items():
+            for other, _ in self.tree.query(hash_value, radius):
+                root_a, root_b = find(fname), find(other)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+        clusters: Dict[str, List[str]] = {}
+        for fname in self.hashes:
+            clusters.setdefault(find(fname), []).append(fname)
+        return sorted((c for c in clusters.values() if len(c) >= min_size), key=len, reverse=True)
+
+    def _load_cache(self) -> Dict[str, list]:
+        """ filename -> [hex hash, mtime_ns, size] for the images hashed in previous builds """
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                contents = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if contents.get("hash_size") != self.hash_size or contents.get("image_folder") != os.path.abspath(self.image_folder):
+            return {}
+        return contents.get("entries", {})
+
+    def _write_cache(self, stats: Dict[str, List[int]], cached: Dict[str, list]):
+        entries = dict(cached)
+        for fname, hash_value in self.hashes.items():
+            entries[fname] = [format(hash_value, "x"), *stats[fname]]
+        contents = {"hash_size": self.hash_size, "image_folder": os.path.abspath(self.image_folder), "entries": entries}
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        with open(self.cache_path, "w") as f:
+            json.dump(contents, f)
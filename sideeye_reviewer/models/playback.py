@@ -0,0 +1,142 @@
+import math
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+
+class PlaybackBuffer:
+    """ Bounded buffer of decoded frames around a playhead, decoded ahead of time on worker threads
+        - `fill` queues decodes for the next `ahead` (and previous `behind`) positions, wrapping around both ends of the list,
+            and evicts everything outside that window so that memory stays bounded by the window size
+        - `get` never blocks: a frame that isn't decoded yet is reported as None, so the GUI timer can count a dropped frame
+            instead of stalling on a slow decode
+    """
+    def __init__(self, load_fn: Callable[[int], List[Any]], num_frames: int, capacity: int = 16, max_workers: int = 2):
+        """
+            :param load_fn:     decodes the images of the frame at a position in the file list
+            :param num_frames:  length of the file list
+            :param capacity:    maximum number of frames held (decoded or in flight) at once
+            :param max_workers: decode threads
+        """
+        self.load_fn = load_fn
+        self.num_frames = num_frames
+        self.capacity = max(1, min(capacity, num_frames))
+        self._frames: "OrderedDict[int, Future]" = OrderedDict()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sideeye_playback")
+        self.frames_shown = 0
+        self.dropped_frames = 0
+
+    def get_window(self, playhead: int, ahead: int, behind: int = 0) -> List[int]:
+        """ positions to keep decoded, nearest first and alternating sides, wrapped around the ends of the list """
+        ahead, behind = min(ahead, self.capacity), min(behind, self.capacity - min(ahead, self.capacity))
+        window, seen = [], {playhead % self.num_frames}
+        for k in range(1, max(ahead, behind) + 1):
+            for offset, limit in ((k, ahead), (-k, behind)):
+                pos = (playhead + offset) % self.num_frames
+                if k <= limit and pos not in seen:
+                    seen.add(pos)
+                    window.append(pos)
+        return window
+
+    def fill(self, playhead: int, ahead: int, behind: int = 0):
+        """ queue decodes for the window around the playhead and evict frames outside of it """
+        if self.num_frames == 0:
+            return
+        window = self.get_window(playhead, ahead, behind)
+        keep = set(window)
+        for pos in [p for p in self._frames if p not in keep]:
+            self._frames.pop(pos).cancel()  # no-op for decodes that already started or finished
+        for pos in window:
+            if pos not in self._frames:
+                self._frames[pos] = self._pool.submit(self.load_fn, pos)
+
+    def get(self, pos: int, wait: bool = False) -> Optional[List[Any]]:
+        """ decoded images of a frame if they're ready, otherwise None (the decode keeps running)
+            - with wait=True, a frame whose decode is already running is waited for, since it's further along than a fresh decode.
+                A decode still queued behind other frames is cancelled and None is returned instead, so that the caller decodes the
+                frame directly rather than blocking until the whole queue ahead of it is done
+        """
+        future = self._frames.get(pos)
+        if future is None or future.cancelled():
+            return None
+        if not future.done():
+            if not wait:
+                return None
+            if not future.running() and future.cancel():
+                self._frames.pop(pos, None)
+                return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"[PLAYBACK] WARNING: failed to decode frame {pos}: {e}")
+            self._frames.pop(pos, None)
+            return None
+
+    def record_tick(self, shown: bool):
+        if shown:
+            self.frames_shown += 1
+        else:
+            self.dropped_frames += 1
+
+    def reset_stats(self):
+        self.frames_shown = 0
+        self.dropped_frames = 0
+
+    def shutdown(self):
+        for future in self._frames.values():
+            future.cancel()
+        self._frames.clear()
+        self._pool.shutdown(wait=False)
+
+
+class NavigationTracker:
+    """ Infers the direction and speed of manual navigation from the recent PREV/NEXT steps, to split a prefetch budget between both sides
+        - steps older than `window_seconds` are forgotten, so the split follows the reviewer when they switch from scrubbing forwards to backwards
+        - the budget grows with the step rate (e.g. holding a button down) and shrinks back for occasional clicks to avoid wasted decodes
+    """
+    def __init__(self, window_seconds: float = 1.5, lookahead_seconds: float = 2.0, min_budget: int = 4, clock: Callable[[], float] = time.monotonic):
+        """
+            :param window_seconds:    how far back steps are considered
+            :param lookahead_seconds: the prefetch budget covers about this many seconds of navigation at the current step rate
+            :param min_budget:        frames prefetched even when navigating slowly
+        """
+        self.window_seconds = window_seconds
+        self.lookahead_seconds = lookahead_seconds
+        self.min_budget = min_budget
+        self.clock = clock
+        self._steps: Deque[Tuple[float, int]] = deque()
+
+    def record(self, step: int):
+        """ record a navigation step: +1 for NEXT and -1 for PREV """
+        now = self.clock()
+        self._steps.append((now, 1 if step > 0 else -1))
+        self._expire(now)
+
+    def _expire(self, now: float):
+        while self._steps and now - self._steps[0][0] > self.window_seconds:
+            self._steps.popleft()
+
+    def get_direction_bias(self) -> float:
+        """ from -1 (only PREV) to 1 (only NEXT), with newer steps weighted more - forward-leaning (0.5) without recent steps """
+        self._expire(self.clock())
+        if not self._steps:
+            return 0.5
+        weights = [i + 1 for i in range(len(self._steps))]
+        return sum(w * step for w, (_, step) in zip(weights, self._steps)) / sum(weights)
+
+    def get_rate(self) -> float:
+        """ recent steps per second """
+        self._expire(self.clock())
+        if len(self._steps) < 2:
+            return 0.0
+        span = max(self._steps[-1][0] - self._steps[0][0], 1e-3)
+        return (len(self._steps) - 1) / span
+
+    def split_budget(self, capacity: int) -> Tuple[int, int]:
+        """ (frames to prefetch after the current one, frames before it) - at least one on each side when the budget allows """
+        budget = min(capacity, max(self.min_budget, math.ceil(self.get_rate() * self.lookahead_seconds)))
+        forward = round(budget * (1.0 + self.get_direction_bias()) / 2.0)
+        if budget >= 2:
+            forward = min(max(forward, 1), budget - 1)
+        return forward, budget - forward
@@ -0,0 +1,118 @@
+import os
+import json
+import uuid
+import socket
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set, Iterable
+
+
+def get_default_session_id() -> str:
+    """ unique per reviewing session, so that an undo only ever removes the labels that this session added """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class ResultsStore:
+    """ Label store shared by any number of concurrent sessions (threads or processes) writing to the same out_dir
+        - backed by stdlib sqlite3 in WAL mode: readers never block the writer, and each write is one short IMMEDIATE transaction
+        - one row per (filename, label, session), so writes from different sessions never overwrite each other and no update is lost
+        - the bins JSON is produced on read by merging the rows of every session (see export_json)
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS labels (
+            filename TEXT NOT NULL,
+            label    TEXT NOT NULL,
+            session  TEXT NOT NULL,
+            PRIMARY KEY (filename, label, session)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, db_path: str, session_id: Optional[str] = None, timeout: float = 30.0):
+        """
+            :param db_path:    SQLite database file, created if missing
+            :param session_id: ID of this session's rows - defaults to a unique host:pid:random ID
+            :param timeout:    seconds to wait on a locked database before giving up on a write
+        """
+        self.db_path = db_path
+        self.session_id = session_id or get_default_session_id()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # isolation_level=None leaves transaction control to the explicit BEGIN IMMEDIATE in _write
+        self._conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()  # one connection per store, so serialize its use between threads of this process
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode, and avoids an fsync on every commit
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self._SCHEMA)
+
+    def _write(self, sql: str, rows: Iterable[tuple]):
+        """ run one statement over many rows as a single transaction """
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so concurrent writers queue on busy_timeout instead of failing to upgrade a read lock
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def add(self, entry: Dict[str, List[str]]):
+        """ record a BinManager history entry ({filename: [labels]}) """
+        rows = [(fname, lbl, self.session_id) for fname, labels in entry.items() for lbl in labels]
+        self._write("INSERT OR IGNORE INTO labels (filename, label, session) VALUES (?, ?, ?)", rows)
+
+    def remove(self, entry: Dict[str, List[str]]):
+        """ undo a history entry - only rows written by this session are removed """
+        rows = [(fname, lbl, self.session_id) for fname, labels in entry.items() for lbl in labels]
+        self._write("DELETE FROM labels WHERE filename = ? AND label = ? AND session = ?", rows)
+
+    def import_bins(self, bins: Dict[str, List[str]], session_id: str = "imported"):
+        """ load existing bins (e.g. a JSON written before the store existed) under a separate session ID """
+        rows = [(fname, lbl, session_id) for lbl, filenames in bins.items() for fname in filenames]
+        self._write("INSERT OR IGNORE INTO labels (filename, label, session) VALUES (?, ?, ?)", rows)
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM labels LIMIT 1").fetchone() is None
+
+    def get_bins(self, labels: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """ label -> sorted filenames, merged over every session (bins in `labels` are included even if empty) """
+        with self._lock:
+            return self._read_bins(labels)
+
+    def _read_bins(self, labels: Optional[List[str]]) -> Dict[str, List[str]]:
+        bins: Dict[str, List[str]] = {lbl: [] for lbl in (labels or [])}
+        for lbl, fname in self._conn.execute("SELECT DISTINCT label, filename FROM labels ORDER BY label, filename"):
+            bins.setdefault(lbl, []).append(fname)
+        return bins
+
+    def get_labels(self, filename: str) -> Set[str]:
+        """ labels of one file, merged over every session """
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT DISTINCT label FROM labels WHERE filename = ?", (filename,))}
+
+    def get_sorted_files(self) -> Set[str]:
+        """ every filename labeled by any session """
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT DISTINCT filename FROM labels")}
+
+    def export_json(self, json_path: str, labels: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """ write the merged bins to the canonical bins JSON - written to a temporary file first so that readers never see a partial file
+            - the read and the replace happen under the database write lock, so concurrent exports can't finish out of order
+                and overwrite a newer snapshot with an older one
+        """
+        tmp_path = f"{json_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                bins = self._read_bins(labels)
+                with open(tmp_path, "w") as f:
+                    json.dump(bins, f, indent=4)
+                os.replace(tmp_path, json_path)
+            finally:
+                self._conn.execute("COMMIT")
+        return bins
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,126 @@
+import os
+import csv
+import json
+import heapq
+import itertools
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Set, Iterable, Iterator, Union
+
+
+def load_scores(score_path: str) -> Dict[str, float]:
+    """ read per-image model scores from a sidecar file
+        - CSV: rows of `filename,score` (a header row is skipped if its score column isn't numeric)
+        - JSON: either {"filename": score, ...} or [{"filename": ..., "score": ...}, ...]
+    """
+    ext = os.path.splitext(score_path)[1].lower()
+    scores: Dict[str, float] = {}
+    if ext == ".json":
+        with open(score_path, "r") as f:
+            contents = json.load(f)
+        if isinstance(contents, dict):
+            return {fname: float(score) for fname, score in contents.items()}
+        for entry in contents:
+            scores[entry["filename"]] = float(entry["score"])
+        return scores
+    if ext != ".csv":
+        raise ValueError(f"Unsupported score file '{score_path}' - expected a .csv or .json file.")
+    with open(score_path, "r", newline="") as f:
+        for i, row in enumerate(csv.reader(f)):
+            if len(row) < 2:
+                continue
+            try:
+                scores[row[0].strip()] = float(row[1])
+            except ValueError:
+                if i != 0:  # only the first row may be a header
+                    raise
+    return scores
+
+
+class PriorityFileList(Sequence):
+    """ File list served lazily from a heap-based priority queue of model scores, e.g. most uncertain images first
+        - the list is a read-only Sequence, so the controllers index it exactly like a plain list
+        - entries are popped from the heap only when an index past the already served prefix is requested
+        - scores of files that haven't been served yet can be updated mid-session in O(log n) (lazy deletion from the heap)
+        - already-labeled files are dropped while building the heap with an O(1) set lookup per file
+        - membership tests and iteration don't serve anything ahead, so they can be used without fixing the order of the queued files
+    """
+    _REMOVED = "<removed>"  # placeholder for heap entries invalidated by a score update
+
+    def __init__(self, scores: Dict[str, float], files: Optional[Iterable[str]] = None, skip: Optional[Set[str]] = None, descending: bool = False):
+        """
+            :param scores:     filename -> model score (e.g. confidence); files without a score are served last
+            :param files:      files to order - defaults to every file in `scores`
+            :param skip:       files to leave out entirely, e.g. those already labeled in a previous session
+            :param descending: serve the highest scores first instead of the lowest (least confident) ones
+        """
+        self.descending = descending
+        skip = skip or set()
+        self._counter = itertools.count()  # tie breaker keeping the input order for equal scores
+        self._entries: Dict[str, list] = {}
+        heap: List[list] = []
+        for fname in (scores.keys() if files is None else files):
+            if fname in skip:
+                continue
+            entry = [self._get_priority(scores.get(fname)), next(self._counter), fname]
+            self._entries[fname] = entry
+            heap.append(entry)
+        heapq.heapify(heap)
+        self._heap = heap
+        self._served: List[str] = []
+        self._served_positions: Dict[str, int] = {}
+        self._total = len(self._entries)
+
+    def _get_priority(self, score: Optional[float]) -> float:
+        if score is None:
+            return float("inf")
+        return -score if self.descending else score
+
+    def update_score(self, filename: str, score: float) -> bool:
+        """ reprioritize a file that hasn't been served yet - returns False if it was already served (or unknown) """
+        entry = self._entries.get(filename)
+        if entry is None:
+            return False
+        entry[-1] = self._REMOVED
+        new_entry = [self._get_priority(score), next(self._counter), filename]
+        self._entries[filename] = new_entry
+        heapq.heappush(self._heap, new_entry)
+        return True
+
+    def _serve_until(self, idx: int):
+        """ pop entries off the heap until the served prefix covers index idx """
+        while len(self._served) <= idx and self._heap:
+            *_, fname = heapq.heappop(self._heap)
+            if fname is not self._REMOVED:
+                del self._entries[fname]
+                self._served_positions[fname] = len(self._served)
+                self._served.append(fname)
+
+    def is_queued(self, filename: str) -> bool:
+        """ whether a file is still in the queue, i.e. will be served after every file served so far """
+        return filename in self._entries
+
+    def get_served_position(self, filename: str) -> Optional[int]:
+        """ index of an already served file (None if it's still queued or unknown) """
+        return self._served_positions.get(filename)
+
+    def __contains__(self, filename: object) -> bool:
+        return filename in self._entries or filename in self._served_positions
+
+    def __iter__(self) -> Iterator[str]:
+        """ the served files followed by the queued ones in their current priority order - a snapshot that leaves the heap untouched """
+        yield from list(self._served)
+        for *_, fname in sorted(entry for entry in self._heap if entry[-1] is not self._REMOVED):
+            yield fname
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self._total))]
+        if idx < 0:
+            idx += self._total
+        if not 0 <= idx < self._total:
+            raise IndexError("PriorityFileList index out of range")
+        self._serve_until(idx)
+        return self._served[idx]
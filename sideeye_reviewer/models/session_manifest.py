@@ -0,0 +1,253 @@
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+# local imports
+from .file_list import CompactFileList
+from .event_log import get_default_log_dir
+
+
+def get_default_manifest_path(out_dir: str, json_name: str) -> str:
+    """ the manifest is kept with the session logs and named after the results JSON it belongs to,
+        e.g. out/session_logs/sorting_output.session.json - out_dir itself only holds results, which tools read as bins JSONs
+    """
+    return os.path.join(get_default_log_dir(out_dir), f"{os.path.splitext(json_name)[0]}.session.json")
+
+def get_index_version(files: Iterable[str]) -> str:
+    """ fingerprint of the ordered dataset listing - any added, removed or renamed file changes it """
+    hasher = hashlib.blake2b(digest_size=12)
+    for fname in files:
+        hasher.update(fname.encode("utf-8"))
+        hasher.update(b"\n")
+    return hasher.hexdigest()
+
+
+class SessionTimings:
+    """ per-image timing of a review session stored as packed unsigned ints (12 bytes per labeled image)
+        - dwell: milliseconds from an image being displayed to it being labeled
+        - latency: milliseconds from the label click until the next image was displayed
+    """
+    def __init__(self):
+        self.positions = array("I")  # position of the image in the full ordered dataset (i.e. including skipped files)
+        self.dwell_ms = array("I")
+        self.latency_ms = array("I")
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def record(self, position: int, dwell_seconds: float, latency_seconds: float = 0.0):
+        self.positions.append(position)
+        self.dwell_ms.append(min(int(dwell_seconds * 1000), 0xFFFFFFFF))
+        self.latency_ms.append(min(int(latency_seconds * 1000), 0xFFFFFFFF))
+
+    def set_last_latency(self, latency_seconds: float):
+        """ fill in the latency of the last recorded image once the next one is displayed """
+        self.latency_ms[-1] = min(int(latency_seconds * 1000), 0xFFFFFFFF)
+
+    def to_dict(self) -> Dict[str, str]:
+        # base64 of the raw little-endian arrays keeps the manifest small and quick to parse even for long sessions
+        def encode(values: array) -> str:
+            if sys.byteorder == "big":
+                values = array(values.typecode, values)
+                values.byteswap()
+            return base64.b64encode(values.tobytes()).decode("ascii")
+        return {"positions": encode(self.positions), "dwell_ms": encode(self.dwell_ms), "latency_ms": encode(self.latency_ms)}
+
+    @classmethod
+    def from_dict(cls, contents: Dict[str, str]) -> "SessionTimings":
+        timings = cls()
+        for key in ("positions", "dwell_ms", "latency_ms"):
+            values = array("I")
+            values.frombytes(base64.b64decode(contents.get(key, "")))
+            if sys.byteorder == "big":
+                values.byteswap()
+            setattr(timings, key, values)
+        return timings
+
+    def summarize(self) -> Dict[str, float]:
+        """ median/mean dwell and latency in seconds, and labeled images per hour of dwell time """
+        if not self.positions:
+            return {"num_images": 0}
+        dwell, latency = sorted(self.dwell_ms), sorted(self.latency_ms)
+        total_hours = sum(dwell) / 3.6e6
+        return {
+            "num_images": len(dwell),
+            "median_dwell": dwell[len(dwell) // 2] / 1000.0,
+            "mean_dwell": sum(dwell) / len(dwell) / 1000.0,
+            "median_latency": latency[len(latency) // 2] / 1000.0,
+            "images_per_hour": len(dwell) / total_hours if total_hours > 0 else 0.0,
+        }
+
+
+class SessionManifest:
+    """ Everything needed to resume a review session exactly, without listing the image folders or reading the results JSON
+        - the ordered dataset listing (after sorting, integrity exclusions and sharding) is streamed once to a sidecar text file
+            (one filename per line), fingerprinted by an index version, and reused as long as none of the image folders' mtimes changed
+        - the ordering settings (shuffle seed, sharding) and a progress cursor into the ordered listing replace the count-based
+            checkpoint, so resuming with a seeded order lands exactly on the first file that wasn't labeled
+        - labels, legend and summary type are kept so that a session can be reopened from the manifest alone
+        - per-image timings are stored compactly for throughput reporting (see SessionTimings)
+    """
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.image_folders: List[str] = []
+        self.out_dir: Optional[str] = None
+        self.json_name: Optional[str] = None
+        self.labels: List[str] = []
+        self.legend: Optional[Dict[str, str]] = None
+        self.summary_type: Optional[str] = None
+        self.ordering: Dict[str, Any] = {}
+        self.index_version: Optional[str] = None
+        self.num_files = 0
+        self.folder_mtimes: List[int] = []
+        self.cursor = 0
+        self.created: Optional[float] = None
+        self.updated: Optional[float] = None
+        self.timings = SessionTimings()
+        self._files: Optional[CompactFileList] = None
+
+    @property
+    def files_path(self) -> str:
+        return f"{os.path.splitext(self.path)[0]}.files.txt"
+
+    ############################################# loading #############################################
+
+    @classmethod
+    def load(cls, path: str) -> "SessionManifest":
+        with open(path, "r") as f:
+            contents = json.load(f)
+        if contents.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported session manifest version {contents.get('version')} in {path}")
+        manifest = cls(path)
+        for key in ("image_folders", "out_dir", "json_name", "labels", "legend", "summary_type", "ordering", "cursor", "created", "updated"):
+            setattr(manifest, key, contents.get(key, getattr(manifest, key)))
+        dataset = contents.get("dataset", {})
+        manifest.index_version = dataset.get("index_version")
+        manifest.num_files = dataset.get("num_files", 0)
+        manifest.folder_mtimes = dataset.get("folder_mtimes", [])
+        manifest.timings = SessionTimings.from_dict(contents.get("timing", {}))
+        return manifest
+
+    def load_files(self) -> CompactFileList:
+        """ the ordered dataset listing saved with the manifest - raises ValueError if it doesn't match the recorded index version """
+        if self._files is None:
+            with open(self.files_path, "r", encoding="utf-8", newline="\n") as f:
+                files = CompactFileList(line[:-1] if line.endswith("\n") else line for line in f) if self.num_files else CompactFileList()
+            if len(files) != self.num_files or get_index_version(files) != self.index_version:
+                raise ValueError(f"Dataset listing {self.files_path} doesn't match the session manifest")
+            self._files = files
+        return self._files
+
+    def get_stale_reason(self, data_manager) -> Optional[str]:
+        """ why the manifest can't be used to resume with this DataManager, or None if it can """
+        if [os.path.abspath(d) for d in data_manager.image_folders] != self.image_folders:
+            return "the image folders changed"
+        if list(data_manager.labels) != list(self.labels):
+            return "the labels changed"
+        if self._get_ordering(data_manager) != self.ordering:
+            return "the ordering settings changed"
+        try:
+            mtimes = [os.stat(d).st_mtime_ns for d in data_manager.image_folders]
+        except OSError as e:
+            return str(e)
+        # adding, removing or renaming files updates the folder mtime - one stat per folder instead of listing them
+        if mtimes != self.folder_mtimes:
+            return "files were added to or removed from the image folders"
+        if not os.path.exists(self.files_path):
+            return "the dataset listing is missing"
+        return None
+
+    def apply(self, data_manager) -> bool:
+        """ restore the dataset listing and progress cursor into a DataManager - returns False (after printing why) if the
+            manifest is stale, in which case the session starts from a regular folder listing and checkpoint
+        """
+        reason = self.get_stale_reason(data_manager)
+        if reason is None:
+            try:
+                data_manager.restore_session(self.load_files(), self.cursor)
+            except (OSError, ValueError) as e:
+                reason = str(e)
+        if reason is not None:
+            print(f"[SESSION] Not resuming from {self.path}: {reason}")
+            return False
+        print(f"[SESSION] Resuming from {self.path} at {self.cursor}/{self.num_files}")
+        return True
+
+    ############################################# saving #############################################
+
+    @staticmethod
+    def _get_ordering(data_manager) -> Dict[str, Any]:
+        return {
+            "shuffle": bool(data_manager.shuffle),
+            "shuffle_seed": data_manager.shuffle_seed,
+            "score_file": data_manager.score_file,
+            "reviewer_id": data_manager.reviewer_id,
+            "reviewers": data_manager.shard_assigner.reviewers if data_manager.shard_assigner is not None else None,
+            "integrity_check": bool(data_manager.integrity_check),
+        }
+
+    def update(self, data_manager, cursor: int, legend: Optional[Dict[str, str]] = None):
+        """ capture the current state of a session - the listing is only rewritten when the dataset index changed """
+        files = data_manager.dataset_files
+        if files is None:
+            return
+        index_version = get_index_version(files)
+        if index_version != self.index_version or not os.path.exists(self.files_path):
+            os.makedirs(os.path.dirname(os.path.abspath(self.files_path)), exist_ok=True)
+            self._write_files(files)
+        self._files = files
+        self.index_version = index_version
+        self.num_files = len(files)
+        self.folder_mtimes = [os.stat(d).st_mtime_ns for d in data_manager.image_folders]
+        self.image_folders = [os.path.abspath(d) for d in data_manager.image_folders]
+        self.out_dir = data_manager.out_dir
+        self.json_name = data_manager.json_name
+        self.labels = list(data_manager.labels)
+        self.legend = legend if legend is not None else self.legend
+        self.summary_type = data_manager.summary_type
+        self.ordering = self._get_ordering(data_manager)
+        self.cursor = cursor
+
+    def save(self):
+        now = time.time()
+        self.created = self.created or now
+        self.updated = now
+        contents = {
+            "version": self.VERSION,
+            "created": self.created,
+            "updated": self.updated,
+            "image_folders": self.image_folders,
+            "out_dir": self.out_dir,
+            "json_name": self.json_name,
+            "labels": self.labels,
+            "legend": self.legend,
+            "summary_type": self.summary_type,
+            "ordering": self.ordering,
+            "dataset": {"index_version": self.index_version, "num_files": self.num_files, "folder_mtimes": self.folder_mtimes},
+            "cursor": self.cursor,
+            "timing": self.timings.to_dict(),
+        }
+        self._atomic_write(self.path, json.dumps(contents, indent=4))
+        print(f"[SESSION] Saved session manifest to {self.path}")
+
+    def _write_files(self, files: Iterable[str]):
+        """ stream the listing to the sidecar file one filename per line, so it's never joined into one big string """
+        tmp_path = f"{self.files_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+            for fname in files:
+                f.write(fname)
+                f.write("\n")
+        os.replace(tmp_path, self.files_path)
+
+    @staticmethod
+    def _atomic_write(path: str, text: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+from typing import Dict, FrozenSet, List, Optional, Set, Iterable, Tuple
+
+
+def stable_hash(filename: str, salt: str = "") -> int:
+    """ 64-bit hash of a filename that is identical across processes, machines and Python versions (unlike hash()) """
+    digest = hashlib.blake2b(f"{salt}{filename}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+def get_shard_json_name(json_name: str, reviewer_id: str) -> str:
+    """ per-reviewer output file name, e.g. "sorting_output.json" -> "sorting_output.alice.json" """
+    stem, ext = os.path.splitext(json_name)
+    return f"{stem}.{reviewer_id}{ext or '.json'}"
+
+
+class ShardAssigner:
+    """ Deterministic assignment of files to reviewers by a stable hash of the filename
+        - every reviewer computes the same assignment independently, so no coordination or shared state is needed
+        - with overlap > 0, that fraction of files is also assigned to a second (different) reviewer for agreement checks
+    """
+    def __init__(self, reviewers: List[str], overlap: float = 0.0, salt: str = ""):
+        """
+            :param reviewers: IDs of all reviewers sharing the dataset - the order matters, so every reviewer must use the same list
+            :param overlap:   fraction of files (0 to 1) that are reviewed by two reviewers
+            :param salt:      changes the assignment entirely, e.g. to reshuffle shards between review rounds
+        """
+        if len(reviewers) == 0:
+            raise ValueError("At least one reviewer ID is required for sharding.")
+        if len(set(reviewers)) != len(reviewers):
+            raise ValueError("Reviewer IDs must be unique.")
+        if not 0.0 <= overlap <= 1.0:
+            raise ValueError(f"overlap must be between 0 and 1; got {overlap}")
+        self.reviewers = list(reviewers)
+        self.overlap = overlap
+        self.salt = salt
+
+    def get_reviewers(self, filename: str) -> List[str]:
+        """ the reviewer(s) that a file is assigned to """
+        num_reviewers = len(self.reviewers)
+        h = stable_hash(filename, self.salt)
+        primary = h % num_reviewers
+        assigned = [self.reviewers[primary]]
+        if self.overlap > 0 and num_reviewers > 1:
+            # independent bits of the same hash decide overlap membership and which other reviewer gets the copy
+            if ((h >> 32) % 10000) / 10000.0 < self.overlap:
+                offset = 1 + (h >> 16) % (num_reviewers - 1)
+                assigned.append(self.reviewers[(primary + offset) % num_reviewers])
+        return assigned
+
+    def get_shard(self, files: Iterable[str], reviewer_id: str) -> List[str]:
+        """ the files assigned to one reviewer, in their original order """
+        if reviewer_id not in self.reviewers:
+            raise ValueError(f"Unknown reviewer ID '{reviewer_id}'; expected one of {self.reviewers}")
+        return [fname for fname in files if reviewer_id in self.get_reviewers(fname)]
+
+
+def find_shard_outputs(out_dir: str, json_name: str, reviewers: List[str]) -> List[str]:
+    """ the per-reviewer output files of the given reviewers for the canonical output name, in reviewer order
+        - only the exact per-reviewer names are matched, so other JSONs sharing the stem (e.g. a merged copy) are never picked up
+    """
+    paths = []
+    for reviewer_id in reviewers:
+        path = os.path.join(out_dir, get_shard_json_name(json_name, reviewer_id))
+        if os.path.isfile(path):
+            paths.append(path)
+        else:
+            print(f"[SHARDS] WARNING: no output from reviewer '{reviewer_id}' ({path})")
+    return paths
+
+def merge_shards(shard_paths: List[str], out_path: str, drop_conflicts: bool = False, conflicts_out: Optional[str] = None) -> Dict[str, List[str]]:
+    """ combine per-reviewer bins JSONs into the canonical bins JSON in one pass over the shards
+        - only one shard is loaded at a time, and each bin is accumulated as a set so that overlapping files appear once per bin
+        - overlap files that reviewers labeled differently are conflicts: they're reported and either kept in every bin any reviewer
+            sorted them into or, with drop_conflicts, left out of the merged bins
+        - conflicts_out writes the conflicts (filename -> {shard file: labels}) to a JSON file for adjudication
+    """
+    merged: Dict[str, Set[str]] = {}
+    # labels of each file in the first shard that held it, and the conflicting files with their labels in every shard
+    first_labels: Dict[str, Tuple[str, FrozenSet[str]]] = {}
+    conflicts: Dict[str, Dict[str, List[str]]] = {}
+    for path in shard_paths:
+        with open(path, "r") as f:
+            shard = json.load(f)
+        shard_labels: Dict[str, Set[str]] = {}
+        for label, filenames in shard.items():
+            merged.setdefault(label, set()).update(filenames)
+            for fname in filenames:
+                shard_labels.setdefault(fname, set()).add(label)
+        shard_name = os.path.basename(path)
+        for fname, labels in shard_labels.items():
+            first_shard, first = first_labels.setdefault(fname, (shard_name, frozenset(labels)))
+            if labels != first:
+                conflicts.setdefault(fname, {first_shard: sorted(first)})[shard_name] = sorted(labels)
+        print(f"[SHARDS] Merged {path}")
+    drop = conflicts if drop_conflicts else {}
+    output = {label: sorted(f for f in filenames if f not in drop) for label, filenames in merged.items()}
+    if conflicts:
+        action = "left out of" if drop_conflicts else "kept in every bin of"
+        print(f"[SHARDS] WARNING: {len(conflicts)} overlap file(s) labeled differently by different reviewers, {action} the merged bins")
+    if conflicts_out:
+        with open(conflicts_out, "w") as f:
+            json.dump(conflicts, f, indent=4)
+        print(f"[SHARDS] Wrote {len(conflicts)} conflict(s) to {conflicts_out}")
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(output, f, indent=4)
+    print(f"[SHARDS] Wrote merged bins from {len(shard_paths)} shard(s) to {out_path}")
+    return output
+
+
+def main(argv: Optional[List[str]] = None):
+    """ command line entry point: merge every per-reviewer output in a directory into the canonical bins JSON """
+    parser = argparse.ArgumentParser(description="Merge per-reviewer bins JSONs into the canonical bins JSON.")
+    parser.add_argument("out_dir", help="directory holding the per-reviewer output files")
+    parser.add_argument("--reviewers", nargs="+", required=True, help="IDs of every reviewer sharing the dataset")
+    parser.add_argument("--json-name", default="sorting_output.json", help="canonical output name the shards were derived from")
+    parser.add_argument("--out", default=None, help="merged output path (defaults to <out_dir>/<json-name>)")
+    parser.add_argument("--drop-conflicts", action="store_true", help="leave overlap files labeled differently by reviewers out of the merged bins")
+    parser.add_argument("--conflicts-out", default=None, help="JSON file to write the conflicting files (and each reviewer's labels) to")
+    args = parser.parse_args(argv)
+    shard_paths = find_shard_outputs(args.out_dir, args.json_name, args.reviewers)
+    if not shard_paths:
+        sys.exit(f"No shard outputs matching '{args.json_name}' found in {args.out_dir}")
+    merge_shards(shard_paths, args.out or os.path.join(args.out_dir, args.json_name), args.drop_conflicts, args.conflicts_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import io
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from PIL import Image
+
+
+def get_default_thumbnail_dir() -> str:
+    """ user-level cache directory, so that thumbnails are shared between sessions and datasets """
+    return os.path.join(os.path.expanduser("~"), ".cache", "sideeye_reviewer", "thumbnails")
+
+
+class ThumbnailCache:
+    """ Disk cache of reduced-resolution copies of images, used for quick previews and thumbnail grids
+        - thumbnails are keyed by a hash of the file contents, so copies of the same image (e.g. across datasets or bins) share one entry
+        - the content hash of each file is remembered per (path, mtime, size) so unchanged files are only ever hashed once
+        - thumbnails are stored as raw uint8 .npy arrays so that reading one back is a single cheap memcpy
+        - JPEGs are decoded directly at a reduced scale (PIL's draft mode) when a thumbnail has to be generated
+    """
+    DEFAULT_MAX_SIZE = 256
+    HASH_CHUNK_SIZE = 1 << 20
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE):
+        """
+            :param cache_dir: where thumbnails are stored - defaults to a user-level cache directory
+            :param max_size:  longest side of the thumbnails in pixels
+        """
+        self.cache_dir = cache_dir or get_default_thumbnail_dir()
+        self.max_size = max_size
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # in-memory memo of (path, mtime, size) -> content hash, backed by small link files under cache_dir/index
+        self._content_hashes: Dict[str, str] = {}
+
+    def get_content_hash(self, path: str) -> str:
+        """ hash of the file contents, only recomputed when the file's path, mtime or size changes """
+        stat_key = self._get_stat_key(path)
+        content_hash = self._lookup_content_hash(stat_key)
+        if content_hash is None:
+            link_path = os.path.join(self.cache_dir, "index", stat_key[:2], stat_key)
+            hasher = hashlib.blake2b(digest_size=20)
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+            content_hash = hasher.hexdigest()
+            os.makedirs(os.path.dirname(link_path), exist_ok=True)
+            self._atomic_write(link_path, content_hash.encode("ascii"))
+            self._content_hashes[stat_key] = content_hash
+        return content_hash
+
+    @staticmethod
+    def _get_stat_key(path: str) -> str:
+        stat = os.stat(path)
+        return hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}".encode("utf-8")).hexdigest()
+
+    def _lookup_content_hash(self, stat_key: str) -> Optional[str]:
+        """ the remembered content hash for a (path, mtime, size) key, or None if the file was never hashed """
+        if stat_key in self._content_hashes:
+            return self._content_hashes[stat_key]
+        try:
+            with open(os.path.join(self.cache_dir, "index", stat_key[:2], stat_key), "r") as f:
+                content_hash = f.read().strip()
+        except OSError:
+            return None
+        self._content_hashes[stat_key] = content_hash
+        return content_hash
+
+    def _get_cache_key(self, path: str) -> str:
+        """ the same image contents at a different thumbnail size get a separate entry """
+        return f"{self.get_content_hash(path)}_{self.max_size}"
+
+    def _get_cache_path(self, key: str) -> str:
+        # shard into subdirectories to avoid a single huge directory for large datasets
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npy")
+
+    def get_thumbnail(self, path: str) -> np.ndarray:
+        """ return the thumbnail of the image at the given path, generating and caching it if needed
+            - PNGs are returned as floats in [0, 1] to match what plt.imread returns for the full image
+        """
+        cache_path = self._get_cache_path(self._get_cache_key(path))
+        try:
+            thumb = np.load(cache_path)
+        except (OSError, ValueError):
+            thumb = self._generate_thumbnail(path, cache_path)
+        return self._to_display(path, thumb)
+
+    def get_cached_thumbnail(self, path: str) -> Optional[np.ndarray]:
+        """ the thumbnail only if it's already cached, without hashing or decoding anything - None on a cache miss """
+        content_hash = self._lookup_content_hash(self._get_stat_key(path))
+        if content_hash is None:
+            return None
+        try:
+            thumb = np.load(self._get_cache_path(f"{content_hash}_{self.max_size}"))
+        except (OSError, ValueError):
+            return None
+        return self._to_display(path, thumb)
+
+    @staticmethod
+    def _to_display(path: str, thumb: np.ndarray) -> np.ndarray:
+        if os.path.splitext(path)[1].lower() == ".png":
+            return thumb.astype(np.float32) / 255.0
+        return thumb
+
+    def get_thumbnails(self, paths: List[str], max_workers: Optional[int] = None) -> List[np.ndarray]:
+        """ return thumbnails for many images at once, hashing and generating cache misses in parallel
+            - PIL releases the GIL while decoding and resizing, so a thread pool scales with the number of cores
+        """
+        if len(paths) <= 1:
+            return [self.get_thumbnail(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+            return list(pool.map(self.get_thumbnail, paths))
+
+    def _generate_thumbnail(self, path: str, cache_path: str) -> np.ndarray:
+        with Image.open(path) as img:
+            # JPEG can be decoded directly at a reduced scale; a no-op for other formats
+            img.draft(img.mode, (self.max_size, self.max_size))
+            if img.mode not in ("L", "RGB", "RGBA"):
+                img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+            # nearest neighbor keeps label values intact for single-channel masks
+            img.thumbnail((self.max_size, self.max_size), Image.NEAREST if img.mode == "L" else Image.BILINEAR)
+            thumb = np.asarray(img, dtype=np.uint8)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with io.BytesIO() as buffer:
+            np.save(buffer, thumb)
+            self._atomic_write(cache_path, buffer.getvalue())
+        return thumb
+
+    @staticmethod
+    def _atomic_write(path: str, contents: bytes):
+        """ write to a temporary file first so that concurrent readers (threads or other sessions) never see a partial file """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(contents)
+        os.replace(tmp_path, path)
@@ -0,0 +1,155 @@
+import os
+import math
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+import numpy as np
+from PIL import Image
+
+
+class TilePyramid:
+    """ Multi-resolution tile pyramid for a single (very large) image, generated lazily and cached on disk
+        - level 0 is the full resolution image and each following level halves both dimensions until the image fits in one tile
+        - a level is only generated the first time one of its tiles is requested, then tiles are read back from disk
+        - level 0 is cut from the source tile by tile and every following level is built from 2x2 blocks of the previous level's
+            tiles, so no full-resolution array (or converted copy of the source) is ever held in memory
+        - a small in-memory LRU of recently used tiles keeps panning smooth while bounding memory use by the tile count
+    """
+    DEFAULT_TILE_SIZE = 512
+    MAX_CACHED_TILES = 48
+
+    def __init__(self, image_path: str, cache_dir: str, tile_size: int = DEFAULT_TILE_SIZE):
+        """
+            :param image_path: path to the full resolution image
+            :param cache_dir:  root directory of the tile cache - tiles for this image are stored in a subdirectory keyed by its path & mtime
+            :param tile_size:  width and height of each (square) tile in pixels
+        """
+        self.image_path = image_path
+        self.tile_size = tile_size
+        # only reads the header, so this is cheap even for huge images
+        with Image.open(image_path) as img:
+            self.width, self.height = img.size
+        self.num_levels = self._compute_num_levels()
+        self.cache_dir = os.path.join(cache_dir, self._get_cache_key())
+        self._tiles: "OrderedDict[Tuple[int, int, int], np.ndarray]" = OrderedDict()
+        self._levels_ready: Dict[int, bool] = {}
+
+    def _compute_num_levels(self) -> int:
+        longest_side = max(self.width, self.height)
+        return max(1, math.ceil(math.log2(longest_side / self.tile_size)) + 1) if longest_side > self.tile_size else 1
+
+    def _get_cache_key(self) -> str:
+        """ tiles are invalidated whenever the source image is modified or the tile size changes """
+        stat = os.stat(self.image_path)
+        key = f"{os.path.abspath(self.image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.tile_size}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    ####################################### geometry helpers #######################################
+
+    def get_level_shape(self, level: int) -> Tuple[int, int]:
+        """ (height, width) of the image at the given level """
+        factor = 2 ** level
+        return math.ceil(self.height / factor), math.ceil(self.width / factor)
+
+    def get_grid_shape(self, level: int) -> Tuple[int, int]:
+        """ number of (rows, cols) of tiles at the given level """
+        level_h, level_w = self.get_level_shape(level)
+        return math.ceil(level_h / self.tile_size), math.ceil(level_w / self.tile_size)
+
+    def choose_level(self, view_width: float, view_height: float, screen_width: float, screen_height: float) -> int:
+        """ coarsest level that still has at least one image pixel per screen pixel for the visible region (in full-res pixels) """
+        ratio = max(view_width / max(screen_width, 1.0), view_height / max(screen_height, 1.0))
+        if ratio <= 1.0:
+            return 0
+        return min(int(math.floor(math.log2(ratio))), self.num_levels - 1)
+
+    ####################################### tile access #######################################
+
+    def _get_tile_path(self, level: int, row: int, col: int) -> str:
+        return os.path.join(self.cache_dir, str(level), f"{row}_{col}.npy")
+
+    def _is_level_ready(self, level: int) -> bool:
+        if level not in self._levels_ready:
+            self._levels_ready[level] = os.path.exists(os.path.join(self.cache_dir, str(level), ".done"))
+        return self._levels_ready[level]
+
+    def _generate_level(self, level: int):
+        """ write all of the level's tiles to the disk cache - level 0 from the source, the others from the previous level """
+        level_dir = os.path.join(self.cache_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        if level == 0:
+            self._cut_source_tiles()
+        else:
+            if not self._is_level_ready(level - 1):
+                self._generate_level(level - 1)
+            self._downsample_tiles(level)
+        # marker written last so that an interrupted generation gets redone rather than read back partially
+        open(os.path.join(level_dir, ".done"), "w").close()
+        self._levels_ready[level] = True
+
+    def _cut_source_tiles(self):
+        """ level 0 tiles, cropped and converted one at a time from the decoded source """
+        nrows, ncols = self.get_grid_shape(0)
+        ts = self.tile_size
+        with Image.open(self.image_path) as img:
+            mode = img.mode
+            if mode not in ("L", "RGB", "RGBA"):
+                mode = "RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB"
+            for r in range(nrows):
+                for c in range(ncols):
+                    tile = img.crop((c*ts, r*ts, min((c+1)*ts, self.width), min((r+1)*ts, self.height)))
+                    if tile.mode != mode:
+                        tile = tile.convert(mode)
+                    np.save(self._get_tile_path(0, r, c), np.asarray(tile))
+
+    def _downsample_tiles(self, level: int):
+        """ each tile of the level halves the (up to) 2x2 block of tiles it covers in the previous level """
+        nrows, ncols = self.get_grid_shape(level)
+        prev_rows, prev_cols = self.get_grid_shape(level - 1)
+        for r in range(nrows):
+            for c in range(ncols):
+                block = np.concatenate([
+                    np.concatenate([np.load(self._get_tile_path(level - 1, pr, pc)) for pc in range(2*c, min(2*c + 2, prev_cols))], axis=1)
+                    for pr in range(2*r, min(2*r + 2, prev_rows))
+                ], axis=0)
+                # ceil halving matches get_level_shape, since ceil(ceil(x / 2^(n-1)) / 2) == ceil(x / 2^n)
+                size = (math.ceil(block.shape[1] / 2), math.ceil(block.shape[0] / 2))
+                np.save(self._get_tile_path(level, r, c), np.asarray(Image.fromarray(block).resize(size, Image.BOX)))
+
+    def get_tile(self, level: int, row: int, col: int) -> np.ndarray:
+        """ return a single tile, generating its level first if it isn't cached on disk yet """
+        key = (level, row, col)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+        if not self._is_level_ready(level):
+            self._generate_level(level)
+        tile = np.load(self._get_tile_path(level, row, col))
+        self._tiles[key] = tile
+        if len(self._tiles) > self.MAX_CACHED_TILES:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def get_region(self, level: int, x0: float, y0: float, x1: float, y1: float) -> Tuple[np.ndarray, Tuple[float, float, float, float]]:
+        """ compose the tiles covering the region [x0, x1) x [y0, y1) (in full-res pixels) into one array
+            :returns: the composed array and its extent as (left, right, bottom, top) in full-res pixels, as expected by imshow
+        """
+        factor = 2 ** level
+        ts = self.tile_size
+        nrows, ncols = self.get_grid_shape(level)
+        col0 = min(max(int(x0 // (ts * factor)), 0), ncols - 1)
+        col1 = min(max(int(math.ceil(x1 / (ts * factor))) - 1, col0), ncols - 1)
+        row0 = min(max(int(y0 // (ts * factor)), 0), nrows - 1)
+        row1 = min(max(int(math.ceil(y1 / (ts * factor))) - 1, row0), nrows - 1)
+        tile_rows: List[np.ndarray] = []
+        for r in range(row0, row1 + 1):
+            tile_rows.append(np.concatenate([self.get_tile(level, r, c) for c in range(col0, col1 + 1)], axis=1))
+        region = np.concatenate(tile_rows, axis=0)
+        left, top = col0 * ts * factor, row0 * ts * factor
+        right = min(left + region.shape[1] * factor, self.width)
+        bottom = min(top + region.shape[0] * factor, self.height)
+        return region, (left, right, bottom, top)
+
+    def get_overview(self) -> np.ndarray:
+        """ the coarsest level, which always fits in a single tile """
+        return self.get_tile(self.num_levels - 1, 0, 0)
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
     from sideeye_reviewer.views.unilabel_reviewer import SingleLabelReviewerView
     from sideeye_reviewer.views.multilabel_reviewer import MultiLabelReviewerView
     from sideeye_reviewer.views.slides_viewer import SlideshowViewerView
+    from sideeye_reviewer.views.contact_sheet_viewer import ContactSheetViewerView
+    from sideeye_reviewer.views.batch_reviewer import BatchLabelReviewerView
     from sideeye_reviewer.views.reviewer_button import ReviewerButton
     from sideeye_reviewer.models.data_manager import DataManager
     from sideeye_reviewer.models.sorter import BinManager
@@ -18,15 +20,17 @@ if TYPE_CHECKING:
     from sideeye_reviewer.controllers.review_controller import ReviewerController
     from sideeye_reviewer.controllers.base_controller import BaseReviewController
     from sideeye_reviewer.controllers.slides_controller import SlideshowController
+    from sideeye_reviewer.controllers.contact_sheet_controller import ContactSheetController
+    from sideeye_reviewer.controllers.batch_controller import BatchReviewerController
 
 
 # Custom types
-ViewerLike = Union["BaseReviewerView", "SingleLabelReviewerView", "MultiLabelReviewerView", "SlideshowViewerView"]
+ViewerLike = Union["BaseReviewerView", "SingleLabelReviewerView", "MultiLabelReviewerView", "SlideshowViewerView", "ContactSheetViewerView", "BatchLabelReviewerView"]
 DataManagerType = NewType("DataManagerType", "DataManager")
 BinManagerType = NewType("BinManagerType", "BinManager")
 ImageSorterType = NewType("ImageSorterType", "ImageSorter")
 # TODO: might make this "ControllerLike" if I add another controller for the basic slideshow viewer
-ControllerLike = Union["BaseReviewController", "ReviewerController", "SlideshowController"]
+ControllerLike = Union["BaseReviewController", "ReviewerController", "SlideshowController", "ContactSheetController", "BatchReviewerController"]
 ReviewerButtonType = NewType("ReviewerButtonType", "ReviewerButton")
 
 
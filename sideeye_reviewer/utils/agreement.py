@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class LabelMatrix:
+    """ Labels from N bins JSONs (one per reviewer) as a compact boolean array of shape (files, labels, reviewers)
+        - `reviewed[f, r]` records whether reviewer r put file f in any bin at all, so that shards and partially finished
+            sessions don't count as "not labeled" by the reviewers who never saw the file
+        - built with a single np.unique over every filename, so loading scales to millions of files without Python-level loops per file
+    """
+    def __init__(self, files: np.ndarray, labels: List[str], reviewers: List[str], matrix: np.ndarray):
+        self.files = files
+        self.labels = labels
+        self.reviewers = reviewers
+        self.matrix = matrix
+        self.reviewed = matrix.any(axis=1)
+
+    @classmethod
+    def from_result_files(cls, paths: List[str], reviewers: Optional[List[str]] = None) -> "LabelMatrix":
+        """ load bins JSONs ({label: [filenames]}) - reviewer IDs default to each file's name without the extension """
+        if reviewers is None:
+            reviewers = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+        if len(reviewers) != len(paths):
+            raise ValueError(f"Got {len(reviewers)} reviewer IDs for {len(paths)} result files.")
+        results: List[Dict[str, List[str]]] = []
+        for path in paths:
+            with open(path, "r") as f:
+                results.append(json.load(f))
+        labels = sorted(set().union(*(r.keys() for r in results)))
+        label_idx = {lbl: i for i, lbl in enumerate(labels)}
+        names, label_ids, reviewer_ids = [], [], []
+        for r_idx, bins in enumerate(results):
+            for lbl, filenames in bins.items():
+                names.append(np.asarray(filenames, dtype=str))
+                label_ids.append(np.full(len(filenames), label_idx[lbl], dtype=np.int32))
+                reviewer_ids.append(np.full(len(filenames), r_idx, dtype=np.int32))
+        if not names:
+            return cls(np.empty(0, dtype=str), labels, list(reviewers), np.zeros((0, len(labels), len(paths)), dtype=bool))
+        files, file_ids = np.unique(np.concatenate(names), return_inverse=True)
+        matrix = np.zeros((len(files), len(labels), len(paths)), dtype=bool)
+        matrix[file_ids.ravel(), np.concatenate(label_ids), np.concatenate(reviewer_ids)] = True
+        return cls(files, labels, list(reviewers), matrix)
+
+    def _get_reviewer_idx(self, reviewer) -> int:
+        return reviewer if isinstance(reviewer, (int, np.integer)) else self.reviewers.index(reviewer)
+
+    def _get_single_labels(self) -> np.ndarray:
+        """ (files, reviewers) index of the one label each reviewer gave each file, or -1 if they gave none or several """
+        num_given = self.matrix.sum(axis=1)
+        return np.where(num_given == 1, self.matrix.argmax(axis=1), -1)
+
+    def cohens_kappa(self, reviewer_a, reviewer_b, label: Optional[str] = None) -> float:
+        """ Cohen's kappa between two reviewers over the files they both labeled
+            - with `label`, agreement on that label alone (present/absent), which suits multi-label reviews
+            - otherwise agreement on the single label per file, over the files where both gave exactly one label
+        """
+        a, b = self._get_reviewer_idx(reviewer_a), self._get_reviewer_idx(reviewer_b)
+        if label is not None:
+            both = self.reviewed[:, a] & self.reviewed[:, b]
+            l_idx = self.labels.index(label)
+            conf = get_binary_confusion(self.matrix[both, l_idx, a], self.matrix[both, l_idx, b])
+        else:
+            single = self._get_single_labels()
+            both = (single[:, a] >= 0) & (single[:, b] >= 0)
+            num_labels = len(self.labels)
+            conf = np.bincount(single[both, a] * num_labels + single[both, b], minlength=num_labels**2).reshape(num_labels, num_labels)
+        return kappa_from_confusion(conf)
+
+    def fleiss_kappa(self, label: Optional[str] = None) -> float:
+        """ Fleiss' kappa over every reviewer, using the files labeled by all of them
+            - with `label`, agreement on that label alone; otherwise on the single label per file
+        """
+        all_reviewed = self.reviewed.all(axis=1)
+        if label is not None:
+            yes = self.matrix[all_reviewed, self.labels.index(label)].sum(axis=1)
+            counts = np.stack([len(self.reviewers) - yes, yes], axis=1)
+        else:
+            single = self._get_single_labels()[all_reviewed]
+            single = single[(single >= 0).all(axis=1)]
+            # per-file count of reviewers choosing each label, without a Python loop over files
+            counts = np.zeros((len(single), len(self.labels)), dtype=np.int64)
+            np.add.at(counts, (np.repeat(np.arange(len(single)), single.shape[1]), single.ravel()), 1)
+        return fleiss_kappa(counts)
+
+    def get_label_confusion(self, reviewer_a, reviewer_b) -> Dict[str, np.ndarray]:
+        """ per-label 2x2 confusion [[neither, only b], [only a, both]] between two reviewers over the files they both labeled """
+        a, b = self._get_reviewer_idx(reviewer_a), self._get_reviewer_idx(reviewer_b)
+        both = self.reviewed[:, a] & self.reviewed[:, b]
+        ya, yb = self.matrix[both, :, a], self.matrix[both, :, b]
+        conf = np.stack([
+            np.stack([(~ya & ~yb).sum(axis=0), (~ya & yb).sum(axis=0)], axis=1),
+            np.stack([(ya & ~yb).sum(axis=0), (ya & yb).sum(axis=0)], axis=1),
+        ], axis=1)
+        return {lbl: conf[i] for i, lbl in enumerate(self.labels)}
+
+    def get_file_disagreement(self) -> np.ndarray:
+        """ per-file disagreement: the fraction of reviewer pairs that disagree on a label, averaged over labels
+            - 0 means everyone who labeled the file agreed on every label; NaN for files labeled by fewer than two reviewers
+        """
+        n = self.reviewed.sum(axis=1).astype(np.float64)
+        yes = self.matrix.sum(axis=2).astype(np.float64)
+        no = n[:, None] - yes
+        pairs = n * (n - 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            agreeing = (yes * (yes - 1) + no * (no - 1)) / pairs[:, None]
+            disagreement = 1.0 - agreeing.mean(axis=1)
+        disagreement[n < 2] = np.nan
+        return disagreement
+
+    def get_disagreement_file_list(self, threshold: float = 0.0) -> List[str]:
+        """ files with disagreement above `threshold`, most disputed first - pass as `file_list` to a DataManager for review """
+        disagreement = self.get_file_disagreement()
+        idx = np.flatnonzero(np.nan_to_num(disagreement, nan=-1.0) > threshold)
+        idx = idx[np.argsort(-disagreement[idx], kind="stable")]
+        return self.files[idx].tolist()
+
+    def summarize(self) -> str:
+        lines = [f"{len(self.files)} files, {len(self.labels)} labels, {len(self.reviewers)} reviewers"]
+        if len(self.reviewers) > 1:
+            lines.append(f"Fleiss' kappa (single label): {self.fleiss_kappa():.3f}")
+            for lbl in self.labels:
+                lines.append(f"    {lbl}: Fleiss' kappa {self.fleiss_kappa(lbl):.3f}")
+        if len(self.reviewers) == 2:
+            lines.append(f"Cohen's kappa (single label): {self.cohens_kappa(0, 1):.3f}")
+        disagreement = self.get_file_disagreement()
+        rated = ~np.isnan(disagreement)
+        lines.append(f"{int((disagreement[rated] > 0).sum())} of {int(rated.sum())} multiply-reviewed files have some disagreement")
+        return "\n".join(lines)
+
+
+def get_binary_confusion(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.bincount(a.astype(np.int64) * 2 + b.astype(np.int64), minlength=4).reshape(2, 2)
+
+def kappa_from_confusion(conf: np.ndarray) -> float:
+    """ Cohen's kappa from a square confusion matrix between two raters - NaN without any rated items """
+    total = conf.sum()
+    if total == 0:
+        return float("nan")
+    observed = np.trace(conf) / total
+    expected = (conf.sum(axis=0) * conf.sum(axis=1)).sum() / total**2
+    if expected == 1.0:
+        return 1.0 if observed == 1.0 else 0.0
+    return float((observed - expected) / (1.0 - expected))
+
+def fleiss_kappa(counts: np.ndarray) -> float:
+    """ Fleiss' kappa from an (items, categories) array counting the raters choosing each category - every row must sum to the same number of raters """
+    counts = np.asarray(counts, dtype=np.float64)
+    if counts.shape[0] == 0:
+        return float("nan")
+    num_raters = counts[0].sum()
+    if num_raters < 2 or not np.all(counts.sum(axis=1) == num_raters):
+        raise ValueError("Fleiss' kappa needs the same number (at least two) of raters for every item.")
+    p_cat = counts.sum(axis=0) / counts.sum()
+    p_item = ((counts * (counts - 1)).sum(axis=1)) / (num_raters * (num_raters - 1))
+    observed, expected = p_item.mean(), (p_cat**2).sum()
+    if expected == 1.0:
+        return 1.0 if observed == 1.0 else 0.0
+    return float((observed - expected) / (1.0 - expected))
+
+
+def main(argv: Optional[List[str]] = None):
+    """ command line entry point: report agreement between result files and optionally write the disputed files as a file list """
+    parser = argparse.ArgumentParser(description="Inter-rater agreement between bins JSONs from several reviewers.")
+    parser.add_argument("result_files", nargs="+", help="one bins JSON per reviewer")
+    parser.add_argument("--reviewers", nargs="+", default=None, help="reviewer IDs (default: the result file names)")
+    parser.add_argument("--threshold", type=float, default=0.0, help="minimum disagreement for a file to be written to --out")
+    parser.add_argument("--out", default=None, help="JSON file to write the list of disputed files to")
+    args = parser.parse_args(argv)
+    if len(args.result_files) < 2:
+        sys.exit("At least two result files are needed to measure agreement.")
+    label_matrix = LabelMatrix.from_result_files(args.result_files, args.reviewers)
+    print(label_matrix.summarize())
+    if args.out:
+        file_list = label_matrix.get_disagreement_file_list(args.threshold)
+        with open(args.out, "w") as f:
+            json.dump(file_list, f, indent=4)
+        print(f"Wrote {len(file_list)} disputed file(s) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import math
+import argparse
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+# local imports
+from .montage import compose_grid, get_grid_shape
+from ..models.thumbnail_cache import ThumbnailCache
+
+
+class BinMontageExporter:
+    """ Writes every bin of a review's results as contact-sheet pages (label header + captioned thumbnail grid) for QA sign-off
+        - thumbnails come from the shared ThumbnailCache, so a re-export (or one after reviewing the same dataset) skips decoding
+        - tiles are composed in NumPy with compose_grid and only the captions are drawn with PIL, with no matplotlib involved
+        - the thumbnails of the next page are decoded on a thread pool while the current page is captioned and encoded, and
+            pages are encoded on a few writer threads, so decoding, composing and PNG encoding overlap
+    """
+    HEADER_HEIGHT = 28
+    CAPTION_HEIGHT = 14
+
+    def __init__(
+        self,
+        image_dir: str,
+        out_dir: str,
+        cell_size: int = 160,
+        ncols: int = 10,
+        nrows: int = 8,
+        pad: int = 6,
+        thumbnail_cache_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        file_ext: str = "png"
+    ):
+        """
+            :param image_dir:  folder holding the reviewed images (the primary entry of image_folders)
+            :param out_dir:    where the pages are written, as <label>_<page>.<file_ext>
+            :param cell_size:  longest side of each thumbnail in pixels - also the thumbnail size cached
+            :param ncols:      thumbnails per row
+            :param nrows:      rows per page
+            :param file_ext:   "png" (lossless) or "jpg" (much smaller for photos)
+        """
+        self.image_dir = image_dir
+        self.out_dir = out_dir
+        self.cell_size = cell_size
+        self.ncols = ncols
+        self.nrows = nrows
+        self.pad = pad
+        self.file_ext = file_ext.lstrip(".").lower()
+        self.cache = ThumbnailCache(thumbnail_cache_dir, max_size=cell_size)
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        # zlib/libjpeg release the GIL, so encoding pages on a few threads overlaps with composing the next ones
+        self.num_writers = max(2, min(8, (os.cpu_count() or 1) // 2))
+        self._font = ImageFont.load_default()
+        self._missing = np.full((cell_size // 2, cell_size // 2, 3), 200, dtype=np.uint8)
+        self.failed: List[str] = []
+
+    @property
+    def per_page(self) -> int:
+        return self.ncols * self.nrows
+
+    def _load_thumbnail(self, filename: str) -> np.ndarray:
+        try:
+            return self.cache.get_thumbnail(os.path.join(self.image_dir, filename))
+        except Exception as e:
+            print(f"[EXPORT] WARNING: could not load {filename}: {e}")
+            self.failed.append(filename)
+            return self._missing
+
+    def _fit_caption(self, draw: ImageDraw.ImageDraw, text: str, width: int) -> str:
+        """ shorten a filename from the middle (keeping the extension visible) until it fits the cell width """
+        if draw.textlength(text, font=self._font) <= width:
+            return text
+        keep = len(text)
+        while keep > 1:
+            keep -= 1
+            head = (keep + 1) // 2
+            short = f"{text[:head]}~{text[len(text) - (keep - head):]}"
+            if draw.textlength(short, font=self._font) <= width:
+                return short
+        return text[:1]
+
+    def render_page(self, label: str, filenames: Sequence[str], thumbs: List[np.ndarray], page: int, num_pages: int, total: int) -> Image.Image:
+        nrows, ncols = get_grid_shape(len(filenames), self.ncols) if num_pages == 1 else (self.nrows, self.ncols)
+        grid = compose_grid(thumbs, nrows, ncols, self.cell_size, self.pad, caption_height=self.CAPTION_HEIGHT)
+        sheet = Image.new("RGB", (grid.shape[1], grid.shape[0] + self.HEADER_HEIGHT), (255, 255, 255))
+        sheet.paste(Image.fromarray(grid), (0, self.HEADER_HEIGHT))
+        draw = ImageDraw.Draw(sheet)
+        draw.text((self.pad, 8), f"{label}  -  {total} image(s)  -  page {page + 1}/{num_pages}", fill=(0, 0, 0), font=self._font)
+        cell, row_height = self.cell_size + self.pad, self.cell_size + self.pad + self.CAPTION_HEIGHT
+        for i, fname in enumerate(filenames):
+            row, col = divmod(i, ncols)
+            left = self.pad + col * cell
+            top = self.HEADER_HEIGHT + self.pad + row * row_height + self.cell_size + 1
+            draw.text((left, top), self._fit_caption(draw, fname, self.cell_size), fill=(60, 60, 60), font=self._font)
+        return sheet
+
+    def _save(self, sheet: Image.Image, path: str) -> str:
+        tmp_path = f"{path}.tmp"
+        if self.file_ext in ("jpg", "jpeg"):
+            sheet.save(tmp_path, format="JPEG", quality=90)
+        else:
+            # compress_level 1 is several times faster than the default and only slightly larger for thumbnails
+            sheet.save(tmp_path, format="PNG", compress_level=1)
+        os.replace(tmp_path, path)
+        return path
+
+    def export(self, bins: Dict[str, Sequence[str]], labels: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """ write the pages of each bin (every bin by default, or only the given labels)
+            :returns: label -> paths of its pages
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        labels = labels or list(bins.keys())
+        # every page to render, as (label, page, number of pages, filenames on the page)
+        pages = []
+        for label in labels:
+            filenames = list(bins.get(label, []))
+            num_pages = math.ceil(len(filenames) / self.per_page)
+            for page in range(num_pages):
+                pages.append((label, page, num_pages, filenames[page * self.per_page:(page + 1) * self.per_page]))
+        outputs: Dict[str, List[str]] = {label: [] for label in labels}
+        if not pages:
+            return outputs
+        print(f"[EXPORT] Writing {len(pages)} page(s) for {len(labels)} bin(s) to {self.out_dir}...")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as decode_pool, ThreadPoolExecutor(max_workers=self.num_writers) as write_pool:
+            def submit_page(idx: int) -> List[Future]:
+                return [decode_pool.submit(self._load_thumbnail, f) for f in pages[idx][3]]
+            writes: Deque[Future] = deque()
+            pending = submit_page(0)
+            for idx, (label, page, num_pages, filenames) in enumerate(pages):
+                thumbs = [future.result() for future in pending]
+                if idx + 1 < len(pages):
+                    pending = submit_page(idx + 1)
+                sheet = self.render_page(label, filenames, thumbs, page, num_pages, len(bins[label]))
+                path = os.path.join(self.out_dir, f"{label}_{page + 1:03d}.{self.file_ext}")
+                writes.append(write_pool.submit(self._save, sheet, path))
+                outputs[label].append(path)
+                # bound the pages held in memory while waiting to be encoded
+                while len(writes) > 2 * self.num_writers:
+                    writes.popleft().result()
+            for future in writes:
+                future.result()
+        if self.failed:
+            print(f"[EXPORT] WARNING: {len(self.failed)} image(s) could not be loaded and are shown as blank tiles")
+        return outputs
+
+
+def export_bin_montages(bins_json: str, image_dir: str, out_dir: str, labels: Optional[List[str]] = None, **kwargs) -> Dict[str, List[str]]:
+    """ contact-sheet pages for each bin of a bins JSON (as written by BinManager.write_to_outfiles), see BinMontageExporter """
+    with open(bins_json, "r") as f:
+        bins = json.load(f)
+    return BinMontageExporter(image_dir, out_dir, **kwargs).export(bins, labels)
+
+
+def main(argv: Optional[List[str]] = None):
+    """ command line entry point: export contact sheets of every bin of a bins JSON """
+    parser = argparse.ArgumentParser(description="Export per-label contact-sheet montages from a bins JSON.")
+    parser.add_argument("bins_json", help="bins JSON ({label: [filenames]})")
+    parser.add_argument("image_dir", help="folder holding the reviewed images")
+    parser.add_argument("--out", required=True, help="directory the pages are written to")
+    parser.add_argument("--labels", nargs="*", default=None, help="only export these bins")
+    parser.add_argument("--cell-size", type=int, default=160, help="longest side of each thumbnail in pixels")
+    parser.add_argument("--cols", type=int, default=10, help="thumbnails per row")
+    parser.add_argument("--rows", type=int, default=8, help="rows per page")
+    parser.add_argument("--format", default="png", choices=["png", "jpg"], help="image format of the pages")
+    parser.add_argument("--workers", type=int, default=None, help="decode threads")
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.bins_json):
+        sys.exit(f"{args.bins_json} not found")
+    outputs = export_bin_montages(
+        args.bins_json, args.image_dir, args.out, args.labels,
+        cell_size=args.cell_size, ncols=args.cols, nrows=args.rows, file_ext=args.format, max_workers=args.workers
+    )
+    for label, paths in outputs.items():
+        print(f"    {label}: {len(paths)} page(s)")
+
+
+if __name__ == "__main__":
+    main()
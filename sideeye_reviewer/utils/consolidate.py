@@ -0,0 +1,145 @@
+import os
+import sys
+import glob
+import json
+import argparse
+from typing import Dict, List, Optional, Set
+
+
+LEGACY_TXT_SUFFIX = "_labels.txt"
+
+
+class ResultConsolidator:
+    """ Merges legacy `<label>_labels.txt` files and bins JSONs into one bins JSON in a single pass over every entry
+        - text files are streamed line by line, and each JSON is loaded and released one at a time
+        - every bin is an insertion-ordered dict used as a set, so duplicate and double-sorted checks are O(1) per entry
+            and the whole merge is linear in the number of entries
+    """
+    def __init__(self, multilabel: bool = False):
+        """
+            :param multilabel: if True, a file in several bins is expected (multi-label review) and only exact duplicates are reported;
+                otherwise a file in more than one bin is "double sorted"
+        """
+        self.multilabel = multilabel
+        self.bins: Dict[str, Dict[str, None]] = {}
+        self.first_label: Dict[str, str] = {}  # label each file was first seen with, for double-sorted detection
+        self.double_sorted: Dict[str, Set[str]] = {}  # filename -> every label it was sorted into
+        self.num_duplicates: Dict[str, int] = {}  # label -> repeated (filename, label) entries that were dropped
+        self.num_entries = 0
+
+    def _add_entry(self, label: str, filename: str):
+        self.num_entries += 1
+        bin_files = self.bins.setdefault(label, {})
+        if filename in bin_files:
+            self.num_duplicates[label] = self.num_duplicates.get(label, 0) + 1
+            return
+        bin_files[filename] = None
+        first = self.first_label.setdefault(filename, label)
+        if first != label and not self.multilabel:
+            self.double_sorted.setdefault(filename, {first}).add(label)
+
+    def add_txt(self, path: str, label: Optional[str] = None):
+        """ stream a legacy label file with one filename per line - the label defaults to the `<label>_labels.txt` prefix """
+        if label is None:
+            label = os.path.basename(path)[:-len(LEGACY_TXT_SUFFIX)] if path.endswith(LEGACY_TXT_SUFFIX) else os.path.splitext(os.path.basename(path))[0]
+        self.bins.setdefault(label, {})
+        with open(path, "r") as fptr:
+            for line in fptr:
+                filename = line.strip()
+                if filename:
+                    self._add_entry(label, filename)
+
+    def add_json(self, path: str, strict: bool = True) -> bool:
+        """ merge a bins JSON ({label: [filenames]}) - any other JSON raises a ValueError, or is skipped (returning False) if not strict """
+        with open(path, "r") as fptr:
+            bins = json.load(fptr)
+        if not is_bins_json(bins):
+            if strict:
+                raise ValueError(f"'{path}' is not a bins JSON - expected an object mapping each label to a list of filenames.")
+            print(f"Skipping {path}: not a bins JSON")
+            return False
+        for label, filenames in bins.items():
+            self.bins.setdefault(label, {})
+            for filename in filenames:
+                self._add_entry(label, filename)
+        return True
+
+    def add_path(self, path: str, skip: Optional[Set[str]] = None):
+        """ add a single result file, or every result file directly inside a directory
+            - in a directory, JSONs that aren't bins JSONs (session manifests, score files, ...) and the paths in `skip`
+                (e.g. the merged output itself) are left out
+        """
+        if os.path.isdir(path):
+            skip = {os.path.abspath(p) for p in skip or ()}
+            for file_path in sorted(glob.glob(os.path.join(path, f"*{LEGACY_TXT_SUFFIX}")) + glob.glob(os.path.join(path, "*.json"))):
+                if os.path.abspath(file_path) in skip:
+                    continue
+                if file_path.endswith(".json"):
+                    self.add_json(file_path, strict=False)
+                else:
+                    self.add_txt(file_path)
+        elif path.endswith(".json"):
+            self.add_json(path)
+        elif path.endswith(".txt"):
+            self.add_txt(path)
+        else:
+            raise ValueError(f"Unsupported result file '{path}' - expected a .txt or .json file.")
+
+    def get_merged(self, drop_double_sorted: bool = False) -> Dict[str, List[str]]:
+        """ label -> sorted filenames; double-sorted files are either kept in every bin they were sorted into or dropped entirely """
+        drop = self.double_sorted if drop_double_sorted else {}
+        return {label: sorted(f for f in files if f not in drop) for label, files in self.bins.items()}
+
+    def write(self, out_path: str, drop_double_sorted: bool = False) -> Dict[str, List[str]]:
+        """ write the merged bins JSON, replacing any existing file only once the new one is complete """
+        merged = self.get_merged(drop_double_sorted)
+        out_dir = os.path.dirname(os.path.abspath(out_path))
+        os.makedirs(out_dir, exist_ok=True)
+        tmp_path = f"{out_path}.tmp"
+        with open(tmp_path, "w") as fptr:
+            json.dump(merged, fptr, indent=4)
+        os.replace(tmp_path, out_path)
+        return merged
+
+    def report(self) -> str:
+        lines = [f"{self.num_entries} entries, {len(self.first_label)} unique files in {len(self.bins)} bins"]
+        for label, count in self.num_duplicates.items():
+            lines.append(f"    {label}: dropped {count} duplicate entries")
+        if self.double_sorted:
+            lines.append(f"WARNING: {len(self.double_sorted)} file(s) sorted into more than one bin")
+        return "\n".join(lines)
+
+
+def is_bins_json(contents) -> bool:
+    """ whether loaded JSON contents are bins, i.e. {label: [filenames]} """
+    return isinstance(contents, dict) and all(
+        isinstance(filenames, list) and all(isinstance(f, str) for f in filenames) for filenames in contents.values()
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    """ command line entry point: consolidate result files and directories into a single bins JSON """
+    parser = argparse.ArgumentParser(description="Merge legacy *_labels.txt files and bins JSONs into one bins JSON.")
+    parser.add_argument("inputs", nargs="+", help="result files, or directories holding them")
+    parser.add_argument("--out", required=True, help="path of the merged bins JSON")
+    parser.add_argument("--multilabel", action="store_true", help="allow files in several bins (multi-label results)")
+    parser.add_argument("--drop-double-sorted", action="store_true", help="leave files sorted into several bins out of the merged result")
+    parser.add_argument("--double-sorted-out", default=None, help="JSON file to write the double-sorted files (and their bins) to")
+    args = parser.parse_args(argv)
+    consolidator = ResultConsolidator(multilabel=args.multilabel)
+    # a rerun over the same directory must not read back its own outputs
+    outputs = {args.out} | ({args.double_sorted_out} if args.double_sorted_out else set())
+    for path in args.inputs:
+        if not os.path.exists(path):
+            sys.exit(f"{path} not found")
+        consolidator.add_path(path, skip=outputs)
+    consolidator.write(args.out, drop_double_sorted=args.drop_double_sorted)
+    print(consolidator.report())
+    print(f"Wrote merged bins to {args.out}")
+    if args.double_sorted_out:
+        with open(args.double_sorted_out, "w") as fptr:
+            json.dump({f: sorted(labels) for f, labels in consolidator.double_sorted.items()}, fptr, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import errno
+import shutil
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# ioctl request for cloning a whole file (Linux FICLONE, supported by btrfs, XFS, bcachefs and overlayfs on top of them)
+FICLONE = 0x40049409
+LINK_MODES = ("hardlink", "reflink", "symlink", "copy")
+# errors meaning "this mode doesn't work between these two directories", as opposed to a problem with one file
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOSYS, errno.EINVAL, errno.ENOTTY, errno.EMLINK}
+
+ProgressFn = Callable[[int, int], None]
+
+
+def _reflink(src: str, dst: str):
+    try:
+        import fcntl
+    except ImportError:
+        # e.g. Windows - reported like any other unsupported mode, so the next mode is tried
+        raise OSError(errno.ENOTSUP, "reflinks need fcntl, which isn't available on this platform")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+class BinMaterializer:
+    """ Materializes the bins of a review as physical folders (out/<label>/<file>) for downstream jobs that read directories
+        - each file is linked rather than copied whenever the filesystem allows: hardlink, then reflink (copy-on-write clone), then
+            symlink, and only then a full copy. The first mode that works between a source folder and the output is remembered,
+            so unsupported modes are only attempted once per folder
+        - idempotent and resumable: files already in place (same inode, same symlink target, or same size and mtime for copies)
+            are skipped, and new or changed files are written to a temporary name and renamed, so an interrupted run never
+            leaves a partial file behind and a re-run only does the remaining work (and sweeps temporary files a killed run left)
+        - files are processed in chunks on a thread pool, since copies and metadata calls release the GIL
+        - with several image_folders, each bin gets one subfolder per image folder (out/<label>/<folder name>/<file>), and with a
+            PairingIndex the counterparts keep their own names (e.g. out/<label>/masks/0001_FV_mask.png)
+    """
+    TMP_SUFFIX = ".sideeye.tmp"
+
+    def __init__(
+        self,
+        image_folders: Sequence[str],
+        out_dir: str,
+        modes: Sequence[str] = LINK_MODES,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 256,
+        prune: bool = False,
+        progress_fn: Optional[ProgressFn] = None,
+        pairing_index = None
+    ):
+        """
+            :param image_folders: folders holding each file of a bin - the first one is the primary image folder
+            :param modes:         allowed ways to materialize a file, in order of preference (any subset of LINK_MODES)
+            :param chunk_size:    files per task submitted to the thread pool
+            :param prune:         remove files from the bin folders that are no longer in their bin
+            :param progress_fn:   called with (files done, total files) - defaults to printing the progress every few seconds
+            :param pairing_index: optional PairingIndex over the same image_folders (in the same order), matching counterparts by
+                                  stem key instead of identical filenames
+        """
+        unknown = [m for m in modes if m not in LINK_MODES]
+        if unknown or not modes:
+            raise ValueError(f"Unknown link mode(s) {unknown}; expected a non-empty subset of {LINK_MODES}")
+        self.image_folders = list(image_folders)
+        self.out_dir = out_dir
+        self.modes = list(modes)
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.chunk_size = max(1, chunk_size)
+        self.prune = prune
+        self.progress_fn = progress_fn or self._print_progress
+        self.pairing_index = pairing_index
+        self._folder_modes: Dict[Tuple[str, str], List[str]] = {}  # (source folder, destination folder) -> modes still worth trying
+        self._lock = threading.Lock()
+        self._last_print = 0.0
+
+    def _print_progress(self, done: int, total: int):
+        now = time.monotonic()
+        if done == total or now - self._last_print >= 2.0:
+            self._last_print = now
+            print(f"[EXPORT] Materialized {done}/{total} files ({100.0 * done / max(total, 1):.1f}%)")
+
+    def get_target_dir(self, label: str, folder_idx: int) -> str:
+        if len(self.image_folders) == 1:
+            return os.path.join(self.out_dir, label)
+        return os.path.join(self.out_dir, label, os.path.basename(os.path.normpath(self.image_folders[folder_idx])))
+
+    def get_counterpart_name(self, filename: str, folder_idx: int) -> str:
+        """ name of a bin's (primary) filename in one of the image folders """
+        if self.pairing_index is None or folder_idx == 0:
+            return filename
+        names = self.pairing_index.pairs.get(filename)
+        # unpaired files keep their name, so they're reported as missing like any other absent file
+        return names[folder_idx] if names is not None else filename
+
+    @staticmethod
+    def is_up_to_date(src: str, dst: str) -> bool:
+        """ whether dst already holds src: the same symlink target, the same inode, or a copy with the same size and mtime """
+        try:
+            if os.path.islink(dst):
+                return os.readlink(dst) == os.path.abspath(src)
+            dst_stat, src_stat = os.stat(dst), os.stat(src)
+        except OSError:
+            return False
+        if (dst_stat.st_dev, dst_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+            return True
+        # copy2/copystat keep the mtime to the microsecond at best, depending on the filesystem
+        return dst_stat.st_size == src_stat.st_size and abs(dst_stat.st_mtime - src_stat.st_mtime) < 1e-3
+
+    def _write(self, mode: str, src: str, tmp_path: str):
+        if mode == "hardlink":
+            os.link(src, tmp_path)
+        elif mode == "reflink":
+            _reflink(src, tmp_path)
+        elif mode == "symlink":
+            os.symlink(os.path.abspath(src), tmp_path)
+        else:
+            shutil.copy2(src, tmp_path)
+
+    def materialize_file(self, src: str, dst: str, folder_key: Tuple[str, str]) -> str:
+        """ put src at dst with the most preferred mode that works - returns the mode used, or "skipped" if dst was up to date """
+        if self.is_up_to_date(src, dst):
+            return "skipped"
+        tmp_path = f"{dst}.{threading.get_ident()}{self.TMP_SUFFIX}"
+        with self._lock:
+            modes = list(self._folder_modes.setdefault(folder_key, list(self.modes)))
+        for mode in modes:
+            try:
+                self._write(mode, src, tmp_path)
+                os.replace(tmp_path, dst)
+                return mode
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS or mode == modes[-1]:
+                    raise
+                with self._lock:
+                    remaining = self._folder_modes[folder_key]
+                    if mode in remaining and len(remaining) > 1:
+                        remaining.remove(mode)
+            finally:
+                # also runs when interrupted mid-write, so no temporary file is left next to the materialized ones
+                if os.path.lexists(tmp_path):
+                    os.remove(tmp_path)
+        raise OSError(f"No link mode could materialize {src}")
+
+    def _run_chunk(self, chunk: List[Tuple[str, str, Tuple[str, str]]]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for src, dst, folder_key in chunk:
+            try:
+                result = self.materialize_file(src, dst, folder_key)
+            except OSError as e:
+                print(f"[EXPORT] WARNING: could not materialize {src}: {e}")
+                result = "failed"
+            counts[result] = counts.get(result, 0) + 1
+        return counts
+
+    def _sweep_tmp_files(self, target_dir: str):
+        """ remove the temporary files of a run that was killed before it could clean up (<file>.<thread id>.sideeye.tmp) """
+        for entry in os.scandir(target_dir):
+            if entry.name.endswith(self.TMP_SUFFIX):
+                os.remove(entry.path)
+
+    def _prune(self, target_dir: str, keep: set) -> int:
+        removed = 0
+        for entry in os.scandir(target_dir):
+            if (entry.is_file(follow_symlinks=False) or entry.is_symlink()) and entry.name not in keep:
+                os.remove(entry.path)
+                removed += 1
+        return removed
+
+    def materialize(self, bins: Dict[str, Sequence[str]], labels: Optional[List[str]] = None) -> Dict[str, int]:
+        """ materialize every bin (or only the given labels)
+            :returns: number of files per mode used, plus "skipped" (already up to date), "failed" and "pruned"
+        """
+        labels = labels or list(bins.keys())
+        jobs = []
+        for label in labels:
+            filenames = list(dict.fromkeys(bins.get(label, [])))
+            for folder_idx, folder in enumerate(self.image_folders):
+                target_dir = self.get_target_dir(label, folder_idx)
+                os.makedirs(target_dir, exist_ok=True)
+                self._sweep_tmp_files(target_dir)
+                folder_key = (os.path.abspath(folder), target_dir)
+                for fname in filenames:
+                    name = self.get_counterpart_name(fname, folder_idx)
+                    jobs.append((os.path.join(folder, name), os.path.join(target_dir, name), folder_key))
+        totals: Dict[str, int] = {}
+        chunks = [jobs[i:i + self.chunk_size] for i in range(0, len(jobs), self.chunk_size)]
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._run_chunk, chunk): len(chunk) for chunk in chunks}
+            for future in as_completed(futures):
+                for result, count in future.result().items():
+                    totals[result] = totals.get(result, 0) + count
+                done += futures[future]
+                self.progress_fn(done, len(jobs))
+        if self.prune:
+            for label in labels:
+                for folder_idx in range(len(self.image_folders)):
+                    keep = {self.get_counterpart_name(fname, folder_idx) for fname in bins.get(label, [])}
+                    totals["pruned"] = totals.get("pruned", 0) + self._prune(self.get_target_dir(label, folder_idx), keep)
+        return totals
+
+
+def materialize_bins(bins_json: str, image_folders: Sequence[str], out_dir: str, labels: Optional[List[str]] = None, **kwargs) -> Dict[str, int]:
+    """ materialize the bins of a bins JSON (as written by BinManager.write_to_outfiles), see BinMaterializer """
+    with open(bins_json, "r") as f:
+        bins = json.load(f)
+    return BinMaterializer(image_folders, out_dir, **kwargs).materialize(bins, labels)
+
+
+def main(argv: Optional[List[str]] = None):
+    """ command line entry point: materialize the bins of a bins JSON as folders """
+    parser = argparse.ArgumentParser(description="Materialize the bins of a bins JSON as folders of (linked or copied) images.")
+    parser.add_argument("bins_json", help="bins JSON ({label: [filenames]})")
+    parser.add_argument("image_folders", nargs="+", help="folders holding the reviewed files (primary image folder first)")
+    parser.add_argument("--out", required=True, help="output directory, one subfolder per label")
+    parser.add_argument("--labels", nargs="*", default=None, help="only materialize these bins")
+    parser.add_argument("--modes", nargs="+", default=list(LINK_MODES), choices=LINK_MODES, help="allowed modes, in order of preference")
+    parser.add_argument("--prune", action="store_true", help="remove files that are no longer in their bin")
+    parser.add_argument("--pair-key", default=None, help="regex pairing counterparts by stem key instead of identical filenames (see models/pairing_index.py)")
+    parser.add_argument("--workers", type=int, default=None, help="worker threads")
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.bins_json):
+        sys.exit(f"{args.bins_json} not found")
+    pairing_index = None
+    if args.pair_key:
+        from ..models.pairing_index import PairingIndex
+        pairing_index = PairingIndex(args.image_folders, args.pair_key).build()
+    totals = materialize_bins(
+        args.bins_json, args.image_folders, args.out, args.labels, modes=args.modes, prune=args.prune, max_workers=args.workers, pairing_index=pairing_index
+    )
+    print(", ".join(f"{count} {result}" for result, count in sorted(totals.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import math
+from typing import List, Tuple, Union
+import numpy as np
+
+
+def to_uint8_rgb(img: np.ndarray) -> np.ndarray:
+    """ convert an image array (float in [0, 1] or uint8; grayscale, RGB or RGBA) to uint8 RGB for tiling """
+    if img.dtype != np.uint8:
+        img = (np.clip(img, 0.0, 1.0) * 255).astype(np.uint8)
+    if img.ndim == 2:
+        img = np.repeat(img[:, :, None], 3, axis=2)
+    elif img.shape[2] == 4:
+        # composite over white so that transparent regions don't show up black
+        alpha = img[:, :, 3:4].astype(np.float32) / 255.0
+        img = (img[:, :, :3] * alpha + 255.0 * (1.0 - alpha)).astype(np.uint8)
+    return img
+
+def get_grid_shape(num_images: int, ncols: int) -> Tuple[int, int]:
+    """ (rows, cols) needed to tile num_images with at most ncols per row """
+    ncols = max(1, min(ncols, num_images))
+    return max(1, math.ceil(num_images / ncols)), ncols
+
+def compose_grid(
+    images: List[np.ndarray],
+    nrows: int,
+    ncols: int,
+    cell_size: int,
+    pad: int = 4,
+    background: Union[int, Tuple[int, int, int]] = 255,
+    caption_height: int = 0
+) -> np.ndarray:
+    """ tile images (each no larger than cell_size on its longest side) into one uint8 RGB array, centered in their cells
+        - composed directly in NumPy, which is far cheaper than creating one matplotlib Axes per thumbnail
+        - cells beyond len(images) are left as background so that every page of a grid has the same shape
+        - caption_height reserves a blank strip under every cell for text drawn onto the grid afterwards
+    """
+    cell = cell_size + pad
+    row_height = cell + caption_height
+    canvas = np.empty((nrows * row_height + pad, ncols * cell + pad, 3), dtype=np.uint8)
+    canvas[...] = background
+    for i, img in enumerate(images[:nrows * ncols]):
+        img = to_uint8_rgb(img)[:cell_size, :cell_size]
+        row, col = divmod(i, ncols)
+        top = pad + row * row_height + (cell_size - img.shape[0]) // 2
+        left = pad + col * cell + (cell_size - img.shape[1]) // 2
+        canvas[top:top + img.shape[0], left:left + img.shape[1]] = img
+    return canvas
+
+def get_cell_index(x: float, y: float, nrows: int, ncols: int, cell_size: int, pad: int = 4) -> int:
+    """ inverse of compose_grid - the index of the cell containing pixel (x, y) of the grid, or -1 if it's outside all cells """
+    cell = cell_size + pad
+    col, row = int((x - pad) // cell), int((y - pad) // cell)
+    if not (0 <= row < nrows and 0 <= col < ncols):
+        return -1
+    return row * ncols + col
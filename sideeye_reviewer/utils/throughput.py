@@ -0,0 +1,231 @@
+import os
+import sys
+import csv
+import glob
+import json
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+# local imports
+from ..models.event_log import EVENT_KINDS
+
+
+_KIND_CODES = {kind: i for i, kind in enumerate(EVENT_KINDS)}
+
+
+class _Interner:
+    """ maps strings to consecutive integer codes so that events can be stored in NumPy columns """
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ThroughputLog:
+    """ Events of any number of session logs (written by models/event_log.EventLogger) as NumPy columns, with per-reviewer,
+        per-label and per-image aggregations
+        - reviewers, sessions, files and labels are interned to integer codes, and the labels of the events are a boolean
+            (events, labels) matrix, so any number of labels is supported
+        - an event naming several files (e.g. a batch-labeled page) becomes one row per file, sharing the event's dwell time
+        - active time only counts the gaps between consecutive events of a session up to `idle_seconds`, so breaks with the
+            window left open don't inflate the hours (wall-clock hours are reported as well)
+    """
+    def __init__(self, idle_seconds: float = 120.0):
+        self.idle_seconds = idle_seconds
+        self.reviewers, self.sessions, self.files, self.labels = _Interner(), _Interner(), _Interner(), _Interner()
+        self._session_reviewer: List[int] = []
+        self._columns: Dict[str, list] = {"session": [], "kind": [], "t": [], "file": [], "dwell": []}
+        # (row, label code) of every label given, i.e. the set entries of the label matrix
+        self._label_entries: Dict[str, list] = {"row": [], "label": []}
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+
+    ############################################# loading #############################################
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str], idle_seconds: float = 120.0) -> "ThroughputLog":
+        """ load log files, or every *.ndjson file directly inside the given directories """
+        log = cls(idle_seconds)
+        for path in paths:
+            files = sorted(glob.glob(os.path.join(path, "*.ndjson"))) if os.path.isdir(path) else [path]
+            for file_path in files:
+                log.add_file(file_path)
+        return log
+
+    def add_file(self, path: str):
+        session = None
+        columns = self._columns
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut off by a crash mid-write
+                kind = record.get("e")
+                if kind == "session":
+                    session = self.sessions(f"{record.get('reviewer')}/{record.get('session')}")
+                    if session == len(self._session_reviewer):
+                        self._session_reviewer.append(self.reviewers(str(record.get("reviewer"))))
+                    continue
+                if session is None or kind not in _KIND_CODES:
+                    continue
+                label_codes = [self.labels(lbl) for lbl in record.get("labels", ())]
+                files = record.get("files") or [record.get("file", "")]
+                dwell = record.get("dwell", np.nan) / len(files)
+                for fname in files:
+                    for code in label_codes:
+                        self._label_entries["row"].append(len(columns["session"]))
+                        self._label_entries["label"].append(code)
+                    columns["session"].append(session)
+                    columns["kind"].append(_KIND_CODES[kind])
+                    columns["t"].append(record["t"])
+                    columns["file"].append(self.files(fname))
+                    columns["dwell"].append(dwell)
+        self._arrays = None
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """ events as NumPy columns, sorted by session and then time """
+        if self._arrays is None:
+            columns = self._columns
+            arrays = {
+                "session": np.asarray(columns["session"], dtype=np.int32),
+                "kind": np.asarray(columns["kind"], dtype=np.uint8),
+                "t": np.asarray(columns["t"], dtype=np.float64),
+                "file": np.asarray(columns["file"], dtype=np.int64),
+                "dwell": np.asarray(columns["dwell"], dtype=np.float64),
+                "labels": np.zeros((len(columns["session"]), len(self.labels.values)), dtype=bool),
+            }
+            arrays["labels"][np.asarray(self._label_entries["row"], dtype=np.int64), np.asarray(self._label_entries["label"], dtype=np.int64)] = True
+            order = np.lexsort((arrays["t"], arrays["session"]))
+            arrays = {key: values[order] for key, values in arrays.items()}
+            arrays["reviewer"] = np.asarray(self._session_reviewer, dtype=np.int32)[arrays["session"]] if len(order) else np.zeros(0, dtype=np.int32)
+            self._arrays = arrays
+        return self._arrays
+
+    ############################################# aggregation #############################################
+
+    def get_session_hours(self) -> Dict[str, np.ndarray]:
+        """ active and wall-clock hours of every session, indexed by session code """
+        a, num_sessions = self.arrays, len(self.sessions.values)
+        same_session = a["session"][1:] == a["session"][:-1]
+        gaps = np.diff(a["t"])[same_session]
+        active = np.bincount(a["session"][1:][same_session], weights=np.minimum(gaps, self.idle_seconds), minlength=num_sessions)
+        wall = np.bincount(a["session"][1:][same_session], weights=gaps, minlength=num_sessions)
+        return {"active": active / 3600.0, "wall": wall / 3600.0}
+
+    def get_reviewer_table(self) -> List[Dict[str, Any]]:
+        """ one row per reviewer: sessions, labeled images, undo rate, hours, images per active hour and dwell percentiles """
+        a = self.arrays
+        hours = self.get_session_hours()
+        session_reviewer = np.asarray(self._session_reviewer, dtype=np.int32)
+        num_reviewers = len(self.reviewers.values)
+        is_label, is_undo = a["kind"] == _KIND_CODES["label"], a["kind"] == _KIND_CODES["undo"]
+        num_labeled = np.bincount(a["reviewer"][is_label], minlength=num_reviewers)
+        num_undos = np.bincount(a["reviewer"][is_undo], minlength=num_reviewers)
+        active = np.bincount(session_reviewer, weights=hours["active"], minlength=num_reviewers)
+        wall = np.bincount(session_reviewer, weights=hours["wall"], minlength=num_reviewers)
+        rows = []
+        for code, reviewer in enumerate(self.reviewers.values):
+            dwell = a["dwell"][is_label & (a["reviewer"] == code)]
+            rows.append({
+                "reviewer": reviewer,
+                "sessions": int(np.count_nonzero(session_reviewer == code)),
+                "labeled": int(num_labeled[code]),
+                "undos": int(num_undos[code]),
+                "undo_rate": float(num_undos[code] / num_labeled[code]) if num_labeled[code] else 0.0,
+                "active_hours": float(active[code]),
+                "wall_hours": float(wall[code]),
+                "images_per_hour": float(num_labeled[code] / active[code]) if active[code] > 0 else 0.0,
+                **self._get_dwell_stats(dwell),
+            })
+        return rows
+
+    def get_label_table(self, by_reviewer: bool = False) -> List[Dict[str, Any]]:
+        """ one row per label (or per reviewer and label): how often it was given and how long those images took """
+        a = self.arrays
+        is_label = a["kind"] == _KIND_CODES["label"]
+        groups = [(None, is_label)] if not by_reviewer else [(r, is_label & (a["reviewer"] == code)) for code, r in enumerate(self.reviewers.values)]
+        rows = []
+        for reviewer, mask in groups:
+            total = int(np.count_nonzero(mask))
+            for code, label in enumerate(self.labels.values):
+                has_label = mask & a["labels"][:, code]
+                count = int(np.count_nonzero(has_label))
+                row = {"reviewer": reviewer} if by_reviewer else {}
+                row.update({"label": label, "count": count, "share": count / total if total else 0.0, **self._get_dwell_stats(a["dwell"][has_label])})
+                rows.append(row)
+        return rows
+
+    def get_slow_images(self, num: int = 10) -> List[Dict[str, Any]]:
+        """ the labeled images with the longest dwell times """
+        a = self.arrays
+        # events without a dwell time (NaN) would otherwise sort first
+        idx = np.flatnonzero((a["kind"] == _KIND_CODES["label"]) & ~np.isnan(a["dwell"]))
+        idx = idx[np.argsort(a["dwell"][idx])[::-1][:num]]
+        return [
+            {"reviewer": self.reviewers.values[a["reviewer"][i]], "file": self.files.values[a["file"][i]], "dwell": float(a["dwell"][i])}
+            for i in idx
+        ]
+
+    @staticmethod
+    def _get_dwell_stats(dwell: np.ndarray) -> Dict[str, float]:
+        dwell = dwell[~np.isnan(dwell)]
+        if len(dwell) == 0:
+            return {"median_dwell": 0.0, "p90_dwell": 0.0, "mean_dwell": 0.0}
+        median, p90 = np.percentile(dwell, [50, 90])
+        return {"median_dwell": float(median), "p90_dwell": float(p90), "mean_dwell": float(dwell.mean())}
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    """ plain-text table with one column per key of the rows """
+    if not rows:
+        return "(no events)"
+    def fmt(value) -> str:
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+    columns = list(rows[0].keys())
+    cells = [[fmt(row[c]) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines.extend("  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in cells)
+    return "\n".join(lines)
+
+def write_csv(rows: List[Dict[str, Any]], path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv: Optional[List[str]] = None):
+    """ command line entry point: throughput tables from session event logs """
+    parser = argparse.ArgumentParser(description="Reviewer throughput tables from session event logs.")
+    parser.add_argument("logs", nargs="+", help="*.ndjson session logs, or directories holding them")
+    parser.add_argument("--idle", type=float, default=120.0, help="gaps between events longer than this many seconds count as idle")
+    parser.add_argument("--slow", type=int, default=10, help="number of slowest images to list")
+    parser.add_argument("--csv", default=None, help="also write the tables as <prefix>_reviewers.csv, <prefix>_labels.csv and <prefix>_slow.csv")
+    args = parser.parse_args(argv)
+    for path in args.logs:
+        if not os.path.exists(path):
+            sys.exit(f"{path} not found")
+    log = ThroughputLog.from_paths(args.logs, args.idle)
+    tables = {
+        "reviewers": log.get_reviewer_table(),
+        "labels": log.get_label_table(by_reviewer=True),
+        "slow": log.get_slow_images(args.slow),
+    }
+    for name, rows in tables.items():
+        print(f"\n== {name} ==\n{format_table(rows)}")
+        if args.csv:
+            write_csv(rows, f"{args.csv}_{name}.csv")
+
+
+if __name__ == "__main__":
+    main()
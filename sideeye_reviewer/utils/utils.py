@@ -2,12 +2,13 @@ import os
 import sys
 import json
 from collections import Counter
-from typing import Dict, List, Union, Tuple
-from matplotlib import get_backend
-import matplotlib.pyplot as plt
+from typing import Dict, List, Union, Tuple, AbstractSet, Iterable
 
 
 def maximize_window():
+    # pyplot is only needed here, so the file helpers below can be used without importing it
+    import matplotlib.pyplot as plt
+    from matplotlib import get_backend
     manager = plt.get_current_fig_manager()
     backend = get_backend()
     if backend in ['TkAgg', 'tkagg']:
@@ -66,10 +67,12 @@ def check_file_path(out_file_path: str, extension: str):
     if output_ext != extension:
         raise ValueError(f"out_file_path must include the file's name including '{extension}'")
 
-def check_if_double_sorted(files_reviewed, file_list):
-    if any(map(lambda x: x in files_reviewed, file_list)):
+def check_if_double_sorted(files_reviewed: AbstractSet[str], file_list: Iterable[str]):
+    # one hash lookup per file rather than a scan of every file reviewed so far
+    double_sorted = {file for file in file_list if file in files_reviewed}
+    if double_sorted:
         print("ERROR: duplicate file names found between multiple txt files:")
-        print(set(file_list).intersection(files_reviewed))
+        print(double_sorted)
         raise Exception("files double sorted")
 
 def remove_duplicate_files_txt(duplicates: Dict[str, List[str]], out_dir: str):
@@ -79,9 +82,15 @@ def remove_duplicate_files_txt(duplicates: Dict[str, List[str]], out_dir: str):
         check_file_path(out_file_path, extension='.txt')
         with open(os.path.join(out_dir, f'{name}_labels.txt'), 'r') as fptr:
             file_list = fptr.readlines()
-        for duplicate in duplicates[name]:
-            if duplicate in file_list:
-                file_list.remove(duplicate)  # remove only the first occurrence of duplicate
+        # drop the first occurrences of each duplicate in a single pass instead of a list.remove (linear scan) per duplicate
+        to_remove = Counter(duplicates[name])
+        kept = []
+        for file in file_list:
+            if to_remove[file] > 0:
+                to_remove[file] -= 1
+            else:
+                kept.append(file)
+        file_list = kept
         print(f'length of {name}_labels.txt after duplicate removal: {len(file_list)}')
         with open(os.path.join(out_dir, f'{name}_labels.txt'), 'w') as fptr:
             for file in file_list:
@@ -100,31 +109,32 @@ def remove_duplicate_files_json(out_file_path: str):
 # get a flat list of all sorted files while removing duplicates and finding double sorted files
 def get_all_reviewed_files_txt(out_dir: str, sorter_labels: List[str]) -> List[str]:
     duplicates = {}
-    # Put this in a loop because the method I was using wasn't getting them all - might be redundant
-    while len(filter(lambda x: len(x) != 0, duplicates.values())) != 0:
-        for name in sorter_labels:
-            out_file_path = os.path.join(out_dir, f'{name}_labels.txt')
-            check_file_path(out_file_path, extension='.txt')
-            with open(out_file_path, 'r') as fptr:
-                file_list = fptr.readlines()
-            check_if_double_sorted(files_reviewed, file_list)
-            duplicates[name] = get_all_duplicates(file_list)
-            files_reviewed = [*files_reviewed, *file_list]
+    # dict keys double as an insertion-ordered set, so membership checks are O(1) and the file order is kept
+    files_reviewed: Dict[str, None] = {}
+    for name in sorter_labels:
+        out_file_path = os.path.join(out_dir, f'{name}_labels.txt')
+        check_file_path(out_file_path, extension='.txt')
+        with open(out_file_path, 'r') as fptr:
+            file_list = fptr.readlines()
+        check_if_double_sorted(files_reviewed.keys(), file_list)
+        duplicates[name] = get_all_duplicates(file_list)
+        files_reviewed.update(dict.fromkeys(file_list))
+    # every duplicate is counted in one pass, so a single removal pass gets them all
+    if any(len(dup) != 0 for dup in duplicates.values()):
         remove_duplicate_files_txt(duplicates, out_dir)
-    return files_reviewed
+    return list(files_reviewed)
 
 # get a flat list of all sorted files while removing duplicates and finding double sorted files
 def get_all_reviewed_files_json(out_file_path: str) -> List[str]:
     check_file_path(out_file_path, extension='.json')
     remove_duplicate_files_json(out_file_path)
-    files_reviewed = []
+    files_reviewed: Dict[str, None] = {}
     with open(out_file_path, 'r') as fptr:
         out_dict = dict(json.load(fptr))
-    for key in out_dict.keys():
-        file_list = list(out_dict[key].values())
-        check_if_double_sorted(files_reviewed, file_list)
-        files_reviewed = [*files_reviewed, *file_list]
-    return files_reviewed
+    for file_list in out_dict.values():
+        check_if_double_sorted(files_reviewed.keys(), file_list)
+        files_reviewed.update(dict.fromkeys(file_list))
+    return list(files_reviewed)
 
 
 def aggregate_txt2json(input_file_dict: Dict[str, str], out_file_path: str):
@@ -5,6 +5,7 @@ from .reviewer_button import ReviewerButton
 from ..types import ControllerLike
 from ..utils.utils import maximize_window
 from ..layouts.layout_manager import FigureLayoutManager
+from .tiled_display import TiledImageDisplay
 
 
 """
@@ -20,11 +21,14 @@ from ..layouts.layout_manager import FigureLayoutManager
 
 class BaseReviewerView:
     """ contains the common UI building logic and references for reviewer objects """
-    def __init__(self, fig_title="Image Reviewer"):
+    def __init__(self, fig_title="Image Reviewer", use_tiles: bool = False):
         self.fig_title = fig_title
         self.fig = None
         self.layout = None  # FigureLayoutManager instance
         self.canvas_images = []
+        # tiled mode displays zoomable tile pyramids (for very large images) instead of whole image arrays
+        self.use_tiles = use_tiles
+        self.tiled_display: TiledImageDisplay = None  # created on the first call to display_tiled_image()
         self._stop_requested = False
         self.controller: ControllerLike = None  # set when we initialize the UI with setup_gui() called from the controller
         #! TEMP: setting to False unconditionally until it's integrated into the controller
@@ -35,15 +39,18 @@ class BaseReviewerView:
         self.subtitle: plt.Text = None  # used to store the subtitle text object for updating
         self.warning_text: plt.Text = None  # used to store the warning text object for updating without continually creating new text objects
         self.summary_text: plt.Text = None  # used to store the summary text object for updating without continually creating new text objects
+        self.preview_text: plt.Text = None  # indicator shown while a low resolution preview is displayed in place of the full image
+        self._poll_timer = None  # timer used by the controller to check on background work from the GUI thread
         # Buttons stored here - need to keep a reference to them for callback persistence regardless if they're ever used directly
         self.exit_button = None # formerly `self.stop_button`
         self.undo_button = None
+        self.redo_button = None
 
     def setup_gui(
         self,
         controller: ControllerLike,
         num_axes: int = 1,
-        num_buttons: int = 2,
+        num_buttons: int = 3,
         use_legend: bool = True,
         #! TEMP: setting to true unconditionally until it's integrated into the controller
         use_summary: bool = True,
@@ -69,7 +76,7 @@ class BaseReviewerView:
         # hook UI events for closing the figure to a cleanup function
         self.fig.canvas.mpl_connect("close_event", self._on_close)
 
-    def generate_layout(self, num_axes: int = 1, num_buttons: int = 2, labels: List[str] = None, use_legend: bool = True, use_summary: bool = False, use_checkboxes: bool = False):
+    def generate_layout(self, num_axes: int = 1, num_buttons: int = 3, labels: List[str] = None, use_legend: bool = True, use_summary: bool = False, use_checkboxes: bool = False):
         """ Generate the layout for the figure, subplots, etc. """
         assert num_axes > 0, "Number of image axes must be greater than 0"
         self.layout = FigureLayoutManager(
@@ -86,12 +93,13 @@ class BaseReviewerView:
     # TODO: feel like this should be added to the layout manager instead of here - could just pass the controller callbacks in a list
         # It does call into question the use of a new AxesManager like I wrote about here and there
     def _create_base_buttons(self):
-        """ Creates EXIT and UNDO buttons in the bottom region of the figure. Subclasses add more buttons in separate functions """
+        """ Creates EXIT, REDO and UNDO buttons in the bottom region of the figure. Subclasses add more buttons in separate functions """
         #? NOTE: these are returned in reverse order so that the rightmost button is at index 0
         btn_axes = self.layout.get_button_axes()
         exit_ax = btn_axes[0].axes # formerly `stop_ax`
-        undo_ax = btn_axes[1].axes
-        self.buttons_assigned[:2] = [True, True]  # mark the last two button positions (since they're added right to left) as assigned
+        redo_ax = btn_axes[1].axes
+        undo_ax = btn_axes[2].axes
+        self.buttons_assigned[:3] = [True, True, True]  # mark the last three button positions (since they're added right to left) as assigned
         # Positions: [left, bottom, width, height]
         self.undo_button = ReviewerButton.factory(
             undo_ax,
@@ -99,6 +107,12 @@ class BaseReviewerView:
             ax_pos = undo_ax.get_position().bounds,
             callback = self.controller.on_undo_clicked
         )
+        self.redo_button = ReviewerButton.factory(
+            redo_ax,
+            label = "REDO",
+            ax_pos = redo_ax.get_position().bounds,
+            callback = self.controller.on_redo_clicked
+        )
         self.exit_button = ReviewerButton.factory( # formerly `self.stop_button`
             exit_ax,
             label = "EXIT", # formerly labeled "STOP"
@@ -132,6 +146,7 @@ class BaseReviewerView:
         ax = self.layout.get_image_subaxes(ax_idx).axes
         if len(self.canvas_images) > ax_idx:
             self.canvas_images[ax_idx].set_data(image)
+            self.canvas_images[ax_idx].set_visible(True)
         else:
             # if the viewer is only displaying one image, don't set the aspect ratio to "auto" since it will be stretched
             aspect_ratio = "auto" if self.images_per_fig > 1 else None
@@ -139,6 +154,20 @@ class BaseReviewerView:
             self.canvas_images.append(img_obj)
         self.fig.canvas.draw_idle()  # Update without forcing new figures
 
+    def clear_image(self, ax_idx=0):
+        """ hide the image on the axes at ax_idx (e.g. while its preview is still being generated) until the next display_image """
+        if len(self.canvas_images) > ax_idx:
+            self.canvas_images[ax_idx].set_visible(False)
+            self.fig.canvas.draw_idle()
+
+    def display_tiled_image(self, pyramid, ax_idx=0):
+        """ show a TilePyramid on the image axes at ax_idx, fetching only the tiles visible at the current zoom and pan """
+        ax = self.layout.get_image_subaxes(ax_idx).axes
+        if self.tiled_display is None:
+            aspect_ratio = "auto" if self.images_per_fig > 1 else None
+            self.tiled_display = TiledImageDisplay(self.fig, aspect=aspect_ratio)
+        self.tiled_display.show(ax, pyramid, ax_idx)
+
     def update_title(self, text, subtitle = None):
         if self.warning_text is not None:
             self.warning_text.set_visible(False)
@@ -190,6 +219,24 @@ class BaseReviewerView:
         timer.add_callback(remove_text)
         timer.start()
 
+    def set_preview_indicator(self, active: bool):
+        """ show or hide the indicator telling the reviewer that they're looking at a low resolution preview """
+        if self.preview_text is None:
+            if not active:
+                return
+            self.preview_text = self.fig.text(0.99, 0.99, "PREVIEW - loading full resolution...", ha="right", va="top",
+                                              fontsize=12, color="white", backgroundcolor="#d35400")
+        self.preview_text.set_visible(active)
+        self.fig.canvas.draw_idle()
+
+    def start_polling(self, callback, interval: int = 15):
+        """ repeatedly call `callback` on the GUI thread every `interval` milliseconds until it returns False """
+        if self._poll_timer is not None and self._poll_timer.callbacks:
+            return  # already polling - the controller's callback checks the latest state on each tick
+        self._poll_timer = self.fig.canvas.new_timer(interval=interval)
+        self._poll_timer.add_callback(callback)
+        self._poll_timer.start()
+
     def main_loop(self):
         """ Main loop: keep going until EXIT is triggered. The controller can call this,
             but the loop logic itself is the same: keep calling plt.pause() until stopped.
@@ -0,0 +1,66 @@
+from typing import List, Dict
+from matplotlib.patches import Rectangle
+# local imports
+from ..types import ControllerLike
+from ..utils.montage import get_cell_index
+from .unilabel_reviewer import SingleLabelReviewerView
+
+
+class BatchLabelReviewerView(SingleLabelReviewerView):
+    """ single-label view for labeling a whole page of thumbnails at once
+        - the page is shown as one grid image; clicking a thumbnail toggles whether it's deselected (an outlier)
+        - clicking a label button assigns that label to every thumbnail that is still selected
+    """
+    def __init__(self, fig_title="Batch Label Reviewer", legend_dict=None):
+        super().__init__(fig_title, legend_dict)
+        self._grid_shape = None  # (nrows, ncols, cell_size, pad) of the page currently displayed
+        self._num_cells = 0
+        self._deselect_marks: Dict[int, Rectangle] = {}
+
+    def setup_gui(
+        self,
+        controller: ControllerLike,
+        labels: List[str],
+        num_axes: int = 1,
+        use_summary: bool = True,
+    ):
+        # the whole page is a single grid image, regardless of the number of image folders
+        super().setup_gui(controller, labels, num_axes=1, use_summary=use_summary)
+        # one image per figure, so the page keeps its aspect ratio instead of being stretched like side by side folders would be
+        self.images_per_fig = 1
+        self.fig.canvas.mpl_connect("button_press_event", self._on_image_clicked)
+
+    def show_page(self, grid_image, num_cells: int, nrows: int, ncols: int, cell_size: int, pad: int):
+        """ display a composed page of thumbnails with every thumbnail selected """
+        self._grid_shape = (nrows, ncols, cell_size, pad)
+        self._num_cells = num_cells
+        for mark in self._deselect_marks.values():
+            mark.remove()
+        self._deselect_marks.clear()
+        self.display_image(grid_image, ax_idx=0)
+
+    def set_cell_deselected(self, cell_idx: int, deselected: bool):
+        """ dim and outline a deselected thumbnail, or remove the marking when it's selected again """
+        if not deselected:
+            mark = self._deselect_marks.pop(cell_idx, None)
+            if mark is not None:
+                mark.remove()
+        elif cell_idx not in self._deselect_marks:
+            nrows, ncols, cell_size, pad = self._grid_shape
+            row, col = divmod(cell_idx, ncols)
+            # image coordinates are pixel centers, hence the half pixel offset
+            xy = (pad + col * (cell_size + pad) - 0.5, pad + row * (cell_size + pad) - 0.5)
+            mark = Rectangle(xy, cell_size, cell_size, facecolor="black", alpha=0.6, edgecolor="red", linewidth=3)
+            self.layout.get_image_subaxes(0).axes.add_patch(mark)
+            self._deselect_marks[cell_idx] = mark
+        self.fig.canvas.draw_idle()
+
+    def _on_image_clicked(self, event):
+        """ forward clicks on a thumbnail to the controller as the index of the clicked cell """
+        if self._grid_shape is None or event.button != 1 or event.xdata is None:
+            return
+        if event.inaxes is not self.layout.get_image_subaxes(0).axes:
+            return
+        cell_idx = get_cell_index(event.xdata, event.ydata, *self._grid_shape)
+        if 0 <= cell_idx < self._num_cells:
+            self.controller.on_thumbnail_clicked(cell_idx)
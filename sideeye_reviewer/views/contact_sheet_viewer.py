@@ -0,0 +1,104 @@
+from typing import List
+# local imports
+from .base_viewer import BaseReviewerView
+from .reviewer_button import ReviewerButton
+from ..types import ControllerLike
+from ..utils.montage import get_cell_index
+
+
+class ContactSheetViewerView(BaseReviewerView):
+    """ Read-only viewer showing a page of thumbnails as a single grid image, with click-to-open into the full view
+        - in grid mode, the first image axes is stretched over the whole main panel and the others are hidden
+        - clicking a thumbnail switches to the full view (all image axes, like the slideshow) and GRID switches back
+    """
+    def __init__(self, fig_title="Contact Sheet Viewer", legend_dict = None):
+        super().__init__(fig_title)
+        self.legend_dict = legend_dict
+        self.buttons = {}  # dictionary to hold button references
+        self.grid_mode = False
+        self._grid_shape = None  # (nrows, ncols, cell_size, pad) of the grid currently displayed
+        self._full_positions: List = []  # original positions of the image axes, restored when leaving grid mode
+
+    def setup_gui(self, controller: ControllerLike, num_axes=1):
+        """ initialize layout and GUI components with read-only behavior and no checkbox/labeling """
+        self.controller = controller
+        super().setup_gui(
+            controller,
+            num_axes = num_axes,
+            num_buttons = 4,  # PREV, NEXT, GRID, EXIT
+            use_legend = self.legend_dict is not None,
+            use_summary = False,
+            use_checkboxes = False
+        )
+        self._create_contact_sheet_buttons()
+        self.fig.tight_layout()
+        # record the full view positions only after tight_layout has settled them
+        self._full_positions = [ax_data.axes.get_position() for ax_data in self.layout.get_image_axes()]
+        self.fig.canvas.mpl_connect("button_press_event", self._on_image_clicked)
+
+    def _create_contact_sheet_buttons(self):
+        """ instantiate buttons for PREV, NEXT, GRID, EXIT """
+        btn_axes_data = self.layout.get_button_axes()
+        label_callbacks = [
+            ("PREV", self.controller.on_prev_clicked),
+            ("NEXT", self.controller.on_next_clicked),
+            ("GRID", self.controller.on_grid_clicked),
+            ("EXIT", self.controller.on_exit_clicked),
+        ]
+        for i, (label, cb) in enumerate(label_callbacks):
+            btn_ax = btn_axes_data[-(i+1)].axes
+            self.buttons[label.lower()] = ReviewerButton.factory(
+                btn_ax,
+                label=label,
+                ax_pos=btn_ax.get_position().bounds,
+                callback=cb
+            )
+            self.buttons_assigned[-(i+1)] = True
+
+    def display_image(self, image, ax_idx=0):
+        """ same as the base class, but the extent follows each new image since grid pages and full images differ in shape """
+        ax = self.layout.get_image_subaxes(ax_idx).axes
+        height, width = image.shape[:2]
+        if len(self.canvas_images) > ax_idx:
+            img_obj = self.canvas_images[ax_idx]
+            img_obj.set_data(image)
+            img_obj.set_visible(True)
+            img_obj.set_extent((-0.5, width - 0.5, height - 0.5, -0.5))
+            ax.set_xlim(-0.5, width - 0.5)
+            ax.set_ylim(height - 0.5, -0.5)
+        else:
+            aspect_ratio = "auto" if self.images_per_fig > 1 else None
+            self.canvas_images.append(ax.imshow(image, aspect=aspect_ratio))
+        self.fig.canvas.draw_idle()
+
+    def show_grid(self, grid_image, nrows: int, ncols: int, cell_size: int, pad: int):
+        """ display a composed page of thumbnails over the whole main panel """
+        self._grid_shape = (nrows, ncols, cell_size, pad)
+        image_axes = [ax_data.axes for ax_data in self.layout.get_image_axes()]
+        if not self.grid_mode:
+            self.grid_mode = True
+            image_axes[0].set_position([0.01, 0.01, 0.98, 0.98])
+            image_axes[0].set_aspect("equal", adjustable="box")
+            for ax in image_axes[1:]:
+                ax.set_visible(False)
+        self.display_image(grid_image, ax_idx=0)
+
+    def show_full(self):
+        """ restore the regular image axes for the full view """
+        if not self.grid_mode:
+            return
+        self.grid_mode = False
+        self.layout.get_image_subaxes(0).axes.set_aspect("auto" if self.images_per_fig > 1 else "equal", adjustable="box")
+        for ax_data, pos in zip(self.layout.get_image_axes(), self._full_positions):
+            ax_data.axes.set_position(pos)
+            ax_data.axes.set_visible(True)
+
+    def _on_image_clicked(self, event):
+        """ forward clicks on a thumbnail in grid mode to the controller as the index of the clicked cell """
+        if not self.grid_mode or event.button != 1 or event.xdata is None:
+            return
+        if event.inaxes is not self.layout.get_image_subaxes(0).axes:
+            return
+        cell_idx = get_cell_index(event.xdata, event.ydata, *self._grid_shape)
+        if cell_idx >= 0:
+            self.controller.on_thumbnail_clicked(cell_idx)
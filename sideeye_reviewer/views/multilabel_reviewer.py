@@ -8,8 +8,8 @@ from .reviewer_button import ReviewerButton
 
 
 class MultiLabelReviewerView(BaseReviewerView):
-    def __init__(self, fig_title="Multi-Label Reviewer", legend_dict=None):
-        super().__init__(fig_title)
+    def __init__(self, fig_title="Multi-Label Reviewer", legend_dict=None, use_tiles=False):
+        super().__init__(fig_title, use_tiles)
         self.legend_dict = legend_dict
         self.next_button = None
         self.checkboxes = None
@@ -25,9 +25,9 @@ class MultiLabelReviewerView(BaseReviewerView):
     ):
         self.use_summary = use_summary
         use_legend = bool(self.legend_dict)
-        n_btn = 3  # 3 for the base buttons (EXIT, UNDO) and NEXT for "NEXT" for this subclass
+        n_btn = 4  # 3 for the base buttons (EXIT, REDO, UNDO) and 1 for "NEXT" for this subclass
         super().setup_gui(controller, num_axes, num_buttons = n_btn, use_legend=use_legend, use_summary = use_summary, use_checkboxes = True)
-        # create base buttons (EXIT, UNDO) in the new structure, setting their callbacks later
+        # create base buttons (EXIT, REDO, UNDO) in the new structure, setting their callbacks later
         self._create_base_buttons()
         # unfortunately, it seems that subfigure objects don't support setting the layout engine and using fig.set_layout() doesn't work correctly
         self.fig.tight_layout()
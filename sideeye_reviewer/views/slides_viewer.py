@@ -1,6 +1,5 @@
 from typing import Optional, Dict
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 # local imports
 from .base_viewer import BaseReviewerView
 from .reviewer_button import ReviewerButton
@@ -9,11 +8,14 @@ from ..types import ControllerLike
 
 class SlideshowViewerView(BaseReviewerView):
     """ Viewer for simple slideshow playback with navigation and animation, built on new BaseReviewerView layout """
-    def __init__(self, fig_title="Slideshow Viewer", legend_dict = None, slide_duration=2.5):
-        super().__init__(fig_title)
+    def __init__(self, fig_title="Slideshow Viewer", legend_dict = None, slide_duration=2.5, use_tiles=False):
+        """
+            :param slide_duration: seconds per slide during auto-play - sub-second values play frame sequences like a video
+        """
+        super().__init__(fig_title, use_tiles)
         self.legend_dict = legend_dict  # optional legend dictionary for future use
         self.slide_duration = slide_duration
-        self.animator = None
+        self._play_timer = None  # canvas timer that only exists while auto-play is running
         self.playing_animation = False
         self.buttons = {}  # dictionary to hold button references
 
@@ -29,7 +31,6 @@ class SlideshowViewerView(BaseReviewerView):
             use_checkboxes = False
         )
         self._create_slideshow_buttons()
-        self._init_animator()
         self.fig.tight_layout()
 
     def _create_slideshow_buttons(self):
@@ -55,27 +56,26 @@ class SlideshowViewerView(BaseReviewerView):
             )
             self.buttons_assigned[-(i+1)] = True
 
-    def _init_animator(self):
-        self.animator = FuncAnimation(
-            self.fig,
-            self._update_frame,
-            interval=self.slide_duration * 1000,
-            repeat=True,
-            cache_frame_data=False
-        )
-        # manually start/stop it by toggling self.playing_animation
-        self.playing_animation = False
-
-    def _update_frame(self, frame):
-        # updates the frame if currently playing the slideshow
-        if self.playing_animation:
-            self.controller.on_next_clicked()
+    def _update_frame(self) -> bool:
+        """ timer callback - returning False removes it from the timer once the controller stops playback """
+        if not self.playing_animation:
+            return False
+        return self.controller.on_playback_tick()
 
     def start_animation(self):
+        """ start a canvas timer ticking every slide_duration seconds - unlike an always-running animation, nothing fires while stopped """
+        if self._play_timer is not None:
+            self._play_timer.stop()
         self.playing_animation = True
+        self._play_timer = self.fig.canvas.new_timer(interval=max(1, int(round(self.slide_duration * 1000))))
+        self._play_timer.add_callback(self._update_frame)
+        self._play_timer.start()
 
     def stop_animation(self):
         self.playing_animation = False
+        if self._play_timer is not None:
+            self._play_timer.stop()
+            self._play_timer = None
 
     def request_stop(self):
         self._stop_requested = True
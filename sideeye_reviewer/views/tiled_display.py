@@ -0,0 +1,140 @@
+from typing import Dict, Optional, Tuple
+import matplotlib.pyplot as plt
+from matplotlib.image import AxesImage
+# local imports
+from ..models.tile_pyramid import TilePyramid
+
+
+class TiledImageDisplay:
+    """ Zoomable, pannable display of tile pyramids in the image axes of a reviewer figure
+        - only the tiles visible at the current zoom and pan are fetched, so memory scales with the screen size rather than the image size
+        - the scroll wheel zooms around the cursor and left-click dragging pans the view
+        - all tiled axes are kept in sync (in coordinates relative to each image's size), e.g. for an image and its mask
+    """
+    ZOOM_STEP = 1.25
+    MIN_VIEW_PIXELS = 16  # don't zoom in further than this many full-res pixels across the view
+
+    def __init__(self, fig: plt.Figure, aspect: Optional[str] = None):
+        self.fig = fig
+        self.aspect = aspect
+        self.axes: Dict[int, plt.Axes] = {}
+        self.canvas_images: Dict[int, AxesImage] = {}
+        self.pyramids: Dict[int, TilePyramid] = {}
+        self._syncing = False
+        self._pan_start: Optional[Tuple[plt.Axes, float, float, Tuple[float, float], Tuple[float, float]]] = None
+        self.fig.canvas.mpl_connect("scroll_event", self._on_scroll)
+        self.fig.canvas.mpl_connect("button_press_event", self._on_press)
+        self.fig.canvas.mpl_connect("motion_notify_event", self._on_motion)
+        self.fig.canvas.mpl_connect("button_release_event", self._on_release)
+
+    def show(self, ax: plt.Axes, pyramid: TilePyramid, ax_idx: int = 0):
+        """ display a new pyramid in the given axes, resetting the view to the whole image """
+        self.pyramids[ax_idx] = pyramid
+        overview = pyramid.get_overview()
+        extent = (0, pyramid.width, pyramid.height, 0)
+        if ax_idx not in self.canvas_images:
+            self.axes[ax_idx] = ax
+            self.canvas_images[ax_idx] = ax.imshow(overview, aspect=self.aspect, extent=extent)
+            # limits are driven by the zoom/pan handlers from now on, not by the extent of whichever tiles are on screen
+            ax.set_autoscale_on(False)
+            ax.callbacks.connect("xlim_changed", lambda changed_ax: self._on_limits_changed(ax_idx))
+            ax.callbacks.connect("ylim_changed", lambda changed_ax: self._on_limits_changed(ax_idx))
+        img_obj = self.canvas_images[ax_idx]
+        img_obj.set_data(overview)
+        # fix the color limits from the overview so single-channel images (masks) don't get renormalized per tile
+        if overview.ndim == 2:
+            img_obj.set_clim(overview.min(), overview.max())
+        self._syncing = True
+        try:
+            ax.set_xlim(0, pyramid.width)
+            ax.set_ylim(pyramid.height, 0)
+        finally:
+            self._syncing = False
+        self.refresh(ax_idx)
+
+    def refresh(self, ax_idx: int):
+        """ fetch and draw the tiles visible in the axes at the level matching its current zoom """
+        ax, pyramid = self.axes[ax_idx], self.pyramids.get(ax_idx)
+        if pyramid is None:
+            return
+        (x0, x1), (y1, y0) = ax.get_xlim(), ax.get_ylim()
+        x0, x1 = max(0.0, min(x0, x1)), min(float(pyramid.width), max(x0, x1))
+        y0, y1 = max(0.0, min(y0, y1)), min(float(pyramid.height), max(y0, y1))
+        if x1 <= x0 or y1 <= y0:
+            return
+        level = pyramid.choose_level(x1 - x0, y1 - y0, ax.bbox.width, ax.bbox.height)
+        region, extent = pyramid.get_region(level, x0, y0, x1, y1)
+        img_obj = self.canvas_images[ax_idx]
+        img_obj.set_data(region)
+        img_obj.set_extent(extent)
+        self.fig.canvas.draw_idle()
+
+    def _on_limits_changed(self, ax_idx: int):
+        if self._syncing:
+            self.refresh(ax_idx)
+            return
+        self._syncing = True
+        try:
+            self._sync_from(ax_idx)
+        finally:
+            self._syncing = False
+        self.refresh(ax_idx)
+
+    def _sync_from(self, src_idx: int):
+        """ apply the source axes' view (relative to its image size) to every other tiled axes """
+        src_ax, src_pyr = self.axes[src_idx], self.pyramids[src_idx]
+        (x0, x1), (y0, y1) = src_ax.get_xlim(), src_ax.get_ylim()
+        for idx, ax in self.axes.items():
+            pyr = self.pyramids.get(idx)
+            if idx == src_idx or pyr is None:
+                continue
+            sx, sy = pyr.width / src_pyr.width, pyr.height / src_pyr.height
+            ax.set_xlim(x0 * sx, x1 * sx)
+            ax.set_ylim(y0 * sy, y1 * sy)
+
+    def _get_ax_idx(self, ax: Optional[plt.Axes]) -> Optional[int]:
+        for idx, tiled_ax in self.axes.items():
+            if tiled_ax is ax:
+                return idx
+        return None
+
+    ####################################### zoom & pan handlers #######################################
+
+    def _on_scroll(self, event):
+        ax_idx = self._get_ax_idx(event.inaxes)
+        if ax_idx is None or event.xdata is None:
+            return
+        ax, pyramid = self.axes[ax_idx], self.pyramids[ax_idx]
+        scale = 1.0 / self.ZOOM_STEP if event.button == "up" else self.ZOOM_STEP
+        (x0, x1), (y1, y0) = ax.get_xlim(), ax.get_ylim()
+        new_w = min(max((x1 - x0) * scale, self.MIN_VIEW_PIXELS), pyramid.width)
+        new_h = min(max((y1 - y0) * scale, self.MIN_VIEW_PIXELS), pyramid.height)
+        # keep the point under the cursor fixed while zooming
+        fx, fy = (event.xdata - x0) / (x1 - x0), (event.ydata - y0) / (y1 - y0)
+        new_x0 = min(max(event.xdata - fx * new_w, 0.0), pyramid.width - new_w)
+        new_y0 = min(max(event.ydata - fy * new_h, 0.0), pyramid.height - new_h)
+        ax.set_ylim(new_y0 + new_h, new_y0)
+        ax.set_xlim(new_x0, new_x0 + new_w)
+
+    def _on_press(self, event):
+        ax_idx = self._get_ax_idx(event.inaxes)
+        if ax_idx is None or event.button != 1:
+            return
+        ax = self.axes[ax_idx]
+        self._pan_start = (ax, event.x, event.y, ax.get_xlim(), ax.get_ylim())
+
+    def _on_motion(self, event):
+        if self._pan_start is None:
+            return
+        ax, px, py, (x0, x1), (y0, y1) = self._pan_start
+        pyramid = self.pyramids[self._get_ax_idx(ax)]
+        # convert the mouse movement in screen pixels to full-res image pixels
+        dx = (event.x - px) * (x1 - x0) / ax.bbox.width
+        dy = (event.y - py) * (y1 - y0) / ax.bbox.height
+        dx = min(max(dx, x1 - pyramid.width), x0)
+        dy = min(max(dy, y0 - pyramid.height), y1)
+        ax.set_ylim(y0 - dy, y1 - dy)
+        ax.set_xlim(x0 - dx, x1 - dx)
+
+    def _on_release(self, event):
+        self._pan_start = None
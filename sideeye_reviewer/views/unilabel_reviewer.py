@@ -8,8 +8,8 @@ from .reviewer_button import ReviewerButton
 
 class SingleLabelReviewerView(BaseReviewerView):
     """ specialized view for single-label reviewing - one button per label which calls 'on_label_clicked()' in the controller """
-    def __init__(self, fig_title="Single-Label Reviewer", legend_dict=None):
-        super().__init__(fig_title)
+    def __init__(self, fig_title="Single-Label Reviewer", legend_dict=None, use_tiles=False):
+        super().__init__(fig_title, use_tiles)
         self.legend_dict = legend_dict
         self.label_buttons = []
         self.use_summary = False
@@ -24,10 +24,10 @@ class SingleLabelReviewerView(BaseReviewerView):
     ):
         self.use_summary = use_summary
         use_legend = bool(self.legend_dict)
-        n_btn = len(labels) + 2  # 2 for the base buttons (EXIT, UNDO) and the rest for labels
+        n_btn = len(labels) + 3  # 3 for the base buttons (EXIT, REDO, UNDO) and the rest for labels
         # call the base class's setup_gui() to create the figure, subplots, etc.
         super().setup_gui(controller, num_axes, num_buttons = n_btn, use_legend=use_legend, use_summary = use_summary)
-        # create base buttons (EXIT, UNDO) in the new structure, setting their callbacks later
+        # create base buttons (EXIT, REDO, UNDO) in the new structure, setting their callbacks later
         self._create_base_buttons()
         # unfortunately, it seems that subfigure objects don't support setting the layout engine and using fig.set_layout() doesn't work correctly
         self.fig.tight_layout()
@@ -46,7 +46,7 @@ class SingleLabelReviewerView(BaseReviewerView):
         button_axes_data = self.layout.get_button_axes()[::-1]
         button_axes: List[plt.Axes] = [ax_data.axes for ax_data in button_axes_data]
         num_btn = len(button_axes)
-        # drop buttons that have already been assigned (primarily the EXIT and UNDO Buttons set by the base class)
+        # drop buttons that have already been assigned (primarily the EXIT, REDO and UNDO Buttons set by the base class)
             #? NOTE: this will probably be changed in the future when I update the slideshow viewer to inherit from the same base class
         available_axes = []
         for i, ax in enumerate(button_axes):
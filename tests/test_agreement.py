@@ -0,0 +1,90 @@
+import os, sys
+import json
+import math
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from sideeye_reviewer.utils.agreement import LabelMatrix, fleiss_kappa, kappa_from_confusion
+
+
+# Fleiss (1971) worked example as reproduced on Wikipedia: 10 items, 14 raters, 5 categories, kappa = 0.210
+FLEISS_COUNTS = [
+    [0, 0, 0, 0, 14],
+    [0, 2, 6, 4, 2],
+    [0, 0, 3, 5, 6],
+    [0, 3, 9, 2, 0],
+    [2, 2, 8, 1, 1],
+    [7, 7, 0, 0, 0],
+    [3, 2, 6, 3, 0],
+    [2, 5, 3, 2, 2],
+    [6, 5, 2, 1, 0],
+    [0, 2, 2, 3, 7],
+]
+
+def _write_results(results):
+    root = tempfile.mkdtemp()
+    paths = []
+    for reviewer, bins in results.items():
+        path = os.path.join(root, f"{reviewer}.json")
+        with open(path, "w") as f:
+            json.dump(bins, f)
+        paths.append(path)
+    return paths
+
+def _cohen_example_results():
+    """ 50 files rated yes/no by two reviewers: 20 both yes, 5 only a, 10 only b, 15 both no - kappa = 0.4 """
+    files = [f"{i:02d}.png" for i in range(50)]
+    a = {"yes": files[:25], "no": files[25:]}
+    b = {"yes": files[:20] + files[25:35], "no": files[20:25] + files[35:]}
+    return {"a": a, "b": b}
+
+def test_fleiss_textbook_example():
+    assert round(fleiss_kappa(np.array(FLEISS_COUNTS)), 3) == 0.210
+    assert fleiss_kappa(np.array([[3, 0], [0, 3]])) == 1.0
+    assert math.isnan(fleiss_kappa(np.zeros((0, 2))))
+    try:
+        fleiss_kappa(np.array([[2, 0], [1, 0]]))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("rows with different numbers of raters should raise ValueError")
+
+def test_cohen_from_confusion():
+    assert round(kappa_from_confusion(np.array([[20, 5], [10, 15]])), 6) == 0.4
+    assert kappa_from_confusion(np.array([[5, 0], [0, 5]])) == 1.0
+    # agreement no better than chance
+    assert kappa_from_confusion(np.array([[25, 25], [25, 25]])) == 0.0
+    assert math.isnan(kappa_from_confusion(np.zeros((2, 2))))
+
+def test_label_matrix_kappas():
+    matrix = LabelMatrix.from_result_files(_write_results(_cohen_example_results()))
+    assert matrix.reviewers == ["a", "b"] and matrix.labels == ["no", "yes"] and len(matrix.files) == 50
+    assert round(matrix.cohens_kappa("a", "b"), 6) == 0.4
+    assert round(matrix.cohens_kappa(0, 1, label="yes"), 6) == 0.4
+    # Fleiss' kappa for two raters uses pooled marginals, so it's slightly below Cohen's kappa here
+    counts = np.array([[2, 0]] * 20 + [[1, 1]] * 15 + [[0, 2]] * 15)
+    assert matrix.fleiss_kappa() == fleiss_kappa(counts)
+    assert matrix.fleiss_kappa("yes") == fleiss_kappa(counts)
+
+def test_only_files_reviewed_by_both_are_compared():
+    results = _cohen_example_results()
+    # files only one reviewer saw (e.g. outside the shard overlap) don't count as unlabeled by the other
+    results["a"]["yes"] = results["a"]["yes"] + ["extra_1.png", "extra_2.png"]
+    results["b"]["no"] = results["b"]["no"] + ["extra_3.png"]
+    matrix = LabelMatrix.from_result_files(_write_results(results))
+    assert round(matrix.cohens_kappa("a", "b"), 6) == 0.4
+    assert round(matrix.cohens_kappa("a", "b", label="yes"), 6) == 0.4
+    confusion = matrix.get_label_confusion("a", "b")["yes"]
+    assert confusion.tolist() == [[15, 10], [5, 20]]
+
+def test_disagreement_file_list():
+    matrix = LabelMatrix.from_result_files(_write_results({
+        "a": {"glare": ["1.png", "2.png", "3.png"], "blur": ["1.png"]},
+        "b": {"glare": ["1.png", "2.png"], "blur": ["1.png", "3.png"]},
+        "c": {"glare": ["1.png", "3.png"], "blur": ["1.png"], "clean": ["2.png", "4.png"]},
+    }))
+    disagreement = dict(zip(matrix.files.tolist(), matrix.get_file_disagreement()))
+    assert disagreement["1.png"] == 0.0
+    assert math.isnan(disagreement["4.png"])
+    assert disagreement["2.png"] > 0 and disagreement["3.png"] > 0
+    assert matrix.get_disagreement_file_list() == sorted(["2.png", "3.png"], key=lambda f: -disagreement[f])
@@ -0,0 +1,115 @@
+import os, sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault("MPLBACKEND", "Agg")
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.data_manager import DataManager
+from sideeye_reviewer.controllers.batch_controller import BatchReviewerController
+from sideeye_reviewer.views.base_viewer import BaseReviewerView
+from sideeye_reviewer.views.batch_reviewer import BatchLabelReviewerView
+
+
+LABELS = ["clean", "soiled"]
+
+class StubPageView:
+    """ stands in for BatchLabelReviewerView, recording the pages and warnings shown """
+    fig_title = "test"
+    legend_dict = None
+
+    def __init__(self):
+        self.pages = []
+        self.warnings = []
+
+    def setup_gui(self, *args, **kwargs):
+        pass
+
+    def show_page(self, grid_image, num_cells, *args):
+        self.pages.append(num_cells)
+
+    def set_cell_deselected(self, cell_idx, deselected):
+        pass
+
+    def update_title(self, *args):
+        pass
+
+    def update_summary(self, *args):
+        pass
+
+    def display_warning(self, message):
+        self.warnings.append(message)
+
+    def main_loop(self):
+        pass
+
+def _make_dataset(num_files, num_folders=1, size=(40, 60)):
+    root = tempfile.mkdtemp()
+    folders = []
+    for k in range(num_folders):
+        folder = os.path.join(root, f"folder{k}")
+        os.makedirs(folder)
+        for i in range(num_files):
+            Image.fromarray(np.full((*size, 3), i * 10 % 256, dtype=np.uint8)).save(os.path.join(folder, f"{i:04d}.png"))
+        folders.append(folder)
+    return root, folders
+
+def _make_controller(num_files=12, history_size=4096):
+    root, folders = _make_dataset(num_files)
+    files = sorted(os.listdir(folders[0]))
+    data_manager = DataManager(folders, os.path.join(root, "out"), LABELS, file_list=files,
+                               thumbnail_cache_dir=os.path.join(root, "thumbs"), history_size=history_size)
+    controller = BatchReviewerController(data_manager, StubPageView(), nrows=2, ncols=2)
+    controller.initialize(checkpoint=False)
+    return controller, files
+
+def test_page_label_skips_deselected_files_and_defers_them():
+    controller, files = _make_controller()
+    sorter = controller.data_manager.sorter
+    controller.on_thumbnail_clicked(1)
+    controller.get_on_label_clicked_cb("clean")(None)
+    assert list(sorter.sorting_dict["clean"]) == [files[0], files[2], files[3]]
+    assert controller.deferred_files == [files[1]]
+    assert controller.current_idx == 4
+    # one undo reverts the whole page and brings the deferred file back onto it
+    controller.on_undo_clicked(None)
+    assert len(sorter.sorting_dict["clean"]) == 0
+    assert controller.current_idx == 0 and controller.deferred_files == []
+    controller.on_redo_clicked(None)
+    assert list(sorter.sorting_dict["clean"]) == [files[0], files[2], files[3]]
+    assert controller.deferred_files == [files[1]] and controller.current_idx == 4
+
+def test_deferred_files_are_served_after_the_file_list():
+    controller, files = _make_controller(num_files=8)
+    controller.on_thumbnail_clicked(0)
+    controller.get_on_label_clicked_cb("clean")(None)
+    controller.get_on_label_clicked_cb("soiled")(None)
+    assert controller.view.pages == [4, 4, 1]
+    assert controller._get_page_files() == [files[0]]
+
+def test_undo_stops_at_pages_evicted_from_the_history():
+    # the history holds 4 file records, i.e. exactly one full page
+    controller, files = _make_controller(history_size=4)
+    controller.on_thumbnail_clicked(3)
+    controller.get_on_label_clicked_cb("clean")(None)
+    controller.get_on_label_clicked_cb("soiled")(None)
+    assert len(controller._page_history) == 1
+    controller.on_undo_clicked(None)
+    assert controller.current_idx == 4
+    controller.on_undo_clicked(None)
+    # the first page can't be undone anymore - its labels and deferred file stay, and the position doesn't jump back
+    assert controller.view.warnings == ["Nothing to undo."]
+    assert controller.current_idx == 4
+    assert list(controller.data_manager.sorter.sorting_dict["clean"]) == files[:3]
+    assert controller.deferred_files == [files[3]]
+
+def test_page_is_not_stretched_with_several_folders():
+    root, folders = _make_dataset(4, num_folders=2)
+    data_manager = DataManager(folders, os.path.join(root, "out"), LABELS, thumbnail_cache_dir=os.path.join(root, "thumbs"))
+    view = BatchLabelReviewerView()
+    main_loop = BaseReviewerView.main_loop
+    BaseReviewerView.main_loop = lambda self: None
+    try:
+        BatchReviewerController(data_manager, view, nrows=1, ncols=4).initialize(checkpoint=False)
+    finally:
+        BaseReviewerView.main_loop = main_loop
+    assert view.canvas_images[0].axes.get_aspect() == 1.0
@@ -0,0 +1,82 @@
+import os, sys
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image, ImageDraw
+from sideeye_reviewer.utils.bin_montage import BinMontageExporter, export_bin_montages
+
+
+CELL, PAD = 32, 4
+
+def _make_images(num_files):
+    root = tempfile.mkdtemp()
+    image_dir = os.path.join(root, "images")
+    os.makedirs(image_dir)
+    for i in range(num_files):
+        Image.new("RGB", (64, 48), (200, 10 * i, 0)).save(os.path.join(image_dir, f"{i:04d}.png"))
+    return root, image_dir
+
+def _make_exporter(root, image_dir, **kwargs):
+    return BinMontageExporter(image_dir, os.path.join(root, "montages"), cell_size=CELL, ncols=3, nrows=2, pad=PAD,
+                              thumbnail_cache_dir=os.path.join(root, "thumbs"), max_workers=2, **kwargs)
+
+def _page_size(nrows, ncols):
+    width = ncols * (CELL + PAD) + PAD
+    height = BinMontageExporter.HEADER_HEIGHT + nrows * (CELL + PAD + BinMontageExporter.CAPTION_HEIGHT) + PAD
+    return width, height
+
+def test_pages_per_bin():
+    root, image_dir = _make_images(10)
+    files = sorted(os.listdir(image_dir))
+    bins = {"clean": files[:8], "soiled": files[8:], "empty": []}
+    outputs = _make_exporter(root, image_dir).export(bins)
+    assert [os.path.basename(p) for p in outputs["clean"]] == ["clean_001.png", "clean_002.png"]
+    assert [os.path.basename(p) for p in outputs["soiled"]] == ["soiled_001.png"]
+    assert outputs["empty"] == []
+    # every page of a multi-page bin has the full grid shape, while a single page shrinks to its files
+    for path in outputs["clean"]:
+        with Image.open(path) as page:
+            assert page.size == _page_size(2, 3)
+    with Image.open(outputs["soiled"][0]) as page:
+        assert page.size == _page_size(1, 2)
+
+def test_thumbnails_land_in_their_cells():
+    root, image_dir = _make_images(7)
+    files = sorted(os.listdir(image_dir))
+    path = _make_exporter(root, image_dir).export({"clean": files})["clean"][1]
+    with Image.open(path) as page:
+        pixels = np.asarray(page.convert("RGB"))
+    # the last file is alone on the second page, in the first cell (its 64x48 image is scaled to 32x24 and centered)
+    center = (BinMontageExporter.HEADER_HEIGHT + PAD + CELL // 2, PAD + CELL // 2)
+    assert np.abs(pixels[center].astype(int) - [200, 60, 0]).max() <= 2
+    assert (pixels[center[0], PAD + CELL + PAD + CELL // 2] == 255).all()
+
+def test_missing_images_become_blank_tiles():
+    root, image_dir = _make_images(2)
+    exporter = _make_exporter(root, image_dir, file_ext="jpg")
+    outputs = exporter.export({"clean": ["0000.png", "gone.png"], "soiled": ["0001.png"]}, labels=["clean"])
+    assert list(outputs) == ["clean"]
+    assert exporter.failed == ["gone.png"]
+    assert outputs["clean"][0].endswith("clean_001.jpg")
+    with Image.open(outputs["clean"][0]) as page:
+        assert page.format == "JPEG"
+
+def test_long_captions_are_shortened_from_the_middle():
+    root, image_dir = _make_images(1)
+    exporter = _make_exporter(root, image_dir)
+    draw = ImageDraw.Draw(Image.new("RGB", (10, 10)))
+    assert exporter._fit_caption(draw, "a.png", CELL) == "a.png"
+    short = exporter._fit_caption(draw, "a_very_long_filename_0001.png", 100)
+    assert "~" in short and short.startswith("a_") and short.endswith("1.png")
+    assert draw.textlength(short, font=exporter._font) <= 100
+
+def test_export_from_bins_json():
+    root, image_dir = _make_images(3)
+    bins_json = os.path.join(root, "sorting_output.json")
+    with open(bins_json, "w") as f:
+        json.dump({"clean": sorted(os.listdir(image_dir))}, f)
+    out_dir = os.path.join(root, "from_json")
+    outputs = export_bin_montages(bins_json, image_dir, out_dir, cell_size=CELL, thumbnail_cache_dir=os.path.join(root, "thumbs"))
+    assert outputs == {"clean": [os.path.join(out_dir, "clean_001.png")]}
+    assert sorted(os.listdir(out_dir)) == ["clean_001.png"]
@@ -0,0 +1,50 @@
+import os, sys
+import time
+import statistics
+import subprocess
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# time `python -m sideeye_reviewer --help` may take on top of a bare interpreter start (`python -c pass`) on the same machine,
+# so the budget covers the package's own imports rather than how fast the machine starts Python
+HELP_OVERHEAD_BUDGET_SECONDS = 0.15
+
+
+def _run_python(args, repeats=1):
+    """ run a fresh interpreter with the repo on the path, returning (last stdout, median wall time) """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    timings, stdout = [], ""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+        timings.append(time.perf_counter() - start)
+        stdout = result.stdout
+    return stdout, statistics.median(timings)
+
+def benchmark_help(repeats=7):
+    """ (median wall time of `--help`, median wall time of a bare interpreter start) """
+    _, baseline = _run_python(["-c", "pass"], repeats)
+    stdout, median = _run_python(["-m", "sideeye_reviewer", "--help"], repeats)
+    assert "review" in stdout and "index" in stdout
+    return median, baseline
+
+def test_help_starts_fast():
+    median, baseline = benchmark_help()
+    overhead = median - baseline
+    assert overhead < HELP_OVERHEAD_BUDGET_SECONDS, (
+        f"`sideeye --help` took {1000 * overhead:.0f} ms over a bare interpreter start (budget {1000 * HELP_OVERHEAD_BUDGET_SECONDS:.0f} ms)"
+    )
+
+def test_non_gui_modules_skip_heavy_imports():
+    # the CLI, DataManager and file helpers must not import matplotlib until an image is actually read or a window is opened
+    stdout, _ = _run_python(["-c", (
+        "import sys, sideeye_reviewer.cli, sideeye_reviewer.models.data_manager, sideeye_reviewer.utils.utils; "
+        "print(sorted({m.split('.')[0] for m in sys.modules} & {'matplotlib', 'PIL', 'numpy'}))"
+    )])
+    assert stdout.strip() == "[]", f"heavy modules imported at startup: {stdout.strip()}"
+
+
+if __name__ == "__main__":
+    median, baseline = benchmark_help()
+    print(f"[BENCHMARK] sideeye --help: {1000 * median:.0f} ms (median), {1000 * (median - baseline):.0f} ms over `python -c pass`")
+    test_non_gui_modules_skip_heavy_imports()
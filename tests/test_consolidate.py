@@ -0,0 +1,107 @@
+import os, sys
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.utils.consolidate import ResultConsolidator, main
+from sideeye_reviewer.utils import utils
+
+
+def _write_txt(folder, label, lines):
+    path = os.path.join(folder, f"{label}_labels.txt")
+    with open(path, "w") as f:
+        f.writelines(f"{line}\n" for line in lines)
+    return path
+
+def _write_json(folder, name, contents):
+    path = os.path.join(folder, name)
+    with open(path, "w") as f:
+        json.dump(contents, f)
+    return path
+
+def test_duplicates_and_double_sorted_files():
+    folder = tempfile.mkdtemp()
+    consolidator = ResultConsolidator()
+    consolidator.add_txt(_write_txt(folder, "clean", ["a.png", "b.png", "a.png"]))
+    consolidator.add_json(_write_json(folder, "session.json", {"clean": ["c.png"], "soiled": ["b.png", "d.png"]}))
+    assert consolidator.num_entries == 6
+    assert consolidator.num_duplicates == {"clean": 1}
+    assert consolidator.double_sorted == {"b.png": {"clean", "soiled"}}
+    assert consolidator.get_merged() == {"clean": ["a.png", "b.png", "c.png"], "soiled": ["b.png", "d.png"]}
+    assert consolidator.get_merged(drop_double_sorted=True) == {"clean": ["a.png", "c.png"], "soiled": ["d.png"]}
+    assert "1 file(s) sorted into more than one bin" in consolidator.report()
+
+def test_multilabel_files_in_several_bins_are_expected():
+    folder = tempfile.mkdtemp()
+    consolidator = ResultConsolidator(multilabel=True)
+    consolidator.add_json(_write_json(folder, "a.json", {"glare": ["a.png"], "blur": ["a.png", "a.png"]}))
+    assert consolidator.double_sorted == {}
+    assert consolidator.num_duplicates == {"blur": 1}
+
+def test_directory_mode_only_reads_results():
+    folder = tempfile.mkdtemp()
+    _write_txt(folder, "clean", ["a.png"])
+    _write_json(folder, "sorting_output.json", {"soiled": ["b.png"]})
+    # neither of these is a bins JSON
+    _write_json(folder, "scores.json", {"a.png": 0.5})
+    _write_json(folder, "manifest.json", {"labels": ["clean"], "cursor": 3, "files": ["a.png"]})
+    with open(os.path.join(folder, "notes.txt"), "w") as f:
+        f.write("not a label file\n")
+    out_path = os.path.join(folder, "merged.json")
+    for _ in range(2):
+        # the rerun must not read back the merged output
+        main([folder, "--out", out_path, "--double-sorted-out", os.path.join(folder, "double_sorted.json")])
+        with open(out_path, "r") as f:
+            assert json.load(f) == {"clean": ["a.png"], "soiled": ["b.png"]}
+    try:
+        ResultConsolidator().add_path(os.path.join(folder, "manifest.json"))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("an explicitly given non-bins JSON should raise ValueError")
+
+def test_duplicate_helpers():
+    assert sorted(utils.get_all_duplicates(["a", "b", "a", "c", "a"])) == ["a", "a"]
+    assert utils.get_all_duplicates(["a", "b"]) == []
+    utils.check_if_double_sorted({"a"}, ["b", "c"])
+    try:
+        utils.check_if_double_sorted({"a"}, ["b", "a"])
+    except Exception as e:
+        assert str(e) == "files double sorted"
+    else:
+        raise AssertionError("a file in two label files should raise")
+
+def test_reviewed_files_from_txt_drops_duplicates():
+    folder = tempfile.mkdtemp()
+    _write_txt(folder, "clean", ["a.png", "b.png", "a.png", "a.png"])
+    _write_txt(folder, "soiled", ["c.png"])
+    assert utils.get_all_reviewed_files_txt(folder, ["clean", "soiled"]) == ["a.png\n", "b.png\n", "c.png\n"]
+    with open(os.path.join(folder, "clean_labels.txt"), "r") as f:
+        assert f.read().split() == ["b.png", "a.png"]
+    _write_txt(folder, "soiled", ["b.png"])
+    try:
+        utils.get_all_reviewed_files_txt(folder, ["clean", "soiled"])
+    except Exception as e:
+        assert str(e) == "files double sorted"
+    else:
+        raise AssertionError("a file in two label files should raise")
+
+def test_reviewed_files_from_json():
+    folder = tempfile.mkdtemp()
+    path = _write_json(folder, "out.json", {"clean": ["b.png", "a.png", "b.png"], "soiled": ["c.png"]})
+    assert utils.get_all_reviewed_files_json(path) == ["a.png", "b.png", "c.png"]
+    with open(path, "r") as f:
+        assert json.load(f) == {"clean": ["a.png", "b.png"], "soiled": ["c.png"]}
+    try:
+        utils.get_all_reviewed_files_json(os.path.join(folder, "missing.json"))
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("a missing results file should raise FileNotFoundError")
+
+def test_aggregate_txt2json():
+    folder = tempfile.mkdtemp()
+    clean = _write_txt(folder, "clean", ["b.png", "a.png"])
+    out_path = _write_json(folder, "out.json", {"soiled": ["c.png"]})
+    utils.aggregate_txt2json({"clean": clean}, out_path)
+    with open(out_path, "r") as f:
+        assert json.load(f) == {"soiled": ["c.png"], "clean": ["a.png", "b.png"]}
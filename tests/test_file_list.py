@@ -0,0 +1,56 @@
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.file_list import CompactFileList
+
+
+FILES = [f"{i:04d}_FV.png" for i in range(1000)] + ["ünïcödé.png", ""]
+
+def test_behaves_like_a_list():
+    files = CompactFileList(FILES)
+    assert len(files) == len(FILES) and files
+    assert list(files) == FILES
+    assert files[0] == FILES[0] and files[-1] == FILES[-1] and files[-2] == "ünïcödé.png"
+    assert files == FILES
+    assert not CompactFileList()
+    try:
+        files[len(FILES)]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("indexing past the end should raise IndexError")
+
+def test_slices_are_views():
+    files = CompactFileList(FILES)
+    view = files[100:200]
+    assert list(view) == FILES[100:200]
+    assert list(view[10:20]) == FILES[110:120]
+    assert list(files[::7]) == FILES[::7]
+    assert list(files[::7][3:9]) == FILES[::7][3:9]
+    assert list(files[-5:]) == FILES[-5:]
+    assert len(files[500:100]) == 0
+    # views share the packed buffer instead of copying the filenames
+    assert view._buffer is files._buffer
+
+def test_membership_and_index():
+    files = CompactFileList(FILES)
+    assert "0500_FV.png" in files and "ünïcödé.png" in files
+    assert "missing.png" not in files and 5 not in files
+    assert files.index("0500_FV.png") == 500
+    view = files[400:]
+    assert view.index("0500_FV.png") == 100
+    assert "0100_FV.png" not in view
+    try:
+        view.index("0100_FV.png")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("index of a missing filename should raise ValueError")
+
+def test_shuffled_is_a_seeded_permutation():
+    files = CompactFileList(FILES)
+    shuffled = files.shuffled(seed=3)
+    assert sorted(shuffled) == sorted(FILES)
+    assert list(shuffled) != FILES
+    assert list(shuffled) == list(files.shuffled(seed=3))
+    assert shuffled.index(shuffled[123]) == 123
+    assert list(shuffled[10:20]) == list(shuffled)[10:20]
@@ -0,0 +1,62 @@
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.history_ring import HistoryRing
+
+
+LABELS = ["clean", "soiled", "disagree"]
+
+def test_undo_and_redo_entries_in_order():
+    ring = HistoryRing(LABELS, capacity=16)
+    ring.push(["a.png"], ["clean"])
+    ring.push(["b.png", "c.png"], ["soiled", "disagree"])
+    assert ring.num_undoable == 2 and len(ring) == 2
+    assert ring.undo() == {"b.png": ["soiled", "disagree"], "c.png": ["soiled", "disagree"]}
+    assert ring.undo() == {"a.png": ["clean"]}
+    assert ring.undo() is None
+    assert ring.redo() == {"a.png": ["clean"]}
+    assert ring.num_undoable == 1 and ring.num_redoable == 1
+    assert [list(entry) for entry in ring.entries()] == [["a.png"], ["b.png", "c.png"]]
+
+def test_push_discards_redoable_entries():
+    ring = HistoryRing(LABELS, capacity=16)
+    ring.push(["a.png"], ["clean"])
+    ring.push(["b.png"], ["clean"])
+    ring.undo()
+    ring.push(["c.png"], ["soiled"])
+    assert ring.redo() is None
+    assert ring.undo() == {"c.png": ["soiled"]}
+    assert ring.undo() == {"a.png": ["clean"]}
+
+def test_oldest_entries_drop_out_at_capacity():
+    ring = HistoryRing(LABELS, capacity=4)
+    for i in range(10):
+        ring.push([f"{i}.png"], ["clean"])
+    assert ring.num_undoable == 4
+    assert [next(iter(ring.undo())) for _ in range(4)] == ["9.png", "8.png", "7.png", "6.png"]
+    assert ring.undo() is None
+    # filenames of dropped records are released, so the intern table stays bounded by the capacity
+    assert len(ring._file_ids) <= ring.capacity
+
+def test_grows_for_an_entry_larger_than_the_ring():
+    ring = HistoryRing(LABELS, capacity=4)
+    ring.push(["a.png"], ["clean"])
+    batch = [f"{i}.png" for i in range(10)]
+    ring.push(batch, ["disagree"])
+    assert ring.capacity >= 10
+    assert list(ring.undo()) == batch
+    assert ring.redo() == {fname: ["disagree"] for fname in batch}
+
+def test_more_than_64_labels():
+    labels = [f"label_{i}" for i in range(100)]
+    ring = HistoryRing(labels, capacity=8)
+    ring.push(["a.png"], ["label_0", "label_70", "label_99"])
+    assert ring.undo() == {"a.png": ["label_0", "label_70", "label_99"]}
+
+def test_unknown_label_raises():
+    ring = HistoryRing(LABELS)
+    try:
+        ring.push(["a.png"], ["nope"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("an unknown label should raise ValueError")
@@ -0,0 +1,56 @@
+import os, sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.integrity import IntegrityScanner
+
+
+def _save(path, size=(32, 32)):
+    Image.fromarray(np.zeros((size[1], size[0], 3), dtype=np.uint8)).save(path)
+
+def _make_dataset():
+    """ images/ + masks/ with one good pair and one of every problem the scanner reports """
+    root = tempfile.mkdtemp()
+    images, masks = os.path.join(root, "images"), os.path.join(root, "masks")
+    os.makedirs(images)
+    os.makedirs(masks)
+    for name in ("good.png", "no_mask.png", "wrong_size.png", "truncated.png", "garbage.png"):
+        _save(os.path.join(images, name))
+    for name in ("good.png", "truncated.png", "garbage.png"):
+        _save(os.path.join(masks, name))
+    _save(os.path.join(masks, "wrong_size.png"), (16, 16))
+    _save(os.path.join(masks, "orphan.png"))
+    with open(os.path.join(images, "truncated.png"), "r+b") as f:
+        f.truncate(60)
+    with open(os.path.join(images, "garbage.png"), "wb") as f:
+        f.write(b"not an image")
+    return root, [images, masks]
+
+def test_scan_excludes_broken_files_and_reports_orphans():
+    root, folders = _make_dataset()
+    scanner = IntegrityScanner(folders, os.path.join(root, "integrity.json"), max_workers=1)
+    report = scanner.scan()
+    assert set(report.excluded) == {"no_mask.png", "wrong_size.png", "truncated.png", "garbage.png"}
+    assert report.excluded["no_mask.png"].startswith("missing")
+    assert report.excluded["wrong_size.png"].startswith("dimensions")
+    assert report.excluded["garbage.png"].startswith("unreadable")
+    assert report.orphans == {os.path.abspath(folders[1]): ["orphan.png"]}
+    assert report.filter(["good.png", "garbage.png"]) == ["good.png"]
+
+def test_rescan_only_opens_changed_files():
+    root, folders = _make_dataset()
+    cache_path = os.path.join(root, "integrity.json")
+    first = IntegrityScanner(folders, cache_path, max_workers=1).scan()
+    assert first.num_scanned == first.num_files
+    second = IntegrityScanner(folders, cache_path, max_workers=1).scan()
+    assert second.num_scanned == 0 and second.excluded == first.excluded
+    # fixing a file changes its mtime and size, so only that file is opened again
+    _save(os.path.join(folders[0], "garbage.png"))
+    third = IntegrityScanner(folders, cache_path, max_workers=1).scan()
+    assert third.num_scanned == 1 and "garbage.png" not in third.excluded
+
+def test_dimension_check_can_be_disabled():
+    root, folders = _make_dataset()
+    report = IntegrityScanner(folders, os.path.join(root, "integrity.json"), check_dimensions=False, max_workers=1).scan(["good.png", "wrong_size.png"])
+    assert report.excluded == {}
@@ -0,0 +1,75 @@
+import os, sys
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.label_index import LabelIndex
+
+
+LABELS = ["clean", "soiled", "partly soiled", "disagree"]
+BINS = {
+    "clean": ["a.png", "b.png"],
+    "soiled": ["c.png"],
+    "partly soiled": ["d.png", "e.png"],
+    "disagree": ["b.png", "d.png"],
+}
+FILES = ["a.png", "b.png", "c.png", "d.png", "e.png", "f.png"]
+
+def test_boolean_queries():
+    index = LabelIndex.from_bins(BINS, LABELS, FILES)
+    assert index.query("clean") == ["a.png", "b.png"]
+    assert index.query("clean AND disagree") == ["b.png"]
+    assert index.query('soiled OR "partly soiled"') == ["c.png", "d.png", "e.png"]
+    assert index.query('("partly soiled" OR clean) AND NOT disagree') == ["a.png", "e.png"]
+    assert index.query("disagree and not clean") == ["d.png"]
+    assert index.query("NOT ANY") == ["f.png"]
+    assert index.count("ANY") == 5
+
+def test_per_file_labels_and_incremental_updates():
+    index = LabelIndex.from_bins(BINS, LABELS)
+    assert index.get_labels("b.png") == ["clean", "disagree"]
+    assert index.get_labels("unknown.png") == []
+    index.add("z.png", ["soiled", "disagree"])
+    assert index.query("soiled AND disagree") == ["z.png"]
+    index.remove("z.png", "disagree")
+    assert index.get_labels("z.png") == ["soiled"]
+    # enough files to grow the bitmaps past their initial capacity
+    index.add_bulk("clean", [f"{i}.png" for i in range(200)])
+    assert index.count("clean") == 202
+
+def test_invalid_queries_raise():
+    index = LabelIndex.from_bins(BINS, LABELS)
+    for query in ("nope", "clean AND", "(clean", "clean)"):
+        try:
+            index.query(query)
+        except ValueError:
+            continue
+        raise AssertionError(f"'{query}' should raise ValueError")
+
+def test_undo_keeps_labels_from_the_previous_results():
+    from sideeye_reviewer.models.bin_manager import BinManager
+    out_dir = tempfile.mkdtemp()
+    with open(os.path.join(out_dir, "sorting_output.json"), "w") as f:
+        json.dump({"clean": ["a.png"]}, f)
+    sorter = BinManager(LABELS, out_dir, "sorting_output.json")
+    index = sorter.get_label_index()
+    sorter.add_filename(["clean", "disagree"], "a.png")
+    sorter.undo_sort()
+    assert index.get_labels("a.png") == ["clean"]
+
+def test_more_than_64_labels():
+    from sideeye_reviewer.models.bin_manager import BinManager
+    labels = [f"class_{i}" for i in range(100)]
+    index = LabelIndex(labels)
+    index.add("a.png", ["class_0", "class_70", "class_99"])
+    index.add_bulk("class_80", ["a.png", "b.png"])
+    assert index.get_labels("a.png") == ["class_0", "class_70", "class_80", "class_99"]
+    index.remove("a.png", "class_70")
+    assert index.get_labels("a.png") == ["class_0", "class_80", "class_99"]
+    assert index.query("class_80 AND NOT class_99") == ["b.png"]
+    index.add_bulk("class_1", [f"{i}.png" for i in range(200)])
+    assert index.count("class_1 OR class_80") == 202
+    # the results of a session with that many labels can be queried too
+    sorter = BinManager(labels, tempfile.mkdtemp(), "sorting_output.json")
+    sorter.add_filename(["class_65", "class_2"], "a.png")
+    assert sorter.get_label_index().query("class_65") == ["a.png"]
+    assert sorter.get_label_index().get_labels("a.png") == ["class_2", "class_65"]
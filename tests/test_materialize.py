@@ -0,0 +1,68 @@
+import os, sys
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.utils.materialize import BinMaterializer, materialize_bins
+
+
+BINS = {"clean": ["0000_FV.png", "0001_FV.png"], "soiled": ["0002_FV.png"]}
+
+def _make_dataset(mask_suffix=""):
+    root = tempfile.mkdtemp()
+    folders = [os.path.join(root, "images"), os.path.join(root, "masks")]
+    for folder, suffix in zip(folders, ("", mask_suffix)):
+        os.makedirs(folder)
+        for i in range(3):
+            with open(os.path.join(folder, f"{i:04d}_FV{suffix}.png"), "wb") as f:
+                f.write(f"{folder}/{i}".encode("utf-8"))
+    return root, folders
+
+def _quiet(done, total):
+    pass
+
+def _listing(out_dir):
+    return {os.path.relpath(d, out_dir): sorted(f) for d, _, f in os.walk(out_dir) if f}
+
+def test_each_mode_materializes_every_bin():
+    for mode in ("hardlink", "symlink", "copy"):
+        root, folders = _make_dataset()
+        out_dir = os.path.join(root, "out")
+        totals = BinMaterializer(folders, out_dir, modes=[mode], progress_fn=_quiet).materialize(BINS)
+        assert totals == {mode: 6}, f"{mode}: {totals}"
+        assert _listing(out_dir) == {
+            os.path.join("clean", "images"): BINS["clean"], os.path.join("clean", "masks"): BINS["clean"],
+            os.path.join("soiled", "images"): BINS["soiled"], os.path.join("soiled", "masks"): BINS["soiled"],
+        }
+        with open(os.path.join(out_dir, "soiled", "masks", "0002_FV.png"), "rb") as f:
+            assert f.read() == f"{folders[1]}/2".encode("utf-8")
+        if mode == "symlink":
+            assert os.path.islink(os.path.join(out_dir, "clean", "images", "0000_FV.png"))
+
+def test_unsupported_modes_fall_back():
+    root, folders = _make_dataset()
+    totals = BinMaterializer(folders[:1], os.path.join(root, "out"), modes=["reflink", "copy"], progress_fn=_quiet).materialize(BINS)
+    # reflinks only work on copy-on-write filesystems, so either mode may end up being used
+    assert totals.get("reflink", 0) + totals.get("copy", 0) == 3 and "failed" not in totals
+
+def test_rerun_skips_up_to_date_files_and_prunes():
+    root, folders = _make_dataset()
+    out_dir = os.path.join(root, "out")
+    BinMaterializer(folders, out_dir, modes=["copy"], progress_fn=_quiet).materialize(BINS)
+    assert BinMaterializer(folders, out_dir, modes=["copy"], progress_fn=_quiet).materialize(BINS) == {"skipped": 6}
+    moved = {"clean": ["0000_FV.png"], "soiled": ["0001_FV.png", "0002_FV.png"]}
+    totals = BinMaterializer(folders, out_dir, modes=["copy"], prune=True, progress_fn=_quiet).materialize(moved)
+    assert totals == {"skipped": 4, "copy": 2, "pruned": 2}
+    assert _listing(out_dir)[os.path.join("clean", "images")] == ["0000_FV.png"]
+    assert not any(name.endswith(BinMaterializer.TMP_SUFFIX) for files in _listing(out_dir).values() for name in files)
+
+def test_counterparts_resolved_through_the_pairing_index():
+    from sideeye_reviewer.models.pairing_index import PairingIndex
+    root, folders = _make_dataset(mask_suffix="_mask")
+    bins_json = os.path.join(root, "bins.json")
+    with open(bins_json, "w") as f:
+        json.dump(BINS, f)
+    pairing_index = PairingIndex(folders, r"^(.+?)(?:_mask)?\.\w+$", os.path.join(root, "pairs.json")).build()
+    out_dir = os.path.join(root, "out")
+    totals = materialize_bins(bins_json, folders, out_dir, ["clean"], modes=["copy"], progress_fn=_quiet, pairing_index=pairing_index)
+    assert totals == {"copy": 4}
+    assert _listing(out_dir)[os.path.join("clean", "masks")] == ["0000_FV_mask.png", "0001_FV_mask.png"]
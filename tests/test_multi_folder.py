@@ -0,0 +1,45 @@
+import os, sys
+import tempfile
+import threading
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.data_manager import DataManager
+from sideeye_reviewer.layouts.layout_manager import FigureLayoutManager
+
+
+def _make_folders(num_folders, num_files=3):
+    root = tempfile.mkdtemp()
+    folders = []
+    for k in range(num_folders):
+        folder = os.path.join(root, f"source_{k}")
+        os.makedirs(folder)
+        for i in range(num_files):
+            with open(os.path.join(folder, f"{i:04d}.png"), "wb") as f:
+                f.write(b"x")
+        folders.append(folder)
+    return folders
+
+def test_reads_every_folder_concurrently_in_folder_order():
+    folders = _make_folders(4)
+    data_manager = DataManager(folders, enable_sorting=False)
+    # every read waits for all the others, so this only returns if the folders are read at the same time
+    barrier = threading.Barrier(len(folders), timeout=5)
+    def read(path):
+        barrier.wait()
+        return path
+    data_manager._read_image = read
+    assert data_manager.load_images("0001.png") == [os.path.join(d, "0001.png") for d in folders]
+
+def test_too_many_folders_raise():
+    try:
+        DataManager(_make_folders(FigureLayoutManager.MAX_IMG_PER_FIGURE + 1), enable_sorting=False)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("more image folders than image axes should raise ValueError")
+
+def test_image_grid_spreads_images_evenly_over_rows():
+    layout = FigureLayoutManager.__new__(FigureLayoutManager)
+    expected = {1: (1, 1), 2: (1, 2), 3: (1, 3), 4: (2, 2)}
+    for num_images, shape in expected.items():
+        layout.num_images = num_images
+        assert layout._compute_image_grid_shape() == shape, f"{num_images} images"
@@ -0,0 +1,59 @@
+import os, sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.pairing_index import PairingIndex, regex_stem_key
+
+
+MASK_KEY = r"^(.+?)(?:_mask)?\.\w+$"
+
+def _make_folders(images, masks):
+    root = tempfile.mkdtemp()
+    folders = [os.path.join(root, "images"), os.path.join(root, "masks")]
+    for folder, names in zip(folders, (images, masks)):
+        os.makedirs(folder)
+        for name in names:
+            open(os.path.join(folder, name), "wb").close()
+    return root, folders
+
+def test_regex_stem_key():
+    key = regex_stem_key(MASK_KEY)
+    assert key("0001_FV.png") == key("0001_FV_mask.png") == "0001_FV"
+    # filenames the pattern doesn't match fall back to the name without its extension
+    assert regex_stem_key(r"^(\d+)_")("notes.txt") == "notes"
+
+def test_pairs_by_stem_key_and_reports_unmatched_files():
+    root, folders = _make_folders(["0001_FV.png", "0002_FV.png", "0003_FV.jpg"], ["0001_FV_mask.png", "0003_FV_mask.png", "0009_FV_mask.png"])
+    index = PairingIndex(folders, MASK_KEY).build()
+    assert index.pairs == {"0001_FV.png": ["0001_FV.png", "0001_FV_mask.png"], "0003_FV.jpg": ["0003_FV.jpg", "0003_FV_mask.png"]}
+    assert "0001_FV.png" in index and "0002_FV.png" not in index and len(index) == 2
+    assert index.get_paths("0003_FV.jpg") == [os.path.join(os.path.abspath(d), n) for d, n in zip(folders, ("0003_FV.jpg", "0003_FV_mask.png"))]
+    assert index.unmatched == {os.path.abspath(folders[0]): ["0002_FV.png"], os.path.abspath(folders[1]): ["0009_FV_mask.png"]}
+    try:
+        index.get_paths("0002_FV.png")
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("an unpaired file should raise FileNotFoundError")
+
+def test_repeated_keys_are_collisions():
+    root, folders = _make_folders(["0001.png", "0001.jpg"], ["0001.png"])
+    index = PairingIndex(folders).build()
+    assert index.pairs == {"0001.jpg": ["0001.jpg", "0001.png"]}
+    assert index.collisions == {os.path.abspath(folders[0]): ["0001.png"]}
+
+def test_cache_is_reused_only_for_identifiable_keys():
+    root, folders = _make_folders(["0001_FV.png"], ["0001_FV_mask.png"])
+    index = PairingIndex(folders, MASK_KEY).build()
+    assert os.path.exists(index.cache_path)
+    assert PairingIndex(folders, MASK_KEY)._load_cache()
+    assert not PairingIndex(folders, r"^(.+?)\.\w+$")._load_cache()
+    # a function can change without its name changing, so it's rescanned unless it's given a cache_key
+    first = PairingIndex(folders, lambda f: f[:4])
+    assert first.cache_key is None and len(first.build()) == 1
+    assert len(PairingIndex(folders, lambda f: f).build()) == 0
+    assert PairingIndex(folders, lambda f: f[:4], cache_key="first4").build().cache_key == "first4"
+
+def test_default_cache_is_per_folder_set():
+    root, folders = _make_folders(["0001.png"], ["0001.png"])
+    assert PairingIndex(folders).cache_path != PairingIndex(folders[:1]).cache_path
+    assert os.path.dirname(PairingIndex(folders).cache_path) == root
@@ -0,0 +1,48 @@
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.permutation import FeistelPermutation, PermutedFileList
+
+
+def test_permutation_is_a_bijection():
+    # sizes just around powers of two exercise the cycle walking the most
+    for n in (1, 2, 3, 5, 17, 255, 256, 257, 1000):
+        perm = FeistelPermutation(n, seed=7)
+        order = [perm[i] for i in range(n)]
+        assert sorted(order) == list(range(n)), f"not a permutation of range({n})"
+        assert all(perm.inverse(order[i]) == i for i in range(n))
+
+def test_permutation_is_deterministic_per_seed():
+    first = [FeistelPermutation(500, seed=3)[i] for i in range(500)]
+    assert first == [FeistelPermutation(500, seed=3)[i] for i in range(500)]
+    assert first != [FeistelPermutation(500, seed=4)[i] for i in range(500)]
+    assert first != list(range(500))
+
+def test_permutation_rejects_out_of_range_positions():
+    perm = FeistelPermutation(10, seed=1)
+    for bad in (-1, 10):
+        for lookup in (perm.__getitem__, perm.inverse):
+            try:
+                lookup(bad)
+            except IndexError:
+                continue
+            raise AssertionError(f"position {bad} should be out of range")
+    assert len(FeistelPermutation(0, seed=1)) == 0
+
+def test_permuted_file_list_resumes_on_the_unseen_files():
+    files = [f"{i:04d}.png" for i in range(100)]
+    shuffled = PermutedFileList(files, seed=42)
+    assert sorted(shuffled) == files
+    # skipping a count-based checkpoint must leave exactly the files that weren't shown yet
+    resumed = shuffled[30:]
+    assert isinstance(resumed, PermutedFileList) and len(resumed) == 70
+    assert list(resumed) == list(shuffled)[30:]
+    assert resumed[-1] == shuffled[99]
+    assert shuffled[::10] == list(shuffled)[::10]
+
+def test_permuted_file_list_get_position():
+    files = [f"{i:04d}.png" for i in range(50)]
+    resumed = PermutedFileList(files, seed=5)[10:]
+    for position, fname in enumerate(resumed):
+        assert resumed.get_position(files.index(fname)) == position
+    shown = set(PermutedFileList(files, seed=5)[:10])
+    assert all(resumed.get_position(files.index(f)) == -1 for f in shown)
@@ -0,0 +1,135 @@
+import os, sys
+import shutil
+import tempfile
+import random
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.phash_index import BKTree, PerceptualHashIndex, compute_phash, hamming_distance
+from sideeye_reviewer.models.data_manager import DataManager
+from sideeye_reviewer.controllers.review_controller import ReviewerController
+
+
+LABELS = ["keep", "drop"]
+
+class StubView:
+    """ stands in for a reviewer view - the controller only needs somewhere to draw """
+    fig_title = "test"
+    use_tiles = False
+    legend_dict = None
+
+    def setup_gui(self, *args, **kwargs):
+        pass
+
+    def display_image(self, image, ax_idx=0):
+        pass
+
+    def update_title(self, *args):
+        pass
+
+    def update_summary(self, *args):
+        pass
+
+    def display_warning(self, message):
+        pass
+
+    def main_loop(self):
+        pass
+
+def _save_pattern(path, seed, noise=0):
+    """ a smooth random pattern (so that its low frequencies carry the hash) plus optional pixel noise """
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (8, 8), dtype=np.uint8)
+    img = np.asarray(Image.fromarray(coarse).resize((128, 128), Image.BILINEAR), dtype=np.int16)
+    if noise:
+        img = img + np.random.default_rng(seed + 1000).integers(-noise, noise + 1, img.shape)
+    Image.fromarray(np.clip(img, 0, 255).astype(np.uint8)).save(path)
+
+def test_tree_query_matches_brute_force():
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(300)]
+    # a few hashes a couple of bits away from others so that small radii have matches
+    hashes += [h ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for h in hashes[:30]]
+    tree = BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, f"{i}")
+    assert tree.size == len(hashes)
+    for radius in (0, 2, 6, 20):
+        for query in hashes[:40] + [rng.getrandbits(64) for _ in range(10)]:
+            expected = sorted((f"{i}", hamming_distance(query, h)) for i, h in enumerate(hashes) if hamming_distance(query, h) <= radius)
+            assert sorted(tree.query(query, radius)) == expected
+
+def test_identical_hashes_share_a_node():
+    tree = BKTree()
+    for item in ("a", "b", "c"):
+        tree.add(0b1010, item)
+    assert sorted(tree.query(0b1010, 0)) == [("a", 0), ("b", 0), ("c", 0)]
+    assert tree.query(0b0101, 3) == []
+    assert BKTree().query(0, 64) == []
+
+def test_near_duplicates_are_found_and_clustered():
+    root = tempfile.mkdtemp()
+    image_dir = os.path.join(root, "images")
+    os.makedirs(image_dir)
+    _save_pattern(os.path.join(image_dir, "a.png"), seed=1)
+    _save_pattern(os.path.join(image_dir, "a_noisy.png"), seed=1, noise=4)
+    _save_pattern(os.path.join(image_dir, "b.png"), seed=2)
+    _save_pattern(os.path.join(image_dir, "c.png"), seed=3)
+    assert hamming_distance(compute_phash(os.path.join(image_dir, "a.png")), compute_phash(os.path.join(image_dir, "a_noisy.png"))) <= 6
+    files = sorted(os.listdir(image_dir))
+    cache_path = os.path.join(root, "phash.json")
+    index = PerceptualHashIndex(image_dir, cache_path).build(files, max_workers=2)
+    assert index.query("a.png") == ["a_noisy.png"]
+    assert index.query("b.png") == []
+    assert index.query("missing.png") == []
+    assert index.get_clusters() == [["a.png", "a_noisy.png"]]
+    # a rebuild reads the hashes back from the cache instead of rehashing
+    rebuilt = PerceptualHashIndex(image_dir, cache_path).build(files, max_workers=2)
+    assert rebuilt.hashes == index.hashes
+
+def _make_controller(order):
+    """ a dataset reviewed in the given order, where the "*_x" files are all copies of one image """
+    root = tempfile.mkdtemp()
+    image_dir = os.path.join(root, "images")
+    os.makedirs(image_dir)
+    duplicates = [name for name in order if "_x" in name]
+    for i, name in enumerate(order):
+        path = os.path.join(image_dir, name)
+        if name in duplicates[1:]:
+            shutil.copyfile(os.path.join(image_dir, duplicates[0]), path)
+        else:
+            _save_pattern(path, seed=10 + i)
+    data_manager = DataManager([image_dir], os.path.join(root, "out"), LABELS, file_list=order)
+    controller = ReviewerController(data_manager, StubView(), duplicate_radius=4)
+    controller.initialize(checkpoint=False)
+    assert list(controller.file_list) == order
+    return controller
+
+def test_labels_propagate_to_upcoming_duplicates_as_one_action():
+    controller = _make_controller(["0_x.png", "1_b.png", "2_x.png", "3_c.png", "4_x.png"])
+    sorter = controller.data_manager.sorter
+    controller.get_on_label_clicked_cb("drop")(None)
+    assert sorted(sorter.sorting_dict["drop"]) == ["0_x.png", "2_x.png", "4_x.png"]
+    assert controller.file_list[controller.current_idx] == "1_b.png"
+    controller.get_on_label_clicked_cb("keep")(None)
+    # the propagated duplicate is skipped
+    assert controller.file_list[controller.current_idx] == "3_c.png"
+    # undoing both actions unlabels the whole group and returns to the first image
+    controller.on_undo_clicked(None)
+    controller.on_undo_clicked(None)
+    assert all(len(files) == 0 for files in sorter.sorting_dict.values())
+    assert controller.current_idx == 0
+    controller.get_on_label_clicked_cb("keep")(None)
+    assert sorted(sorter.sorting_dict["keep"]) == ["0_x.png", "2_x.png", "4_x.png"]
+
+def test_skipping_propagated_duplicates_can_end_the_session():
+    controller = _make_controller(["0_b.png", "1_x.png", "2_c.png", "3_x.png"])
+    sorter = controller.data_manager.sorter
+    controller.get_on_label_clicked_cb("keep")(None)
+    controller.get_on_label_clicked_cb("drop")(None)
+    assert list(sorter.sorting_dict["drop"]) == ["1_x.png", "3_x.png"]
+    assert controller.file_list[controller.current_idx] == "2_c.png"
+    # the last unlabeled file - the propagated duplicate after it is skipped, which ends the session
+    controller.get_on_label_clicked_cb("keep")(None)
+    assert controller._reached_end
+    assert list(sorter.sorting_dict["keep"]) == ["0_b.png", "2_c.png"]
@@ -0,0 +1,79 @@
+import os, sys
+import time
+import threading
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.playback import PlaybackBuffer, NavigationTracker
+
+
+def _wait_for(buffer, pos, timeout=5.0):
+    """ poll a frame like the GUI timer does, until its decode finishes """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        frame = buffer.get(pos)
+        if frame is not None:
+            return frame
+        time.sleep(0.005)
+    return None
+
+def test_window_wraps_around_and_alternates_sides():
+    buffer = PlaybackBuffer(lambda pos: [pos], num_frames=10, capacity=6)
+    try:
+        assert buffer.get_window(0, ahead=3, behind=2) == [1, 9, 2, 8, 3]
+        assert buffer.get_window(9, ahead=2) == [0, 1]
+        # the window never exceeds the capacity
+        assert len(buffer.get_window(5, ahead=10, behind=10)) <= 6
+    finally:
+        buffer.shutdown()
+
+def test_fill_decodes_ahead_and_evicts_outside_the_window():
+    buffer = PlaybackBuffer(lambda pos: [pos * 10], num_frames=20, capacity=4)
+    try:
+        buffer.fill(0, ahead=3)
+        assert _wait_for(buffer, 2) == [20]
+        assert buffer.get(10) is None
+        buffer.fill(10, ahead=3)
+        assert _wait_for(buffer, 11) == [110]
+        assert set(buffer._frames) == {11, 12, 13}
+    finally:
+        buffer.shutdown()
+
+def test_get_does_not_wait_for_a_queued_decode():
+    release = threading.Event()
+    def load(pos):
+        if pos == 1:
+            release.wait(5)
+        return [pos]
+    buffer = PlaybackBuffer(load, num_frames=10, capacity=4, max_workers=1)
+    try:
+        buffer.fill(0, ahead=2)  # frame 1 blocks the only worker, so frame 2 stays queued behind it
+        start = time.perf_counter()
+        assert buffer.get(2, wait=True) is None
+        assert time.perf_counter() - start < 1.0
+        assert buffer.get(2) is None
+        release.set()
+        # a running decode is waited for, since it's further along than decoding the frame again
+        assert buffer.get(1, wait=True) == [1]
+    finally:
+        release.set()
+        buffer.shutdown()
+
+def test_navigation_tracker_follows_direction_and_rate():
+    now = [0.0]
+    tracker = NavigationTracker(window_seconds=1.0, lookahead_seconds=2.0, min_budget=4, clock=lambda: now[0])
+    assert tracker.get_direction_bias() == 0.5 and tracker.get_rate() == 0.0
+    # steps 0.125 s apart (exact in binary), of which the last 8 are within the window: 8 steps per second
+    for _ in range(10):
+        tracker.record(+1)
+        now[0] += 0.125
+    assert tracker.get_direction_bias() == 1.0
+    assert tracker.get_rate() == 8.0
+    # 2 s of navigation at 8 steps per second, keeping one frame behind
+    assert tracker.split_budget(capacity=32) == (15, 1)
+    # old steps expire, so switching direction moves the budget to the other side
+    now[0] += 2.0
+    for _ in range(5):
+        tracker.record(-1)
+        now[0] += 0.5
+    forward, backward = tracker.split_budget(capacity=32)
+    assert backward > forward
+    assert sum(tracker.split_budget(capacity=3)) == 3
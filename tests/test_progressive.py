@@ -0,0 +1,85 @@
+import os, sys
+import time
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.data_manager import DataManager
+from sideeye_reviewer.controllers.base_controller import BaseReviewController
+
+
+SIZES = {"0000.png": (600, 800), "0001.png": (300, 500)}
+
+class RecordingView:
+    """ stands in for a reviewer view, recording what the controller draws """
+    fig_title = "test"
+    use_tiles = False
+
+    def __init__(self):
+        self.calls = []
+        self.poll = None
+
+    def display_image(self, image, ax_idx=0):
+        self.calls.append(("image", ax_idx, image.shape[:2]))
+
+    def clear_image(self, ax_idx=0):
+        self.calls.append(("clear", ax_idx))
+
+    def set_preview_indicator(self, active):
+        self.calls.append(("preview", active))
+
+    def start_polling(self, callback):
+        self.poll = callback
+
+    def update_title(self, *args):
+        pass
+
+def _make_controller():
+    root = tempfile.mkdtemp()
+    folders = [os.path.join(root, "images"), os.path.join(root, "masks")]
+    for k, folder in enumerate(folders):
+        os.makedirs(folder)
+        for name, (height, width) in SIZES.items():
+            shape = (height, width, 3) if k == 0 else (height, width)
+            Image.fromarray(np.zeros(shape, dtype=np.uint8)).save(os.path.join(folder, name))
+    data_manager = DataManager(folders, enable_sorting=False, thumbnail_cache_dir=os.path.join(root, "thumbs"))
+    controller = BaseReviewController(data_manager, RecordingView(), progressive=True)
+    controller.initialize(checkpoint=False)
+    return controller
+
+def _poll_until_done(controller, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while controller.view.poll() and time.perf_counter() < deadline:
+        time.sleep(0.005)
+
+def test_cached_previews_are_drawn_before_the_full_images():
+    controller = _make_controller()
+    controller.data_manager.load_previews("0000.png")
+    controller._load_image(controller.file_list.index("0000.png"))
+    assert controller.view.calls == [("image", 0, (192, 256)), ("image", 1, (192, 256)), ("preview", True)]
+    _poll_until_done(controller)
+    assert controller.view.calls[-3:] == [("image", 0, (600, 800)), ("image", 1, (600, 800)), ("preview", False)]
+
+def test_preview_cache_miss_is_generated_in_the_background():
+    controller = _make_controller()
+    # a slow full resolution decode, so that the previews deterministically arrive first
+    controller.data_manager.add_transform(lambda img: (time.sleep(0.3), img)[1])
+    controller._load_image(controller.file_list.index("0000.png"))
+    # nothing is decoded or hashed on the calling (GUI) thread - the axes are blanked instead
+    assert controller.view.calls == [("clear", 0), ("clear", 1), ("preview", True)]
+    _poll_until_done(controller)
+    assert controller.view.calls[3:] == [
+        ("image", 0, (192, 256)), ("image", 1, (192, 256)),
+        ("image", 0, (600, 800)), ("image", 1, (600, 800)), ("preview", False)
+    ]
+    assert controller.data_manager.load_cached_previews("0000.png") is not None
+
+def test_results_for_a_previous_image_are_discarded():
+    controller = _make_controller()
+    controller._load_image(controller.file_list.index("0000.png"))
+    controller._load_image(controller.file_list.index("0001.png"))
+    num_calls = len(controller.view.calls)
+    _poll_until_done(controller)
+    shown = [call[2] for call in controller.view.calls[num_calls:] if call[0] == "image"]
+    assert shown and all(shape in ((300, 500), (154, 256)) for shape in shown)
+    assert shown[-1] == (300, 500)
@@ -0,0 +1,60 @@
+import os, sys
+import json
+import time
+import tempfile
+import multiprocessing as mp
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+LABELS = ["clean", "soiled", "disagree"]
+
+def _session_worker(out_dir, session_idx, num_files, undo_every, latency_queue):
+    """ one labeling session writing its own files to the shared store, undoing every `undo_every`-th label """
+    from sideeye_reviewer.models.bin_manager import BinManager
+    sorter = BinManager(LABELS, out_dir, "sorting_output.json", shared_store=True)
+    latencies = []
+    for i in range(num_files):
+        start = time.perf_counter()
+        sorter.add_filename(LABELS[i % len(LABELS)], f"s{session_idx:02d}_{i:04d}.png")
+        latencies.append(time.perf_counter() - start)
+        if undo_every and i % undo_every == undo_every - 1:
+            sorter.undo_sort()
+    # every session also exports the merged JSON, as it would on exit
+    sorter.write_to_outfiles()
+    latency_queue.put(latencies)
+
+def run_stress_test(num_sessions=24, num_files=150, undo_every=10):
+    out_dir = tempfile.mkdtemp()
+    latency_queue = mp.Queue()
+    procs = [mp.Process(target=_session_worker, args=(out_dir, s, num_files, undo_every, latency_queue)) for s in range(num_sessions)]
+    for p in procs:
+        p.start()
+    latencies = sorted(lat for _ in procs for lat in latency_queue.get())
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0, "a session crashed while writing"
+    # every label that wasn't undone must survive, in the store and in the JSON exported by the last session to exit
+    kept = {f"s{s:02d}_{i:04d}.png" for s in range(num_sessions) for i in range(num_files) if i % undo_every != undo_every - 1}
+    with open(os.path.join(out_dir, "sorting_output.json"), "r") as f:
+        bins = json.load(f)
+    labeled = set().union(*map(set, bins.values()))
+    assert labeled == kept, f"{len(kept - labeled)} lost and {len(labeled - kept)} stale label(s)"
+    p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+    print(f"{num_sessions} sessions, {len(latencies)} writes: p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms per label")
+    return p50, p99
+
+def test_concurrent_sessions_lose_no_labels():
+    run_stress_test()
+
+def test_undo_only_removes_own_session_labels():
+    from sideeye_reviewer.models.results_store import ResultsStore
+    db_path = os.path.join(tempfile.mkdtemp(), "results.db")
+    store_a, store_b = ResultsStore(db_path), ResultsStore(db_path)
+    store_a.add({"0001.png": ["clean"]})
+    store_b.add({"0001.png": ["clean"]})
+    store_a.remove({"0001.png": ["clean"]})
+    assert store_b.get_bins(LABELS)["clean"] == ["0001.png"]
+
+
+if __name__ == "__main__":
+    run_stress_test()
@@ -0,0 +1,130 @@
+import os, sys
+import json
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.review_ordering import PriorityFileList, load_scores
+from sideeye_reviewer.models.data_manager import DataManager
+from sideeye_reviewer.controllers.review_controller import ReviewerController
+
+
+LABELS = ["clean", "soiled"]
+SCORES = {"a.png": 0.9, "b.png": 0.1, "c.png": 0.5, "d.png": 0.3}
+
+class StubView:
+    """ stands in for a reviewer view - the controller only needs somewhere to draw """
+    fig_title = "test"
+    use_tiles = False
+    legend_dict = None
+
+    def setup_gui(self, *args, **kwargs):
+        pass
+
+    def display_image(self, image, ax_idx=0):
+        pass
+
+    def update_title(self, *args):
+        pass
+
+    def update_summary(self, *args):
+        pass
+
+    def display_warning(self, message):
+        pass
+
+    def main_loop(self):
+        pass
+
+def _make_dataset(scores=SCORES, duplicate_of=None):
+    """ an image folder with a score sidecar - files in duplicate_of are copies of the file they map to """
+    root = tempfile.mkdtemp()
+    image_dir = os.path.join(root, "images")
+    os.makedirs(image_dir)
+    duplicate_of = duplicate_of or {}
+    for i, fname in enumerate(sorted(scores)):
+        if fname not in duplicate_of:
+            pixels = np.random.default_rng(i).integers(0, 256, (8, 8), dtype=np.uint8)
+            Image.fromarray(pixels).resize((64, 64), Image.BILINEAR).save(os.path.join(image_dir, fname))
+    for fname, original in duplicate_of.items():
+        shutil.copyfile(os.path.join(image_dir, original), os.path.join(image_dir, fname))
+    score_path = os.path.join(root, "scores.json")
+    with open(score_path, "w") as f:
+        json.dump(scores, f)
+    return image_dir, score_path, os.path.join(root, "out")
+
+def test_served_lowest_score_first_and_unscored_last():
+    files = ["a.png", "b.png", "c.png", "d.png", "e.png", "f.png"]
+    ordering = PriorityFileList(SCORES, files)
+    assert list(ordering[:]) == ["b.png", "d.png", "c.png", "a.png", "e.png", "f.png"]
+    descending = PriorityFileList(SCORES, files, descending=True)
+    assert descending[0] == "a.png" and descending[-1] == "f.png"
+    skipped = PriorityFileList(SCORES, skip={"b.png"})
+    assert len(skipped) == 3 and skipped[0] == "d.png"
+
+def test_membership_and_iteration_dont_serve_ahead():
+    ordering = PriorityFileList(SCORES)
+    assert ordering[0] == "b.png"
+    assert "c.png" in ordering and "b.png" in ordering and "z.png" not in ordering
+    assert list(ordering) == ["b.png", "d.png", "c.png", "a.png"]
+    assert ordering.is_queued("c.png") and ordering.get_served_position("b.png") == 0
+    # everything not served yet can still be reprioritized after iterating
+    assert ordering.update_score("a.png", 0.0)
+    assert not ordering.update_score("b.png", 0.0)
+    assert list(ordering) == ["b.png", "a.png", "d.png", "c.png"]
+    assert [ordering[i] for i in range(4)] == ["b.png", "a.png", "d.png", "c.png"]
+
+def test_score_updates_mid_session():
+    image_dir, score_path, out_dir = _make_dataset()
+    data_manager = DataManager([image_dir], out_dir, LABELS, score_file=score_path)
+    files = data_manager.get_file_list(checkpoint=False)
+    assert files[0] == "b.png"
+    assert data_manager.update_priority("c.png", 0.0)
+    assert files[1] == "c.png"
+    assert not data_manager.update_priority("b.png", 1.0)
+    assert list(files) == ["b.png", "c.png", "d.png", "a.png"]
+
+def test_resume_skips_labeled_files():
+    image_dir, score_path, out_dir = _make_dataset()
+    data_manager = DataManager([image_dir], out_dir, LABELS, score_file=score_path)
+    files = data_manager.get_file_list(checkpoint=False)
+    data_manager.assign_labels(files[0], "clean")
+    data_manager.assign_labels("a.png", "soiled")
+    data_manager.write_results()
+    resumed = DataManager([image_dir], out_dir, LABELS, score_file=score_path).get_file_list(checkpoint=True)
+    assert list(resumed) == ["d.png", "c.png"]
+    fresh = DataManager([image_dir], out_dir, LABELS, score_file=score_path).get_file_list(checkpoint=False)
+    assert len(fresh) == 4
+
+def test_propagation_reaches_queued_duplicates():
+    scores = {"a.png": 0.1, "b.png": 0.2, "c.png": 0.3, "a_copy.png": 0.4}
+    image_dir, score_path, out_dir = _make_dataset(scores, duplicate_of={"a_copy.png": "a.png"})
+    data_manager = DataManager([image_dir], out_dir, LABELS, score_file=score_path)
+    controller = ReviewerController(data_manager, StubView(), duplicate_radius=2)
+    controller.initialize(checkpoint=False)
+    # setting up propagation doesn't serve the queue
+    assert controller.file_list.is_queued("a_copy.png")
+    controller.get_on_label_clicked_cb("soiled")(None)
+    assert sorted(data_manager.sorter.sorting_dict["soiled"]) == ["a.png", "a_copy.png"]
+    controller.get_on_label_clicked_cb("clean")(None)
+    controller.get_on_label_clicked_cb("clean")(None)
+    assert list(data_manager.sorter.sorting_dict["clean"]) == ["b.png", "c.png"]
+    assert controller._reached_end
+
+def test_load_scores_formats():
+    root = tempfile.mkdtemp()
+    csv_path = os.path.join(root, "scores.csv")
+    with open(csv_path, "w") as f:
+        f.write("filename,score\na.png,0.5\nb.png, 0.25\n")
+    assert load_scores(csv_path) == {"a.png": 0.5, "b.png": 0.25}
+    json_path = os.path.join(root, "scores.json")
+    with open(json_path, "w") as f:
+        json.dump([{"filename": "a.png", "score": 1}], f)
+    assert load_scores(json_path) == {"a.png": 1.0}
+    try:
+        load_scores(os.path.join(root, "scores.txt"))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("an unsupported score file should raise ValueError")
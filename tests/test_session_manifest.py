@@ -0,0 +1,110 @@
+import os, sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.data_manager import DataManager
+from sideeye_reviewer.models.session_manifest import SessionManifest, get_default_manifest_path, get_index_version
+
+
+LABELS = ["clean", "soiled"]
+
+def _make_dataset(num_files=12):
+    root = tempfile.mkdtemp()
+    image_dir = os.path.join(root, "images")
+    os.makedirs(image_dir)
+    for i in range(num_files):
+        with open(os.path.join(image_dir, f"{i:04d}.png"), "wb") as f:
+            f.write(b"not decoded by these tests")
+    return image_dir, os.path.join(root, "out")
+
+def _save_manifest(image_dir, out_dir, cursor):
+    data_manager = DataManager([image_dir], out_dir, LABELS, shuffle_seed=3)
+    files = data_manager.get_file_list(checkpoint=False)
+    manifest = SessionManifest(os.path.join(out_dir, "sorting_output.session.json"))
+    manifest.update(data_manager, cursor)
+    manifest.save()
+    return manifest, list(files)
+
+def test_round_trip_restores_the_listing_and_cursor():
+    image_dir, out_dir = _make_dataset()
+    manifest, shown = _save_manifest(image_dir, out_dir, cursor=5)
+    loaded = SessionManifest.load(manifest.path)
+    assert loaded.cursor == 5 and loaded.num_files == 12 and loaded.labels == LABELS
+    assert loaded.index_version == get_index_version(loaded.load_files())
+    data_manager = DataManager([image_dir], out_dir, LABELS, shuffle_seed=3)
+    assert loaded.apply(data_manager)
+    assert list(data_manager.dataset_files) == list(loaded.load_files())
+    # the seeded order is the same, so the restored cursor lands on the first file that wasn't shown
+    assert list(data_manager.get_file_list(checkpoint=True)) == shown[5:]
+
+def test_changed_dataset_makes_the_manifest_stale():
+    image_dir, out_dir = _make_dataset()
+    manifest, _ = _save_manifest(image_dir, out_dir, cursor=2)
+    with open(os.path.join(image_dir, "new.png"), "wb") as f:
+        f.write(b"added after the session")
+    data_manager = DataManager([image_dir], out_dir, LABELS, shuffle_seed=3)
+    assert SessionManifest.load(manifest.path).get_stale_reason(data_manager) is not None
+    assert not SessionManifest.load(manifest.path).apply(data_manager)
+    other_seed = DataManager([image_dir], out_dir, LABELS, shuffle_seed=4)
+    assert SessionManifest.load(manifest.path).get_stale_reason(other_seed) is not None
+
+def test_edited_listing_is_rejected():
+    image_dir, out_dir = _make_dataset()
+    manifest, _ = _save_manifest(image_dir, out_dir, cursor=0)
+    with open(manifest.files_path, "a", encoding="utf-8") as f:
+        f.write("extra.png\n")
+    try:
+        SessionManifest.load(manifest.path).load_files()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a listing that doesn't match the index version should raise ValueError")
+
+
+class StubView:
+    """ stands in for a reviewer view - the controller only needs somewhere to draw """
+    fig_title = "test"
+    use_tiles = False
+    legend_dict = None
+
+    def setup_gui(self, *args, **kwargs):
+        pass
+
+    def display_image(self, image, ax_idx=0):
+        pass
+
+    def update_title(self, *args):
+        pass
+
+    def update_summary(self, *args):
+        pass
+
+    def display_warning(self, message):
+        pass
+
+    def main_loop(self):
+        pass
+
+def test_default_path_is_kept_out_of_the_results():
+    out_dir = tempfile.mkdtemp()
+    path = get_default_manifest_path(out_dir, "sorting_output.alice.json")
+    assert path == os.path.join(out_dir, "session_logs", "sorting_output.alice.session.json")
+
+def test_every_labeled_image_is_timed_before_the_manifest_is_saved():
+    from PIL import Image
+    from sideeye_reviewer.controllers.review_controller import ReviewerController
+    root = tempfile.mkdtemp()
+    image_dir = os.path.join(root, "images")
+    os.makedirs(image_dir)
+    for i in range(3):
+        Image.new("RGB", (8, 8)).save(os.path.join(image_dir, f"{i:04d}.png"))
+    out_dir = os.path.join(root, "out")
+    data_manager = DataManager([image_dir], out_dir, LABELS)
+    controller = ReviewerController(data_manager, StubView())
+    manifest_path = get_default_manifest_path(out_dir, data_manager.json_name)
+    controller.initialize(checkpoint=False, manifest=manifest_path)
+    for _ in range(3):
+        controller.get_on_label_clicked_cb("clean")(None)
+    # labeling the last image ends the session and saves the manifest
+    saved = SessionManifest.load(manifest_path)
+    assert sorted(saved.timings.positions) == [0, 1, 2]
+    assert saved.cursor == 3
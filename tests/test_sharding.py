@@ -0,0 +1,94 @@
+import os, sys
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sideeye_reviewer.models.sharding import ShardAssigner, find_shard_outputs, get_shard_json_name, merge_shards, stable_hash
+
+
+REVIEWERS = ["alice", "bob", "carol"]
+FILES = [f"{i:05d}.png" for i in range(6000)]
+
+def test_assignment_is_stable():
+    first = ShardAssigner(REVIEWERS, overlap=0.2)
+    second = ShardAssigner(list(REVIEWERS), overlap=0.2)
+    assert all(first.get_reviewers(f) == second.get_reviewers(f) for f in FILES)
+    assert stable_hash("0001.png") == stable_hash("0001.png") != stable_hash("0001.png", salt="round2")
+    salted = ShardAssigner(REVIEWERS, overlap=0.2, salt="round2")
+    assert sum(first.get_reviewers(f) != salted.get_reviewers(f) for f in FILES) > len(FILES) // 2
+    # adding files doesn't move the ones already assigned
+    assert first.get_shard(FILES[:100], "bob") == [f for f in first.get_shard(FILES, "bob") if f in set(FILES[:100])]
+
+def test_shards_cover_every_file_in_order():
+    assigner = ShardAssigner(REVIEWERS)
+    shards = [assigner.get_shard(FILES, r) for r in REVIEWERS]
+    assert sorted(f for shard in shards for f in shard) == FILES
+    assert all(shard == sorted(shard) for shard in shards)
+    # the hash spreads the files roughly evenly
+    assert all(abs(len(shard) - len(FILES) / 3) < 0.05 * len(FILES) for shard in shards)
+
+def test_overlap_fraction():
+    for overlap in (0.0, 0.1, 0.5, 1.0):
+        assigner = ShardAssigner(REVIEWERS, overlap=overlap)
+        assigned = [assigner.get_reviewers(f) for f in FILES]
+        fraction = sum(len(r) == 2 for r in assigned) / len(FILES)
+        assert abs(fraction - overlap) < 0.03, (overlap, fraction)
+        # the second copy always goes to another reviewer
+        assert all(len(set(r)) == len(r) for r in assigned)
+    assert ShardAssigner(["solo"], overlap=1.0).get_reviewers("a.png") == ["solo"]
+
+def test_invalid_reviewers():
+    for reviewers, overlap in (([], 0.0), (["a", "a"], 0.0), (["a", "b"], 1.5)):
+        try:
+            ShardAssigner(reviewers, overlap)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{reviewers} with overlap {overlap} should raise ValueError")
+
+def _write_shards(out_dir, shards):
+    paths = []
+    for reviewer, bins in shards.items():
+        path = os.path.join(out_dir, get_shard_json_name("sorting_output.json", reviewer))
+        with open(path, "w") as f:
+            json.dump(bins, f)
+        paths.append(path)
+    return paths
+
+def test_merge_reports_conflicting_overlap_labels():
+    out_dir = tempfile.mkdtemp()
+    paths = _write_shards(out_dir, {
+        "alice": {"clean": ["a.png", "b.png"], "soiled": ["c.png"]},
+        "bob": {"clean": ["b.png", "d.png"], "soiled": ["a.png"]},
+    })
+    out_path = os.path.join(out_dir, "sorting_output.json")
+    conflicts_path = os.path.join(out_dir, "conflicts.json")
+    merged = merge_shards(paths, out_path, conflicts_out=conflicts_path)
+    # agreeing overlap files appear once, conflicting ones are kept in both bins by default
+    assert merged == {"clean": ["a.png", "b.png", "d.png"], "soiled": ["a.png", "c.png"]}
+    with open(out_path, "r") as f:
+        assert json.load(f) == merged
+    with open(conflicts_path, "r") as f:
+        assert json.load(f) == {"a.png": {"sorting_output.alice.json": ["clean"], "sorting_output.bob.json": ["soiled"]}}
+    dropped = merge_shards(paths, out_path, drop_conflicts=True)
+    assert dropped == {"clean": ["b.png", "d.png"], "soiled": ["c.png"]}
+
+def test_multilabel_conflicts_compare_label_sets():
+    out_dir = tempfile.mkdtemp()
+    paths = _write_shards(out_dir, {
+        "alice": {"glare": ["a.png", "b.png"], "blur": ["a.png"]},
+        "bob": {"glare": ["a.png", "b.png"], "blur": ["a.png", "b.png"]},
+    })
+    conflicts_path = os.path.join(out_dir, "conflicts.json")
+    merge_shards(paths, os.path.join(out_dir, "merged.json"), conflicts_out=conflicts_path)
+    with open(conflicts_path, "r") as f:
+        assert list(json.load(f)) == ["b.png"]
+
+
+def test_only_the_reviewers_outputs_are_found():
+    out_dir = tempfile.mkdtemp()
+    paths = _write_shards(out_dir, {"bob": {"clean": ["a.png"]}, "alice": {"clean": ["b.png"]}})
+    # other JSONs sharing the stem, e.g. a merged copy or files of reviewers outside the list
+    _write_shards(out_dir, {"merged": {"clean": []}, "dave": {"clean": []}})
+    with open(os.path.join(out_dir, "sorting_output.alice.session.json"), "w") as f:
+        json.dump({"cursor": 3}, f)
+    assert find_shard_outputs(out_dir, "sorting_output.json", ["alice", "bob", "carol"]) == paths[::-1]
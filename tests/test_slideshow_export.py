@@ -0,0 +1,67 @@
+import os, sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.data_manager import DataManager
+from sideeye_reviewer.views.slideshow_export import export_slideshow, write_gif
+
+
+def _make_data_manager(num_files=3, num_folders=2):
+    root = tempfile.mkdtemp()
+    folders = []
+    for k in range(num_folders):
+        folder = os.path.join(root, f"folder{k}")
+        os.makedirs(folder)
+        for i in range(num_files):
+            Image.fromarray(np.full((30, 40, 3), 40 * i + 20 * k, dtype=np.uint8)).save(os.path.join(folder, f"{i:04d}.png"))
+        folders.append(folder)
+    files = [f"{i:04d}.png" for i in range(num_files)]
+    return DataManager(folders, file_list=files, enable_sorting=False), os.path.join(root, "export")
+
+def test_every_slide_is_rendered_in_order_with_a_gif():
+    data_manager, out_dir = _make_data_manager()
+    frames = export_slideshow(data_manager, out_dir, max_workers=2, figsize=(4, 3), dpi=50, slide_duration=0.5)
+    assert [os.path.basename(p) for p in frames] == ["frame_00000.png", "frame_00001.png", "frame_00002.png"]
+    sizes = set()
+    for path in frames:
+        with Image.open(path) as frame:
+            sizes.add(frame.size)
+    assert sizes == {(200, 150)}
+    with Image.open(os.path.join(out_dir, "slideshow.gif")) as gif:
+        assert gif.n_frames == 3
+        assert gif.info["duration"] == 500
+        # downscaled by the default gif_scale of 0.5
+        assert gif.size == (100, 75)
+
+def test_file_list_subset_without_gif():
+    data_manager, out_dir = _make_data_manager()
+    frames = export_slideshow(data_manager, out_dir, file_list=["0002.png"], max_workers=1, figsize=(4, 3), dpi=50, gif_name=None)
+    assert len(frames) == 1 and os.path.exists(frames[0])
+    assert sorted(os.listdir(out_dir)) == ["frame_00000.png"]
+
+def test_module_level_transforms_are_applied_and_lambdas_rejected():
+    data_manager, out_dir = _make_data_manager(num_files=1, num_folders=1)
+    data_manager.add_transform(np.fliplr)
+    assert len(export_slideshow(data_manager, out_dir, max_workers=1, figsize=(4, 3), dpi=50, gif_name=None)) == 1
+    data_manager.add_transform(lambda img: img)
+    try:
+        export_slideshow(data_manager, out_dir, max_workers=1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a transform that can't be pickled should raise ValueError")
+
+def test_write_gif_keeps_frame_order():
+    folder = tempfile.mkdtemp()
+    paths = []
+    for i, color in enumerate([(255, 0, 0), (0, 0, 255)]):
+        paths.append(os.path.join(folder, f"{i}.png"))
+        Image.new("RGB", (20, 10), color).save(paths[-1])
+    gif_path = os.path.join(folder, "out.gif")
+    write_gif(paths, gif_path, frame_duration=0.1, scale=1.0)
+    with Image.open(gif_path) as gif:
+        assert gif.size == (20, 10) and gif.n_frames == 2
+        assert gif.convert("RGB").getpixel((0, 0)) == (255, 0, 0)
+        gif.seek(1)
+        assert gif.convert("RGB").getpixel((0, 0)) == (0, 0, 255)
@@ -0,0 +1,121 @@
+import os, sys
+import json
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.event_log import EventLogger
+from sideeye_reviewer.utils.throughput import ThroughputLog
+
+
+class StubView:
+    """ stands in for a reviewer view - the controller only needs somewhere to draw """
+    fig_title = "test"
+    use_tiles = False
+    legend_dict = None
+
+    def setup_gui(self, *args, **kwargs):
+        pass
+
+    def display_image(self, image, ax_idx=0):
+        pass
+
+    def show_page(self, *args):
+        pass
+
+    def update_title(self, *args):
+        pass
+
+    def update_summary(self, *args):
+        pass
+
+    def display_warning(self, message):
+        pass
+
+    def main_loop(self):
+        pass
+
+def _write_log(log_dir, reviewer, events, start=1000.0):
+    """ a session log with one event per second """
+    path = os.path.join(log_dir, f"{reviewer}.s1.ndjson")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"t": start, "e": "session", "reviewer": reviewer, "session": "s1"}) + "\n")
+        for i, event in enumerate(events):
+            f.write(json.dumps({"t": start + i + 1, **event}) + "\n")
+    return path
+
+def test_label_table_with_more_than_64_labels():
+    log_dir = tempfile.mkdtemp()
+    labels = [f"class_{i}" for i in range(100)]
+    events = [{"e": "label", "file": f"{i}.png", "labels": [labels[i], labels[99 - i]], "dwell": 1.0} for i in range(100)]
+    log = ThroughputLog.from_paths([_write_log(log_dir, "alice", events)])
+    assert log.arrays["labels"].shape == (100, 100)
+    rows = {row["label"]: row for row in log.get_label_table()}
+    assert len(rows) == 100
+    assert all(row["count"] == 2 for row in rows.values())
+    assert rows["class_80"]["share"] == 0.02
+
+def test_multi_file_events_become_one_row_per_file():
+    log_dir = tempfile.mkdtemp()
+    _write_log(log_dir, "alice", [
+        {"e": "display", "files": ["a.png", "b.png", "c.png", "d.png"]},
+        {"e": "label", "files": ["a.png", "b.png", "c.png", "d.png"], "labels": ["clean"], "dwell": 8.0},
+        {"e": "undo", "files": ["a.png", "b.png", "c.png", "d.png"]},
+        {"e": "redo", "files": ["a.png", "b.png", "c.png", "d.png"]},
+    ])
+    _write_log(log_dir, "bob", [{"e": "label", "file": "e.png", "labels": ["soiled"], "dwell": 3.0}])
+    log = ThroughputLog.from_paths([log_dir])
+    reviewers = {row["reviewer"]: row for row in log.get_reviewer_table()}
+    assert reviewers["alice"]["labeled"] == 4 and reviewers["alice"]["undos"] == 4
+    assert reviewers["alice"]["undo_rate"] == 1.0
+    assert reviewers["alice"]["median_dwell"] == 2.0
+    assert reviewers["bob"]["labeled"] == 1 and reviewers["bob"]["undo_rate"] == 0.0
+    assert log.get_slow_images(1) == [{"reviewer": "bob", "file": "e.png", "dwell": 3.0}]
+
+def _read_events(logger):
+    logger.close()
+    with open(logger.path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f][1:]
+
+def test_propagated_labels_are_logged_like_their_undo():
+    from sideeye_reviewer.models.data_manager import DataManager
+    from sideeye_reviewer.controllers.review_controller import ReviewerController
+    root = tempfile.mkdtemp()
+    image_dir = os.path.join(root, "images")
+    os.makedirs(image_dir)
+    for i, name in enumerate(["0_x.png", "1_b.png"]):
+        pixels = np.random.default_rng(i).integers(0, 256, (8, 8), dtype=np.uint8)
+        Image.fromarray(pixels).resize((64, 64), Image.BILINEAR).save(os.path.join(image_dir, name))
+    shutil.copyfile(os.path.join(image_dir, "0_x.png"), os.path.join(image_dir, "2_x.png"))
+    files = ["0_x.png", "1_b.png", "2_x.png"]
+    data_manager = DataManager([image_dir], os.path.join(root, "out"), ["clean", "soiled"], file_list=files)
+    logger = EventLogger(os.path.join(root, "logs"), reviewer_id="alice")
+    controller = ReviewerController(data_manager, StubView(), duplicate_radius=2, event_log=logger)
+    controller.initialize(checkpoint=False)
+    controller.get_on_label_clicked_cb("soiled")(None)
+    controller.on_undo_clicked(None)
+    events = {event["e"]: event for event in _read_events(logger)}
+    assert events["label"]["files"] == ["0_x.png", "2_x.png"]
+    assert events["undo"]["files"] == events["label"]["files"]
+    assert ThroughputLog.from_paths([logger.path]).get_reviewer_table()[0]["undo_rate"] == 1.0
+
+def test_batch_redo_is_logged_as_redo():
+    from sideeye_reviewer.models.data_manager import DataManager
+    from sideeye_reviewer.controllers.batch_controller import BatchReviewerController
+    root = tempfile.mkdtemp()
+    image_dir = os.path.join(root, "images")
+    os.makedirs(image_dir)
+    for i in range(4):
+        Image.new("RGB", (16, 16), (i * 50, 0, 0)).save(os.path.join(image_dir, f"{i}.png"))
+    data_manager = DataManager([image_dir], os.path.join(root, "out"), ["clean", "soiled"], thumbnail_cache_dir=os.path.join(root, "thumbs"))
+    logger = EventLogger(os.path.join(root, "logs"), reviewer_id="alice")
+    controller = BatchReviewerController(data_manager, StubView(), nrows=1, ncols=2, event_log=logger)
+    controller.initialize(checkpoint=False)
+    controller.get_on_label_clicked_cb("clean")(None)
+    controller.on_undo_clicked(None)
+    controller.on_redo_clicked(None)
+    kinds = [event["e"] for event in _read_events(logger) if event["e"] != "display"]
+    assert kinds == ["label", "undo", "redo"]
+    alice = ThroughputLog.from_paths([logger.path]).get_reviewer_table()[0]
+    assert alice["labeled"] == 2 and alice["undos"] == 2
@@ -0,0 +1,99 @@
+import os, sys
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.thumbnail_cache import ThumbnailCache
+from sideeye_reviewer.utils.montage import compose_grid, get_cell_index, get_grid_shape
+
+
+def _make_image(folder, name, size=(600, 400), seed=0):
+    rng = np.random.default_rng(seed)
+    path = os.path.join(folder, name)
+    Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)).save(path)
+    return path
+
+def _count_thumbnails(cache_dir):
+    return sum(len([f for f in files if f.endswith(".npy")]) for _, _, files in os.walk(cache_dir))
+
+def test_thumbnails_fit_the_max_size():
+    root = tempfile.mkdtemp()
+    cache = ThumbnailCache(os.path.join(root, "cache"), max_size=64)
+    thumb = cache.get_thumbnail(_make_image(root, "a.jpg"))
+    assert max(thumb.shape[:2]) == 64
+    assert thumb.dtype == np.uint8
+
+def test_identical_contents_share_one_entry():
+    root = tempfile.mkdtemp()
+    cache_dir = os.path.join(root, "cache")
+    cache = ThumbnailCache(cache_dir, max_size=64)
+    original = _make_image(root, "a.png")
+    copy = os.path.join(root, "copy_of_a.png")
+    shutil.copyfile(original, copy)
+    other = _make_image(root, "b.png", seed=1)
+    assert cache.get_content_hash(original) == cache.get_content_hash(copy)
+    assert cache.get_content_hash(original) != cache.get_content_hash(other)
+    cache.get_thumbnails([original, copy, other])
+    assert _count_thumbnails(cache_dir) == 2
+
+def test_cached_thumbnail_only_returned_on_a_hit():
+    root = tempfile.mkdtemp()
+    cache_dir = os.path.join(root, "cache")
+    path = _make_image(root, "a.jpg")
+    assert ThumbnailCache(cache_dir, max_size=64).get_cached_thumbnail(path) is None
+    generated = ThumbnailCache(cache_dir, max_size=64).get_thumbnail(path)
+    # a fresh instance (no in-memory memo) finds the thumbnail through the on-disk index
+    cached = ThumbnailCache(cache_dir, max_size=64).get_cached_thumbnail(path)
+    assert cached is not None and np.array_equal(cached, generated)
+    # another size is a separate entry
+    assert ThumbnailCache(cache_dir, max_size=32).get_cached_thumbnail(path) is None
+
+def test_png_thumbnails_are_floats_like_imread():
+    root = tempfile.mkdtemp()
+    cache = ThumbnailCache(os.path.join(root, "cache"), max_size=64)
+    path = _make_image(root, "a.png")
+    for thumb in (cache.get_thumbnail(path), cache.get_cached_thumbnail(path)):
+        assert thumb.dtype == np.float32
+        assert 0.0 <= thumb.min() and thumb.max() <= 1.0
+
+def test_modified_file_is_rehashed():
+    root = tempfile.mkdtemp()
+    cache = ThumbnailCache(os.path.join(root, "cache"), max_size=64)
+    path = _make_image(root, "a.png")
+    before = cache.get_content_hash(path)
+    _make_image(root, "a.png", size=(300, 200), seed=2)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert cache.get_content_hash(path) != before
+    assert max(cache.get_thumbnail(path).shape[:2]) == 64
+
+def test_grid_shape():
+    assert get_grid_shape(48, 8) == (6, 8)
+    assert get_grid_shape(9, 8) == (2, 8)
+    assert get_grid_shape(3, 8) == (1, 3)
+    assert get_grid_shape(0, 8) == (1, 1)
+
+def test_compose_grid_places_and_centers_cells():
+    cell_size, pad = 10, 4
+    red = np.zeros((10, 10, 3), dtype=np.uint8)
+    red[..., 0] = 255
+    gray = np.full((4, 10), 0.5, dtype=np.float32)
+    grid = compose_grid([red, gray], nrows=2, ncols=2, cell_size=cell_size, pad=pad, background=0)
+    assert grid.shape == (2 * (cell_size + pad) + pad, 2 * (cell_size + pad) + pad, 3)
+    assert (grid[pad:pad + 10, pad:pad + 10] == [255, 0, 0]).all()
+    # the short grayscale image is centered vertically in the second cell and converted to RGB
+    left = pad + cell_size + pad
+    assert (grid[pad + 3:pad + 7, left:left + 10] == 127).all()
+    assert (grid[pad:pad + 3, left:left + 10] == 0).all()
+    # unused cells stay background
+    assert (grid[pad + cell_size + pad:, :] == 0).all()
+
+def test_cell_index_inverts_compose_grid():
+    nrows, ncols, cell_size, pad = 3, 4, 20, 4
+    for idx in range(nrows * ncols):
+        row, col = divmod(idx, ncols)
+        x = pad + col * (cell_size + pad) + cell_size // 2
+        y = pad + row * (cell_size + pad) + cell_size // 2
+        assert get_cell_index(x, y, nrows, ncols, cell_size, pad) == idx
+    assert get_cell_index(-5, 10, nrows, ncols, cell_size, pad) == -1
+    assert get_cell_index(10, pad + nrows * (cell_size + pad) + 1, nrows, ncols, cell_size, pad) == -1
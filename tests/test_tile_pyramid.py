@@ -0,0 +1,55 @@
+import os, sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import numpy as np
+from PIL import Image
+from sideeye_reviewer.models.tile_pyramid import TilePyramid
+
+
+def _make_image(width=1100, height=700, mode="RGB"):
+    root = tempfile.mkdtemp()
+    rng = np.random.default_rng(0)
+    shape = (height, width, 3) if mode == "RGB" else (height, width)
+    path = os.path.join(root, "large.png")
+    Image.fromarray(rng.integers(0, 256, shape, dtype=np.uint8)).convert(mode).save(path)
+    return path, os.path.join(root, "tiles")
+
+def test_every_level_covers_the_image_at_its_resolution():
+    for mode in ("RGB", "L", "P"):
+        path, cache_dir = _make_image(mode=mode)
+        pyramid = TilePyramid(path, cache_dir, tile_size=256)
+        assert pyramid.num_levels == 4
+        for level in range(pyramid.num_levels):
+            region, extent = pyramid.get_region(level, 0, 0, pyramid.width, pyramid.height)
+            assert region.shape[:2] == pyramid.get_level_shape(level), f"{mode} level {level}"
+            assert extent == (0, 1100, 700, 0)
+        assert pyramid.get_overview().shape[:2] == (88, 138)
+        # palette images are converted to RGB tiles
+        assert pyramid.get_tile(0, 0, 0).ndim == (2 if mode == "L" else 3)
+
+def test_levels_are_downsampled_from_the_previous_level():
+    path, cache_dir = _make_image(width=512, height=512)
+    pyramid = TilePyramid(path, cache_dir, tile_size=128)
+    full = np.asarray(Image.open(path)).astype(np.float64)
+    level_1, _ = pyramid.get_region(1, 0, 0, 512, 512)
+    expected = full.reshape(256, 2, 256, 2, 3).mean(axis=(1, 3))
+    assert np.abs(level_1.astype(np.float64) - expected).max() <= 1.0
+    assert np.array_equal(pyramid.get_region(0, 0, 0, 512, 512)[0], full.astype(np.uint8))
+
+def test_levels_are_cached_on_disk():
+    path, cache_dir = _make_image()
+    TilePyramid(path, cache_dir, tile_size=256).get_overview()
+    # the coarsest level is built through every finer one, which all end up cached
+    reopened = TilePyramid(path, cache_dir, tile_size=256)
+    assert all(reopened._is_level_ready(level) for level in range(reopened.num_levels))
+    # a different tile size (or a modified image) gets its own cache
+    assert not TilePyramid(path, cache_dir, tile_size=128)._is_level_ready(0)
+
+def test_region_and_level_selection():
+    path, cache_dir = _make_image()
+    pyramid = TilePyramid(path, cache_dir, tile_size=256)
+    region, extent = pyramid.get_region(0, 300, 300, 600, 400)
+    assert extent == (256, 768, 512, 256) and region.shape[:2] == (256, 512)
+    assert pyramid.choose_level(500, 500, 1000, 1000) == 0
+    assert pyramid.choose_level(4000, 1000, 1000, 1000) == 2
+    assert pyramid.choose_level(1e6, 1e6, 10, 10) == pyramid.num_levels - 1